@@ -0,0 +1,111 @@
+# assignments/exports.py
+import csv
+import io
+import zipfile
+from pathlib import Path
+from urllib.request import urlopen
+from django.conf import settings
+from django.utils.text import slugify
+from classsphere.storage import SignedToken, load_backend, stored_name
+
+# Submission exports are streamed: each file is copied into the ZIP chunk by chunk and the
+# bytes are handed to the response as soon as zipfile writes them, so memory use does not
+# depend on the size of the archive.
+
+
+class CloudinarySubmissionStorage:
+    """Reads submission files back from Cloudinary over HTTPS."""
+
+    def open(self, file):
+        return urlopen(file.url, timeout=60)
+
+
+class LocalSubmissionStorage:
+    """Reads submission files from SUBMISSION_EXPORT_LOCAL_ROOT; for development and tests."""
+
+    def __init__(self):
+        self.root = Path(settings.SUBMISSION_EXPORT_LOCAL_ROOT)
+
+    def open(self, file):
+        return open(self.root / stored_name(file), 'rb')
+
+
+def get_export_storage():
+    return load_backend("SUBMISSION_EXPORT_STORAGE")
+
+
+EXPORT_TOKEN = SignedToken("assignments.submission-export", "SUBMISSION_EXPORT_TOKEN_TTL_SECONDS")
+
+
+def sign_export(assignment_id, user_id):
+    """Short-lived download token, so the browser can fetch the archive without the JWT header."""
+    return EXPORT_TOKEN.sign(assignment_id=assignment_id, user_id=user_id)
+
+
+def load_export(token):
+    return EXPORT_TOKEN.load(token)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file object; zipfile then streams entries with data descriptors."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def export_filename(assignment):
+    return f"{slugify(assignment.topic) or 'assignment'}-{assignment.id}-submissions.zip"
+
+
+def stream_submissions_zip(assignment, submissions, storage, chunk_size=None):
+    """
+    Yield a ZIP of every submission file plus a manifest.csv (student, submitted_at, score, file).
+
+    `submissions` should select_related('student'). A file that cannot be read is marked
+    "missing" (or "incomplete", if it failed part way) in the manifest instead of aborting
+    the whole download.
+    """
+    chunk_size = chunk_size or settings.SUBMISSION_EXPORT_CHUNK_SIZE
+    sink = _ChunkSink()
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(['student', 'submitted_at', 'late', 'score', 'file'])
+
+    with zipfile.ZipFile(sink, 'w', allowZip64=True) as archive:
+        for submission in submissions.iterator(chunk_size=200):
+            name = stored_name(submission.file)
+            entry = f"{submission.student.username}/{submission.id}{Path(name).suffix}"
+            started = False
+            try:
+                with storage.open(submission.file) as source:
+                    # Submissions are mostly PDFs and Office files, which are already compressed
+                    with archive.open(zipfile.ZipInfo(entry, submission.submitted_at.timetuple()[:6]), 'w', force_zip64=True) as target:
+                        started = True
+                        while data := source.read(chunk_size):
+                            target.write(data)
+                            yield sink.drain()
+            except OSError:
+                entry = f"{entry} (incomplete)" if started else 'missing'
+            writer.writerow([
+                submission.student.username,
+                submission.submitted_at.isoformat(),
+                submission.submitted_at > assignment.last_date,
+                '' if submission.score is None else submission.score,
+                entry,
+            ])
+            yield sink.drain()
+
+        archive.writestr('manifest.csv', manifest.getvalue(), compress_type=zipfile.ZIP_DEFLATED)
+    yield sink.drain()
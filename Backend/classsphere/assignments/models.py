@@ -26,5 +26,42 @@ class Submission(models.Model):
     submitted_at = models.DateTimeField(auto_now_add=True)
     score = models.PositiveIntegerField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['assignment', '-submitted_at', '-id'], name='submission_assignment_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.assignment.topic}"
+
+class SubmissionUpload(models.Model):
+    """
+    Intake record for a submission file: either a resumable chunked upload or a single-request
+    submit, staged on local disk until the assembly task stores it and records the Submission.
+    """
+    STATUS_UPLOADING = 'uploading'
+    STATUS_ASSEMBLING = 'assembling'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_UPLOADING, 'Uploading'),
+        (STATUS_ASSEMBLING, 'Assembling'),
+        (STATUS_COMPLETE, 'Complete'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='uploads')
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='submission_uploads')
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    # Everything before this offset is safely on disk; the next chunk must start here
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_UPLOADING)
+    # When the last byte arrived; this, not the processing time, is checked against the deadline
+    received_at = models.DateTimeField(null=True, blank=True)
+    submission = models.ForeignKey(Submission, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
     def __str__(self):
-        return f"{self.student.username} - {self.assignment.topic}"
\ No newline at end of file
+        return f"{self.student.username} - {self.filename} ({self.status})"
@@ -1,5 +1,6 @@
+from django.conf import settings
 from rest_framework import serializers
-from .models import Assignment, Submission
+from .models import Assignment, Submission, SubmissionUpload
 
 class SubmissionSerializer(serializers.ModelSerializer):
     student_name = serializers.SerializerMethodField()
@@ -20,22 +21,65 @@ class SubmissionSerializer(serializers.ModelSerializer):
 
 
 class AssignmentSerializer(serializers.ModelSerializer):
-    submissions = SubmissionSerializer(many=True, read_only=True)
     file_url = serializers.SerializerMethodField()
     submission_score = serializers.SerializerMethodField()
 
     class Meta:
         model = Assignment
-        fields = ['id', 'classroom', 'teacher', 'topic', 'description', 'last_date', 'total_marks', 'created_at', 'submissions', 'file_url', 'submission_score']
-        read_only_fields = ['teacher', 'created_at', 'submissions']
+        fields = ['id', 'classroom', 'teacher', 'topic', 'description', 'last_date', 'total_marks', 'created_at', 'file_url', 'submission_score']
+        read_only_fields = ['teacher', 'created_at']
+
+    def get_latest_submission(self, obj):
+        """The requesting user's latest submission, from prefetched rows when available."""
+        own = getattr(obj, 'own_submissions', None)
+        if own is None:
+            own = obj.submissions.filter(student=self.context['request'].user).order_by('-submitted_at')[:1]
+        return own[0] if own else None
 
     def get_file_url(self, obj):
-        if obj.submissions.exists():
-            latest_submission = obj.submissions.filter(student=self.context['request'].user).order_by('-submitted_at').first()
-            if latest_submission and latest_submission.file:
-                return latest_submission.file.url
+        latest_submission = self.get_latest_submission(obj)
+        if latest_submission and latest_submission.file:
+            return latest_submission.file.url
         return None
 
     def get_submission_score(self, obj):
-        latest_submission = obj.submissions.filter(student=self.context['request'].user).order_by('-submitted_at').first()
+        latest_submission = self.get_latest_submission(obj)
         return latest_submission.score if latest_submission else None
+
+
+class TeacherAssignmentSerializer(AssignmentSerializer):
+    """
+    Teacher view: submission counts only, annotated on the queryset. The rows themselves
+    are paged from assignments/<slug>/<id>/submissions/ so the list stays small.
+    """
+    submission_count = serializers.IntegerField(read_only=True)
+    graded_count = serializers.IntegerField(read_only=True)
+
+    class Meta(AssignmentSerializer.Meta):
+        fields = AssignmentSerializer.Meta.fields + ['submission_count', 'graded_count']
+
+    def get_latest_submission(self, obj):
+        return None
+
+
+class StudentAssignmentSerializer(AssignmentSerializer):
+    """Student view: only the requesting student's own submissions are included."""
+    submissions = serializers.SerializerMethodField()
+
+    class Meta(AssignmentSerializer.Meta):
+        fields = AssignmentSerializer.Meta.fields + ['submissions']
+
+    def get_submissions(self, obj):
+        return SubmissionSerializer(obj.own_submissions, many=True, context=self.context).data
+
+
+class SubmissionUploadSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SubmissionUpload
+        fields = ['id', 'filename', 'total_size', 'received_bytes', 'chunk_size', 'status', 'submission', 'received_at', 'created_at']
+        read_only_fields = fields
+
+    def get_chunk_size(self, obj):
+        return settings.SUBMISSION_UPLOAD_CHUNK_SIZE
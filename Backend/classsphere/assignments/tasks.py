@@ -0,0 +1,111 @@
+# assignments/tasks.py
+from datetime import timedelta
+import cloudinary.uploader  # type: ignore
+from celery import shared_task  # type: ignore
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from materials.tasks import UPLOAD_CHUNK_SIZE
+from notifications.utils import notify_user
+from .models import Submission, SubmissionUpload
+from .uploads import assemble_chunks, discard_chunks
+
+logger = get_task_logger(__name__)
+
+
+def mark_upload_failed(upload):
+    SubmissionUpload.objects.filter(id=upload.id).update(status=SubmissionUpload.STATUS_FAILED, updated_at=timezone.now())
+    upload.status = SubmissionUpload.STATUS_FAILED
+    discard_chunks(upload)
+
+
+def notify_upload_failed(upload):
+    notify_user(
+        user=upload.student,
+        message=f"Your submission for '{upload.assignment.topic}' could not be processed. Please upload it again.",
+        notification_type='ERROR'
+    )
+
+
+def enqueue_assembly(upload):
+    """Queue the assembly task; if the broker refuses it the upload fails instead of staying assembling."""
+    try:
+        assemble_submission_upload_task.delay(upload.id)
+    except Exception as exc:
+        logger.error(f"Could not queue assembly of upload {upload.id}: {exc}")
+        mark_upload_failed(upload)
+
+
+@shared_task(bind=True, max_retries=3)
+def assemble_submission_upload_task(self, upload_id):
+    """Joins the staged chunks of a finished upload, pushes the file to Cloudinary and records the submission."""
+    upload = (
+        SubmissionUpload.objects.select_related('assignment__classroom__teacher', 'student')
+        .filter(id=upload_id, status=SubmissionUpload.STATUS_ASSEMBLING)
+        .first()
+    )
+    if upload is None:
+        return
+    assignment = upload.assignment
+
+    try:
+        assembled_path = assemble_chunks(upload)
+        result = cloudinary.uploader.upload_large(
+            assembled_path, resource_type='raw', folder='submissions', chunk_size=UPLOAD_CHUNK_SIZE
+        )
+    except Exception as exc:
+        if self.request.retries < self.max_retries and not isinstance(exc, (FileNotFoundError, ValueError)):
+            logger.warning(f"Assembling upload {upload_id} failed, retrying: {exc}")
+            raise self.retry(exc=exc, countdown=30)
+
+        logger.error(f"Assembling upload {upload_id} failed: {exc}")
+        mark_upload_failed(upload)
+        notify_upload_failed(upload)
+        return
+
+    with transaction.atomic():
+        # One submission per student and assignment; a resubmission replaces the file
+        submission, _ = Submission.objects.update_or_create(
+            assignment=assignment,
+            student=upload.student,
+            defaults={'file': result['public_id']},
+        )
+        # Stamp the time the file was received, not when this (possibly queued) task ran
+        Submission.objects.filter(id=submission.id).update(submitted_at=upload.received_at or timezone.now())
+        SubmissionUpload.objects.filter(id=upload_id).update(
+            status=SubmissionUpload.STATUS_COMPLETE, submission=submission
+        )
+    discard_chunks(upload)
+
+    notify_user(
+        user=assignment.classroom.teacher,
+        message=f"{upload.student.username} submitted '{assignment.topic}' in {assignment.classroom.name}",
+        notification_type='INFO'
+    )
+
+
+@shared_task
+def purge_stale_submission_uploads_task():
+    """Drops abandoned, failed and long-finished uploads along with any staged chunks."""
+    # An upload still assembling after the timeout lost its task (worker crash, dropped message)
+    assembly_cutoff = timezone.now() - timedelta(minutes=settings.SUBMISSION_UPLOAD_ASSEMBLY_TIMEOUT_MINUTES)
+    stuck = SubmissionUpload.objects.select_related('assignment', 'student').filter(
+        status=SubmissionUpload.STATUS_ASSEMBLING, updated_at__lt=assembly_cutoff
+    )
+    for upload in stuck:
+        logger.warning(f"Upload {upload.id} was never assembled; marking it failed")
+        mark_upload_failed(upload)
+        notify_upload_failed(upload)
+
+    cutoff = timezone.now() - timedelta(hours=settings.SUBMISSION_UPLOAD_EXPIRY_HOURS)
+    stale = list(
+        SubmissionUpload.objects.filter(updated_at__lt=cutoff)
+        .exclude(status=SubmissionUpload.STATUS_ASSEMBLING)
+        .only('id')
+    )
+    for upload in stale:
+        discard_chunks(upload)
+    SubmissionUpload.objects.filter(id__in=[upload.id for upload in stale]).delete()
+    logger.info(f"Purged {len(stale)} stale submission uploads")
+    return len(stale)
@@ -1,3 +1,331 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import User
+from classroom.models import Classroom, Student
+from notifications.models import Notification
+from .models import Assignment, Submission, SubmissionUpload
+from .tasks import purge_stale_submission_uploads_task
+from .uploads import upload_dir, write_chunk
 
-# Create your tests here.
+
+class AssignmentViewTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass", role="teacher"
+        )
+        self.classroom = Classroom.objects.create(
+            name="Maths", category="Science", code="MATH01", max_participants=50,
+            start_datetime=timezone.now(), end_datetime=timezone.now() + timezone.timedelta(days=30),
+            teacher=self.teacher,
+        )
+        self.students = []
+        for index in range(3):
+            user = User.objects.create_user(
+                username=f"student{index}", email=f"student{index}@example.com", password="pass", role="student"
+            )
+            Student.objects.create(user=user).joined_classes.add(self.classroom)
+            self.students.append(user)
+
+        for index in range(5):
+            assignment = Assignment.objects.create(
+                classroom=self.classroom, teacher=self.teacher, topic=f"Assignment {index}",
+                description="Solve it", last_date=timezone.now() + timezone.timedelta(days=7), total_marks=10,
+            )
+            for score, student in enumerate(self.students):
+                Submission.objects.create(assignment=assignment, student=student, file="submissions/answer.pdf", score=score)
+
+        self.url = f"/api/assignments/{self.classroom.slug}/"
+        self.client = APIClient()
+
+    def test_student_sees_only_own_submission_in_constant_queries(self):
+        student = self.students[1]
+        self.client.force_authenticate(student)
+
+        # classroom, assignments, the student's submissions
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data), 5)
+        for assignment in response.data:
+            self.assertEqual([s["student"] for s in assignment["submissions"]], [student.id])
+            self.assertEqual(assignment["submission_score"], 1)
+            self.assertIsNotNone(assignment["file_url"])
+
+    def test_teacher_sees_submission_counts_in_constant_queries(self):
+        self.client.force_authenticate(self.teacher)
+        Submission.objects.filter(score=0).update(score=None)
+
+        # classroom, annotated assignments
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data), 5)
+        for assignment in response.data:
+            self.assertNotIn("submissions", assignment)
+            self.assertEqual((assignment["submission_count"], assignment["graded_count"]), (3, 2))
+            self.assertIsNone(assignment["submission_score"])
+
+    def test_submission_list_pages_and_filters(self):
+        self.client.force_authenticate(self.teacher)
+        assignment = Assignment.objects.first()
+        url = f"{self.url}{assignment.id}/submissions/"
+        submissions = list(assignment.submissions.order_by("id"))
+        late = submissions[2]
+        Submission.objects.filter(pk=late.pk).update(
+            submitted_at=assignment.last_date + timezone.timedelta(hours=1), score=None
+        )
+
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            # assignment, page of submissions with students
+            with self.assertNumQueries(2):
+                response = self.client.get(url, params)
+            seen += [row["id"] for row in response.data["results"]]
+            cursor = response.data["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(seen[0], late.id)
+        self.assertCountEqual(seen, [s.id for s in submissions])
+
+        response = self.client.get(url, {"late": "true"})
+        self.assertEqual([row["id"] for row in response.data["results"]], [late.id])
+        response = self.client.get(url, {"graded": "true", "late": "false"})
+        self.assertCountEqual([row["id"] for row in response.data["results"]], [s.id for s in submissions[:2]])
+        self.assertEqual(self.client.get(url, {"graded": "maybe"}).status_code, 400)
+
+        self.client.force_authenticate(self.students[0])
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_bulk_grading_applies_all_scores_and_notifies_once_per_student(self):
+        self.client.force_authenticate(self.teacher)
+        assignment = Assignment.objects.first()
+        submissions = list(assignment.submissions.order_by("id"))
+        grades = [{"submission_id": s.id, "score": 7 + index} for index, s in enumerate(submissions)]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f"{self.url}{assignment.id}/submissions/grade/", {"grades": grades}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], 3)
+        self.assertEqual(
+            list(assignment.submissions.order_by("id").values_list("score", flat=True)), [7, 8, 9]
+        )
+        self.assertEqual(
+            Notification.objects.filter(message__startswith=f"Your submission for '{assignment.topic}'").count(), 3
+        )
+
+    def test_bulk_grading_rejects_the_whole_batch_on_invalid_scores(self):
+        self.client.force_authenticate(self.teacher)
+        assignment = Assignment.objects.first()
+        other = Assignment.objects.exclude(id=assignment.id).first().submissions.first()
+        first, second = assignment.submissions.order_by("id")[:2]
+
+        for grades in (
+            [{"submission_id": first.id, "score": 5}, {"submission_id": second.id, "score": 11}],
+            [{"submission_id": first.id, "score": 5}, {"submission_id": other.id, "score": 5}],
+            [{"submission_id": first.id, "score": 5}, {"submission_id": second.id, "score": 8.9}],
+            [{"submission_id": first.id, "score": 5}, {"submission_id": second.id, "score": True}],
+            [{"submission_id": first.id, "score": 5}, {"submission_id": second.id, "score": "7"}],
+        ):
+            response = self.client.post(
+                f"{self.url}{assignment.id}/submissions/grade/", {"grades": grades}, format="json"
+            )
+            self.assertEqual(response.status_code, 400)
+
+        first.refresh_from_db()
+        self.assertEqual(first.score, 0)
+
+    def test_export_streams_zip_with_manifest(self):
+        assignment = Assignment.objects.first()
+        submissions = list(assignment.submissions.select_related("student").order_by("student__username"))
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            SUBMISSION_EXPORT_STORAGE="assignments.exports.LocalSubmissionStorage",
+            SUBMISSION_EXPORT_LOCAL_ROOT=root,
+            SUBMISSION_EXPORT_CHUNK_SIZE=1024,
+        ):
+            # One readable file of several chunks; the other two are missing from storage
+            Path(root, "submissions").mkdir()
+            Path(root, "submissions", "answer.pdf").write_bytes(b"x" * 5000)
+            Submission.objects.filter(pk__in=[s.pk for s in submissions[1:]]).update(file="submissions/gone.pdf")
+
+            self.client.force_authenticate(self.teacher)
+            response = self.client.post(f"{self.url}{assignment.id}/submissions/export/")
+            self.assertEqual(response.status_code, 200)
+            download_url = response.data["download_url"]
+
+            self.client.force_authenticate(None)
+            response = self.client.get(download_url)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.streaming)
+            archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+        first = submissions[0]
+        self.assertEqual(archive.read(f"{first.student.username}/{first.id}.pdf"), b"x" * 5000)
+        rows = list(csv.DictReader(io.StringIO(archive.read("manifest.csv").decode())))
+        self.assertEqual([row["student"] for row in rows], [s.student.username for s in submissions])
+        self.assertEqual([row["file"] for row in rows][1:], ["missing", "missing"])
+        self.assertEqual(rows[0]["score"], str(first.score))
+
+        self.assertEqual(self.client.get(download_url.replace("/export/", "/export/x")).status_code, 403)
+
+
+class SubmissionUploadTests(TestCase):
+    def setUp(self):
+        staging = tempfile.TemporaryDirectory()
+        self.addCleanup(staging.cleanup)
+        settings_override = override_settings(SUBMISSION_UPLOAD_STAGING_ROOT=staging.name, SUBMISSION_UPLOAD_CHUNK_SIZE=4)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        upload_patch = mock.patch("assignments.tasks.cloudinary.uploader.upload_large")
+        self.upload_large = upload_patch.start()
+        self.addCleanup(upload_patch.stop)
+
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass", role="teacher"
+        )
+        self.classroom = Classroom.objects.create(
+            name="Maths", category="Science", code="MATH01", max_participants=50,
+            start_datetime=timezone.now(), end_datetime=timezone.now() + timezone.timedelta(days=30),
+            teacher=self.teacher,
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@example.com", password="pass", role="student"
+        )
+        Student.objects.create(user=self.student).joined_classes.add(self.classroom)
+        self.assignment = Assignment.objects.create(
+            classroom=self.classroom, teacher=self.teacher, topic="Essay", description="Write it",
+            last_date=timezone.now() + timezone.timedelta(days=7), total_marks=10,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+        response = self.client.post(
+            f"/api/assignments/{self.classroom.slug}/{self.assignment.id}/submit/uploads/",
+            {"filename": "essay.pdf", "size": 10},
+        )
+        self.assertEqual(response.status_code, 201)
+        self.upload_url = f"/api/assignments/{self.classroom.slug}/{self.assignment.id}/submit/uploads/{response.data['id']}/"
+
+    def put_chunk(self, offset, data):
+        return self.client.put(
+            f"{self.upload_url}chunk/", {"offset": offset, "chunk": SimpleUploadedFile("blob", data)}, format="multipart"
+        )
+
+    def test_chunk_at_wrong_offset_is_rejected_with_resume_point(self):
+        response = self.put_chunk(4, b"5678")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["received_bytes"], 0)
+
+        self.assertEqual(self.put_chunk(0, b"1234").status_code, 200)
+        # A retried chunk the server already has does not advance the offset again
+        response = self.put_chunk(0, b"1234")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["received_bytes"], 4)
+
+    def test_out_of_order_chunk_is_rejected(self):
+        self.assertEqual(self.put_chunk(0, b"1234").status_code, 200)
+        response = self.put_chunk(8, b"90")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["received_bytes"], 4)
+        self.assertEqual(sorted(os.listdir(upload_dir(SubmissionUpload.objects.get()))), [f"{0:020d}.chunk"])
+
+    def test_complete_with_missing_bytes_is_rejected(self):
+        self.put_chunk(0, b"1234")
+        self.put_chunk(4, b"5678")
+        response = self.client.post(f"{self.upload_url}complete/")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["received_bytes"], 8)
+        self.assertEqual(SubmissionUpload.objects.get().status, SubmissionUpload.STATUS_UPLOADING)
+
+    def test_complete_assembles_chunks_into_a_submission(self):
+        assembled = {}
+
+        def upload_large(path, **kwargs):
+            assembled["data"] = Path(path).read_bytes()
+            return {"public_id": "submissions/essay"}
+
+        self.upload_large.side_effect = upload_large
+        for offset, data in ((0, b"1234"), (4, b"5678"), (8, b"90")):
+            self.assertEqual(self.put_chunk(offset, data).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"{self.upload_url}complete/")
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.post(f"{self.upload_url}complete/").status_code, 409)
+
+        self.assertEqual(assembled["data"], b"1234567890")
+        upload = SubmissionUpload.objects.get()
+        self.assertEqual(upload.status, SubmissionUpload.STATUS_COMPLETE)
+        self.assertEqual(str(upload.submission.file), "submissions/essay")
+        self.assertEqual(upload.submission.submitted_at, upload.received_at)
+        self.assertFalse(os.path.exists(upload_dir(upload)))
+
+    def test_purge_drops_stale_uploads_and_their_chunks(self):
+        stale = SubmissionUpload.objects.get()
+        self.put_chunk(0, b"1234")
+        fresh = SubmissionUpload.objects.create(assignment=self.assignment, student=self.student, filename="b.pdf", total_size=4)
+        write_chunk(fresh, 0, SimpleUploadedFile("blob", b"1234"))
+        SubmissionUpload.objects.filter(id=stale.id).update(updated_at=timezone.now() - timezone.timedelta(days=2))
+
+        self.assertEqual(purge_stale_submission_uploads_task(), 1)
+        self.assertEqual(list(SubmissionUpload.objects.values_list("id", flat=True)), [fresh.id])
+        self.assertFalse(os.path.exists(upload_dir(stale)))
+        self.assertTrue(os.path.exists(upload_dir(fresh)))
+
+    def test_upload_is_failed_when_assembly_cannot_be_queued(self):
+        for offset, data in ((0, b"1234"), (4, b"5678"), (8, b"90")):
+            self.put_chunk(offset, data)
+
+        with mock.patch("assignments.tasks.assemble_submission_upload_task.delay", side_effect=OSError("broker down")):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(f"{self.upload_url}complete/")
+
+        upload = SubmissionUpload.objects.get()
+        self.assertEqual(upload.status, SubmissionUpload.STATUS_FAILED)
+        self.assertFalse(os.path.exists(upload_dir(upload)))
+
+    def test_single_request_submit_is_failed_when_the_file_cannot_be_staged(self):
+        SubmissionUpload.objects.all().delete()
+        with mock.patch("assignments.views.write_chunk", side_effect=OSError("disk full")):
+            response = self.client.post(
+                f"/api/assignments/{self.classroom.slug}/{self.assignment.id}/submit/",
+                {"file": SimpleUploadedFile("essay.pdf", b"1234")},
+            )
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(SubmissionUpload.objects.get().status, SubmissionUpload.STATUS_FAILED)
+
+    def test_purge_fails_uploads_stuck_assembling(self):
+        stuck = SubmissionUpload.objects.get()
+        write_chunk(stuck, 0, SimpleUploadedFile("blob", b"1234"))
+        running = SubmissionUpload.objects.create(
+            assignment=self.assignment, student=self.student, filename="b.pdf", total_size=4,
+            status=SubmissionUpload.STATUS_ASSEMBLING,
+        )
+        SubmissionUpload.objects.filter(id=stuck.id).update(
+            status=SubmissionUpload.STATUS_ASSEMBLING, updated_at=timezone.now() - timezone.timedelta(hours=2)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_stale_submission_uploads_task()
+
+        stuck.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual(stuck.status, SubmissionUpload.STATUS_FAILED)
+        self.assertEqual(running.status, SubmissionUpload.STATUS_ASSEMBLING)
+        self.assertFalse(os.path.exists(upload_dir(stuck)))
+        self.assertTrue(Notification.objects.filter(user=self.student, message__contains="could not be processed").exists())
@@ -0,0 +1,42 @@
+# assignments/uploads.py
+import os
+import shutil
+from django.conf import settings
+
+# Each upload gets its own directory of chunk files named by their starting offset,
+# so a retried chunk simply overwrites itself and assembly is a sorted concatenation.
+
+
+def upload_dir(upload):
+    return os.path.join(settings.SUBMISSION_UPLOAD_STAGING_ROOT, str(upload.id))
+
+
+def write_chunk(upload, offset, chunk):
+    directory = upload_dir(upload)
+    os.makedirs(directory, exist_ok=True)
+    final_path = os.path.join(directory, f"{offset:020d}.chunk")
+    temp_path = f"{final_path}.tmp"
+    with open(temp_path, 'wb') as destination:
+        for piece in chunk.chunks():
+            destination.write(piece)
+    # Atomic on POSIX: a half-written chunk is never visible under its final name
+    os.replace(temp_path, final_path)
+
+
+def assemble_chunks(upload):
+    """Concatenate the staged chunks into one file next to them and return its path."""
+    directory = upload_dir(upload)
+    extension = os.path.splitext(upload.filename)[1].lower()
+    assembled_path = os.path.join(directory, f"assembled{extension}")
+    chunk_names = sorted(name for name in os.listdir(directory) if name.endswith('.chunk'))
+    with open(assembled_path, 'wb') as destination:
+        for name in chunk_names:
+            with open(os.path.join(directory, name), 'rb') as source:
+                shutil.copyfileobj(source, destination)
+    if os.path.getsize(assembled_path) != upload.total_size:
+        raise ValueError(f"Assembled {upload.filename} does not match the declared size")
+    return assembled_path
+
+
+def discard_chunks(upload):
+    shutil.rmtree(upload_dir(upload), ignore_errors=True)
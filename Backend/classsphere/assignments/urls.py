@@ -1,9 +1,21 @@
 from django.urls import path
-from .views import AssignmentListCreateView, AssignmentDetailView, SubmissionCreateView, SubmissionUpdateView
+from .views import (
+    AssignmentListCreateView, AssignmentDetailView, SubmissionCreateView, SubmissionUpdateView,
+    SubmissionUploadInitView, SubmissionUploadDetailView, SubmissionUploadChunkView, SubmissionUploadCompleteView,
+    SubmissionBulkGradeView, SubmissionListView, SubmissionExportView, SubmissionExportDownloadView,
+)
 
 urlpatterns = [
     path('assignments/<slug:classroom_slug>/', AssignmentListCreateView.as_view(), name='assignment-list-create'),
     path('assignments/<slug:classroom_slug>/<int:pk>/', AssignmentDetailView.as_view(), name='assignment-detail'),
     path('assignments/<slug:classroom_slug>/<int:assignment_id>/submit/', SubmissionCreateView.as_view(), name='submission-create'),
+    path('assignments/<slug:classroom_slug>/<int:assignment_id>/submit/uploads/', SubmissionUploadInitView.as_view(), name='submission-upload-init'),
+    path('assignments/<slug:classroom_slug>/<int:assignment_id>/submit/uploads/<int:upload_id>/', SubmissionUploadDetailView.as_view(), name='submission-upload-detail'),
+    path('assignments/<slug:classroom_slug>/<int:assignment_id>/submit/uploads/<int:upload_id>/chunk/', SubmissionUploadChunkView.as_view(), name='submission-upload-chunk'),
+    path('assignments/<slug:classroom_slug>/<int:assignment_id>/submit/uploads/<int:upload_id>/complete/', SubmissionUploadCompleteView.as_view(), name='submission-upload-complete'),
+    path('assignments/<slug:classroom_slug>/<int:assignment_id>/submissions/', SubmissionListView.as_view(), name='submission-list'),
+    path('assignments/<slug:classroom_slug>/<int:assignment_id>/submissions/grade/', SubmissionBulkGradeView.as_view(), name='submission-bulk-grade'),
+    path('assignments/<slug:classroom_slug>/<int:assignment_id>/submissions/export/', SubmissionExportView.as_view(), name='submission-export'),
+    path('assignments/submissions/export/<str:export_token>/', SubmissionExportDownloadView.as_view(), name='submission-export-download'),
     path('assignments/<slug:classroom_slug>/<int:assignment_id>/submissions/<int:submission_id>/', SubmissionUpdateView.as_view(), name='submission-update'),
 ]
\ No newline at end of file
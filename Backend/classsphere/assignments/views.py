@@ -2,11 +2,43 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from .models import Assignment, Submission
-from .serializers import AssignmentSerializer, SubmissionSerializer
+from .models import Assignment, Submission, SubmissionUpload
+from .serializers import (
+    AssignmentSerializer, TeacherAssignmentSerializer, StudentAssignmentSerializer, SubmissionSerializer,
+    SubmissionUploadSerializer,
+)
+from .uploads import write_chunk
+from .exports import sign_export, load_export, get_export_storage, stream_submissions_zip, export_filename
+from .tasks import enqueue_assembly, mark_upload_failed
 from classroom.models import Classroom,Student
 from django.utils import timezone
-from notifications.utils import create_notification
+from django.conf import settings
+from django.core import signing
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.db import transaction
+from django.db.models import F, Q, Count, Prefetch
+from notifications.utils import notify_user, notify_classroom, notify_each
+from classsphere.pagination import keyset_paginate
+from classsphere.storage import SignedLinkView
+
+def assignments_for_viewer(user, classroom, assignments):
+    """
+    Shape the assignment queryset for whoever is looking: the teacher gets submission
+    counts (rows are paged separately), a student their own submissions, newest first.
+    """
+    if user.id == classroom.teacher_id:
+        return assignments.annotate(
+            submission_count=Count('submissions'),
+            graded_count=Count('submissions', filter=Q(submissions__score__isnull=False)),
+        ), TeacherAssignmentSerializer
+
+    own_submissions = Submission.objects.filter(student=user).select_related('student').order_by('-submitted_at')
+    return (
+        assignments.prefetch_related(Prefetch('submissions', queryset=own_submissions, to_attr='own_submissions')),
+        StudentAssignmentSerializer,
+    )
+
 
 class AssignmentListCreateView(APIView):
     permission_classes = [IsAuthenticated]
@@ -14,8 +46,10 @@ class AssignmentListCreateView(APIView):
     def get(self, request, classroom_slug):
         try:
             classroom = Classroom.objects.get(slug=classroom_slug)
-            assignments = Assignment.objects.filter(classroom=classroom)
-            serializer = AssignmentSerializer(assignments, many=True, context={'request': request})
+            assignments, serializer_class = assignments_for_viewer(
+                request.user, classroom, Assignment.objects.filter(classroom=classroom)
+            )
+            serializer = serializer_class(assignments, many=True, context={'request': request})
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Classroom.DoesNotExist:
             return Response({"error": "Classroom not found"}, status=status.HTTP_404_NOT_FOUND)
@@ -36,20 +70,14 @@ class AssignmentListCreateView(APIView):
 
                 # Notify
                 teacher_message = f"Assignment '{assignment.topic}' successfully added to {classroom.name}"
-                create_notification(
+                notify_user(
                     user=request.user,
                     message=teacher_message,
                     notification_type='SUCCESS'
                 )
 
-                students = Student.objects.filter(joined_classes=classroom)
                 student_message = f"New assignment '{assignment.topic}' added to {classroom.name}"
-                for student in students:
-                    create_notification(
-                        user=student.user,
-                        message=student_message,
-                        notification_type='INFO'
-                    )
+                notify_classroom(classroom, student_message, notification_type='INFO')
 
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -63,7 +91,7 @@ class AssignmentDetailView(APIView):
     def get_object(self, classroom_slug, pk):
         try:
             classroom = Classroom.objects.get(slug=classroom_slug)
-            return Assignment.objects.get(classroom=classroom, pk=pk)
+            return Assignment.objects.select_related('classroom').get(classroom=classroom, pk=pk)
         except (Classroom.DoesNotExist, Assignment.DoesNotExist):
             return None
 
@@ -71,7 +99,10 @@ class AssignmentDetailView(APIView):
         assignment = self.get_object(classroom_slug, pk)
         if assignment is None:
             return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
-        serializer = AssignmentSerializer(assignment, context={'request': request})
+        assignments, serializer_class = assignments_for_viewer(
+            request.user, assignment.classroom, Assignment.objects.filter(pk=assignment.pk)
+        )
+        serializer = serializer_class(assignments.get(), context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request, classroom_slug, pk):
@@ -103,40 +134,89 @@ class SubmissionCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, classroom_slug, assignment_id):
+        """
+        Single-request submit. The file is accepted and timestamped immediately and stored
+        by the assembly task; poll submit/uploads/<id>/ for the processing state.
+        """
+        received_at = timezone.now()
+        assignment = Assignment.objects.select_related('classroom').filter(
+            classroom__slug=classroom_slug, pk=assignment_id
+        ).first()
+        if assignment is None:
+            return Response({"error": "Assignment or Classroom not found"}, status=status.HTTP_404_NOT_FOUND)
+        if not Student.objects.filter(user=request.user, joined_classes=assignment.classroom_id).exists():
+            return Response({"error": "You must be enrolled in this classroom to submit assignments"}, status=status.HTTP_403_FORBIDDEN)
+        if received_at > assignment.last_date:
+            return Response({"error": "Submission deadline has expired"}, status=status.HTTP_400_BAD_REQUEST)
+
+        file = request.FILES.get('file')
+        if not file:
+            return Response({"file": ["No file was submitted."]}, status=status.HTTP_400_BAD_REQUEST)
+        if file.size > settings.SUBMISSION_UPLOAD_MAX_BYTES:
+            return Response({"error": f"File size must not exceed {settings.SUBMISSION_UPLOAD_MAX_BYTES} bytes"}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = SubmissionUpload.objects.create(
+            assignment=assignment,
+            student=request.user,
+            filename=file.name[:255],
+            total_size=file.size,
+            received_bytes=file.size,
+            received_at=received_at,
+            status=SubmissionUpload.STATUS_ASSEMBLING,
+        )
         try:
-            classroom = Classroom.objects.get(slug=classroom_slug)
-            
-            # Verify user is enrolled
-            is_student = Student.objects.filter(user=request.user, joined_classes=classroom).exists()
-            if not is_student:
-                return Response({"error": "You must be enrolled in this classroom to submit assignments"}, status=status.HTTP_403_FORBIDDEN)
+            write_chunk(upload, 0, file)
+        except OSError:
+            mark_upload_failed(upload)
+            return Response({"error": "The file could not be stored, please try again"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        transaction.on_commit(lambda: enqueue_assembly(upload))
+        return Response(SubmissionUploadSerializer(upload).data, status=status.HTTP_202_ACCEPTED)
+
+class SubmissionListView(APIView):
+    permission_classes = [IsAuthenticated]
+    BOOLEAN_VALUES = {'true': True, '1': True, 'false': False, '0': False}
+
+    def get(self, request, classroom_slug, assignment_id):
+        """
+        A page of submissions for one assignment, newest first.
+
+        Filters: ?graded=true|false, ?late=true|false (submitted after last_date).
+        Paging: ?limit=, then ?cursor=<next_cursor> from the previous page.
+        """
+        assignment = Assignment.objects.select_related('classroom').filter(
+            classroom__slug=classroom_slug, pk=assignment_id
+        ).first()
+        if assignment is None:
+            return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+        if request.user.id != assignment.teacher_id:
+            return Response({"error": "Only the teacher can view all submissions"}, status=status.HTTP_403_FORBIDDEN)
+
+        filters = {}
+        for name in ('graded', 'late'):
+            value = request.query_params.get(name)
+            if value is None:
+                continue
+            if value.lower() not in self.BOOLEAN_VALUES:
+                return Response({"error": f"{name} must be true or false"}, status=status.HTTP_400_BAD_REQUEST)
+            filters[name] = self.BOOLEAN_VALUES[value.lower()]
+
+        submissions = Submission.objects.filter(assignment=assignment).select_related('student')
+        if 'graded' in filters:
+            submissions = submissions.filter(score__isnull=not filters['graded'])
+        if 'late' in filters:
+            lookup = 'submitted_at__gt' if filters['late'] else 'submitted_at__lte'
+            submissions = submissions.filter(**{lookup: assignment.last_date})
+
+        page, next_cursor = keyset_paginate(
+            submissions, request, field='submitted_at', default_page_size=50, max_page_size=200
+        )
+        serializer = SubmissionSerializer(page, many=True, context={'request': request})
+        return Response({
+            'results': serializer.data,
+            'next_cursor': next_cursor,
+        })
+
 
-            assignment = Assignment.objects.get(classroom=classroom, pk=assignment_id)
-            if timezone.now() > assignment.last_date:
-                return Response({"error": "Submission deadline has expired"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Prevent duplicate submissions by updating existing one if it exists
-            try:
-                submission = Submission.objects.get(assignment=assignment, student=request.user)
-                serializer = SubmissionSerializer(submission, data=request.data, context={'request': request}, partial=True)
-            except Submission.DoesNotExist:
-                serializer = SubmissionSerializer(data=request.data, context={'request': request})
-                
-            if serializer.is_valid():
-                submission = serializer.save(assignment=assignment, student=request.user)
-                
-                # Notify Teacher
-                create_notification(
-                    user=classroom.teacher,
-                    message=f"{request.user.username} submitted '{assignment.topic}' in {classroom.name}",
-                    notification_type='INFO'
-                )
-                
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        except (Classroom.DoesNotExist, Assignment.DoesNotExist):
-            return Response({"error": "Assignment or Classroom not found"}, status=status.HTTP_404_NOT_FOUND)
-        
 class SubmissionUpdateView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -161,11 +241,251 @@ class SubmissionUpdateView(APIView):
             
             # Notify Student if score is provided
             if 'score' in request.data:
-                create_notification(
+                notify_user(
                     user=submission.student,
                     message=f"Your submission for '{submission.assignment.topic}' has been graded. Score: {request.data['score']}",
                     notification_type='INFO'
                 )
 
             return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class SubmissionUploadInitView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, classroom_slug, assignment_id):
+        """
+        Start a resumable upload: the client then PUTs chunks in order and calls complete/.
+
+        Body: {"filename": ..., "size": <total bytes>}
+        """
+        try:
+            classroom = Classroom.objects.get(slug=classroom_slug)
+            if not Student.objects.filter(user=request.user, joined_classes=classroom).exists():
+                return Response({"error": "You must be enrolled in this classroom to submit assignments"}, status=status.HTTP_403_FORBIDDEN)
+
+            assignment = Assignment.objects.get(classroom=classroom, pk=assignment_id)
+            if timezone.now() > assignment.last_date:
+                return Response({"error": "Submission deadline has expired"}, status=status.HTTP_400_BAD_REQUEST)
+        except (Classroom.DoesNotExist, Assignment.DoesNotExist):
+            return Response({"error": "Assignment or Classroom not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        filename = request.data.get("filename")
+        try:
+            total_size = int(request.data.get("size"))
+        except (TypeError, ValueError):
+            return Response({"error": "File size is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if not filename:
+            return Response({"error": "Filename is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < total_size <= settings.SUBMISSION_UPLOAD_MAX_BYTES:
+            return Response({"error": f"File size must be between 1 and {settings.SUBMISSION_UPLOAD_MAX_BYTES} bytes"}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = SubmissionUpload.objects.create(
+            assignment=assignment, student=request.user, filename=filename[:255], total_size=total_size
+        )
+        return Response(SubmissionUploadSerializer(upload).data, status=status.HTTP_201_CREATED)
+
+
+class SubmissionUploadMixin:
+    def get_upload(self, request, classroom_slug, assignment_id, upload_id):
+        return SubmissionUpload.objects.select_related('assignment').filter(
+            id=upload_id,
+            student=request.user,
+            assignment_id=assignment_id,
+            assignment__classroom__slug=classroom_slug,
+        ).first()
+
+
+class SubmissionUploadDetailView(SubmissionUploadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, classroom_slug, assignment_id, upload_id):
+        """Upload state; received_bytes is the offset to resume from."""
+        upload = self.get_upload(request, classroom_slug, assignment_id, upload_id)
+        if upload is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(SubmissionUploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+
+class SubmissionUploadChunkView(SubmissionUploadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, classroom_slug, assignment_id, upload_id):
+        """Append one chunk (multipart field "chunk") at the given "offset"."""
+        upload = self.get_upload(request, classroom_slug, assignment_id, upload_id)
+        if upload is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        if upload.status != SubmissionUpload.STATUS_UPLOADING:
+            return Response({"error": "Upload is no longer accepting chunks"}, status=status.HTTP_409_CONFLICT)
+
+        chunk = request.FILES.get("chunk")
+        try:
+            offset = int(request.data.get("offset"))
+        except (TypeError, ValueError):
+            return Response({"error": "Offset is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if not chunk or chunk.size == 0:
+            return Response({"error": "Chunk is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if offset != upload.received_bytes:
+            # The client resumes from received_bytes
+            return Response(
+                {"error": "Offset does not match the uploaded size", "received_bytes": upload.received_bytes},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if chunk.size > settings.SUBMISSION_UPLOAD_CHUNK_SIZE or offset + chunk.size > upload.total_size:
+            return Response({"error": "Chunk is too large"}, status=status.HTTP_400_BAD_REQUEST)
+
+        write_chunk(upload, offset, chunk)
+        # Conditional on the offset so a duplicate or concurrent chunk cannot advance it twice
+        advanced = SubmissionUpload.objects.filter(
+            id=upload.id, received_bytes=offset, status=SubmissionUpload.STATUS_UPLOADING
+        ).update(received_bytes=offset + chunk.size, updated_at=timezone.now())
+        upload.refresh_from_db()
+        if not advanced:
+            return Response(
+                {"error": "Offset does not match the uploaded size", "received_bytes": upload.received_bytes},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response(SubmissionUploadSerializer(upload).data, status=status.HTTP_200_OK)
+
+
+class SubmissionUploadCompleteView(SubmissionUploadMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, classroom_slug, assignment_id, upload_id):
+        """Hand a fully received upload to the assembly task; the submission appears once it finishes."""
+        upload = self.get_upload(request, classroom_slug, assignment_id, upload_id)
+        if upload is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        received_at = timezone.now()
+        if received_at > upload.assignment.last_date:
+            return Response({"error": "Submission deadline has expired"}, status=status.HTTP_400_BAD_REQUEST)
+
+        claimed = SubmissionUpload.objects.filter(
+            id=upload.id, status=SubmissionUpload.STATUS_UPLOADING, received_bytes=F('total_size')
+        ).update(status=SubmissionUpload.STATUS_ASSEMBLING, received_at=received_at, updated_at=received_at)
+        upload.refresh_from_db()
+        if not claimed:
+            if upload.status != SubmissionUpload.STATUS_UPLOADING:
+                return Response({"error": "Upload was already completed"}, status=status.HTTP_409_CONFLICT)
+            return Response(
+                {"error": "Upload is incomplete", "received_bytes": upload.received_bytes},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        transaction.on_commit(lambda: enqueue_assembly(upload))
+        return Response(SubmissionUploadSerializer(upload).data, status=status.HTTP_202_ACCEPTED)
+
+
+class SubmissionBulkGradeView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_GRADES = 1000
+
+    def post(self, request, classroom_slug, assignment_id):
+        """
+        Grade many submissions at once.
+
+        Body: {"grades": [{"submission_id": 1, "score": 8}, ...]}. All scores are validated
+        against total_marks before anything is written; then one transaction, one fan-out.
+        """
+        assignment = Assignment.objects.select_related('classroom').filter(
+            classroom__slug=classroom_slug, pk=assignment_id
+        ).first()
+        if assignment is None:
+            return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+        if request.user.id != assignment.teacher_id:
+            return Response({"error": "Only the teacher can update scores"}, status=status.HTTP_403_FORBIDDEN)
+
+        grades = request.data.get("grades")
+        if not isinstance(grades, list) or not grades:
+            return Response({"error": "A non-empty list of grades is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(grades) > self.MAX_GRADES:
+            return Response({"error": f"At most {self.MAX_GRADES} grades per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+        scores = {}
+        invalid = []
+        for grade in grades:
+            try:
+                submission_id = grade["submission_id"]
+                score = grade["score"]
+            except (KeyError, TypeError):
+                invalid.append(grade)
+                continue
+            # JSON integers only: int() would truncate 8.9 and accept true
+            if not all(isinstance(value, int) and not isinstance(value, bool) for value in (submission_id, score)):
+                invalid.append(grade)
+                continue
+            if not 0 <= score <= assignment.total_marks or submission_id in scores:
+                invalid.append(grade)
+                continue
+            scores[submission_id] = score
+        if invalid:
+            return Response(
+                {"error": f"Each grade needs a unique submission_id and a score between 0 and {assignment.total_marks}", "invalid": invalid},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        submissions = list(
+            Submission.objects.filter(assignment=assignment, id__in=scores).only('id', 'student_id', 'score')
+        )
+        missing = sorted(set(scores) - {submission.id for submission in submissions})
+        if missing:
+            return Response(
+                {"error": "Some submissions do not belong to this assignment", "invalid": missing},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        for submission in submissions:
+            submission.score = scores[submission.id]
+        with transaction.atomic():
+            Submission.objects.bulk_update(submissions, ['score'], batch_size=500)
+
+        transaction.on_commit(lambda: notify_each(
+            [
+                (submission.student_id,
+                 f"Your submission for '{assignment.topic}' has been graded. Score: {submission.score}")
+                for submission in submissions
+            ],
+            notification_type='INFO',
+        ))
+        return Response(
+            {"updated": len(submissions), "grades": [{"submission_id": s.id, "score": s.score} for s in submissions]},
+            status=status.HTTP_200_OK,
+        )
+
+
+class SubmissionExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, classroom_slug, assignment_id):
+        """Issue a short-lived link the browser can open to stream a ZIP of every submission."""
+        assignment = Assignment.objects.filter(classroom__slug=classroom_slug, pk=assignment_id).first()
+        if assignment is None:
+            return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+        if request.user.id != assignment.teacher_id:
+            return Response({"error": "Only the teacher can export submissions"}, status=status.HTTP_403_FORBIDDEN)
+
+        token = sign_export(assignment.id, request.user.id)
+        return Response({
+            "download_url": request.build_absolute_uri(reverse('submission-export-download', args=[token])),
+            "expires_in": settings.SUBMISSION_EXPORT_TOKEN_TTL_SECONDS,
+        }, status=status.HTTP_200_OK)
+
+
+class SubmissionExportDownloadView(SignedLinkView):
+    def get(self, request, export_token):
+        try:
+            export = load_export(export_token)
+        except signing.BadSignature:
+            return Response({"error": "Invalid or expired download link"}, status=status.HTTP_403_FORBIDDEN)
+        assignment = Assignment.objects.filter(pk=export["assignment_id"], teacher_id=export["user_id"]).first()
+        if assignment is None:
+            return Response({"error": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        submissions = Submission.objects.filter(assignment=assignment).select_related('student').order_by('student__username', 'id')
+        response = StreamingHttpResponse(
+            stream_submissions_zip(assignment, submissions, get_export_storage()),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export_filename(assignment)}"'
+        return response
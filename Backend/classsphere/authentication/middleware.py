@@ -0,0 +1,58 @@
+# authentication/middleware.py
+import logging
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Users resolved for WebSocket connections are cached briefly so reconnect storms skip the DB
+WS_USER_CACHE_TIMEOUT = 5 * 60
+
+
+def ws_user_cache_key(user_id):
+    return f"ws:user:{user_id}"
+
+
+@database_sync_to_async
+def _fetch_user(user_id):
+    from authentication.models import User
+    return User.objects.filter(id=user_id, is_active=True).first()
+
+
+async def get_user_from_token(token):
+    from django.contrib.auth.models import AnonymousUser
+    from rest_framework_simplejwt.tokens import AccessToken
+    try:
+        user_id = AccessToken(token)['user_id']
+    except Exception as e:
+        logger.warning(f"Invalid WebSocket token: {e}")
+        return AnonymousUser()
+
+    key = ws_user_cache_key(user_id)
+    user = await cache.aget(key)
+    if user is None:
+        user = await _fetch_user(user_id)
+        if user is None:
+            return AnonymousUser()
+        await cache.aset(key, user, WS_USER_CACHE_TIMEOUT)
+    # authentication.signals drops the entry on save/delete; this guards the gap before commit
+    if not user.is_active:
+        return AnonymousUser()
+    return user
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Resolves scope['user'] once per connection from the ?token= access token.
+
+    Sockets authenticate by token only: without one the user is anonymous, whatever
+    the session cookie seen by the outer AuthMiddlewareStack says.
+    """
+
+    async def __call__(self, scope, receive, send):
+        from django.contrib.auth.models import AnonymousUser
+        token = parse_qs(scope['query_string'].decode()).get('token', [None])[0]
+        user = await get_user_from_token(token) if token else AnonymousUser()
+        return await super().__call__(dict(scope, user=user), receive, send)
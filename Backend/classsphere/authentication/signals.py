@@ -0,0 +1,15 @@
+# authentication/signals.py
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .middleware import ws_user_cache_key
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_ws_user(sender, instance, **kwargs):
+    """Deactivated, edited or deleted users must not keep authenticating WebSockets from the cache."""
+    key = ws_user_cache_key(instance.pk)
+    transaction.on_commit(lambda: cache.delete(key))
@@ -1,3 +1,61 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from .middleware import JWTAuthMiddleware, get_user_from_token, ws_user_cache_key
+from .models import User
 
-# Create your tests here.
+
+class WebSocketUserCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="student", email="student@example.com", password="pass", role="student"
+        )
+        self.token = str(AccessToken.for_user(self.user))
+        cache.delete(ws_user_cache_key(self.user.id))
+
+    def test_cached_user_is_reused_until_saved(self):
+        self.assertEqual(async_to_sync(get_user_from_token)(self.token).id, self.user.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(async_to_sync(get_user_from_token)(self.token).id, self.user.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertFalse(async_to_sync(get_user_from_token)(self.token).is_authenticated)
+
+    def test_deleted_user_is_dropped_from_cache(self):
+        async_to_sync(get_user_from_token)(self.token)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        self.assertIsNone(cache.get(ws_user_cache_key(self.user.id)))
+        self.assertFalse(async_to_sync(get_user_from_token)(self.token).is_authenticated)
+
+
+class JWTAuthMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="student", email="student@example.com", password="pass", role="student"
+        )
+        cache.delete(ws_user_cache_key(self.user.id))
+
+    def connect(self, query_string):
+        seen = {}
+
+        async def app(scope, receive, send):
+            seen["user"] = scope["user"]
+
+        # The outer AuthMiddlewareStack has already resolved a user from the session cookie
+        scope = {"type": "websocket", "query_string": query_string, "user": self.user}
+        async_to_sync(JWTAuthMiddleware(app))(scope, None, None)
+        return seen["user"]
+
+    def test_socket_without_token_is_anonymous_despite_session(self):
+        self.assertFalse(self.connect(b"").is_authenticated)
+
+    def test_socket_with_token_uses_its_user(self):
+        token = str(AccessToken.for_user(self.user))
+        self.assertEqual(self.connect(f"token={token}".encode()).id, self.user.id)
+        self.assertFalse(self.connect(b"token=garbage").is_authenticated)
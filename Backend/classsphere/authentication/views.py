@@ -25,7 +25,7 @@ import requests # type: ignore
 from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
 from rest_framework_simplejwt.exceptions import TokenError
 from django.shortcuts import get_object_or_404
-from notifications.utils import create_notification
+from notifications.utils import notify_user
 
 
 class SignInView(APIView):
@@ -547,7 +547,7 @@ class VerifyTeacherView(APIView):
             f"{'verified' if teacher.is_verified else 'unverified'}."
         )
 
-        create_notification(
+        notify_user(
             user=teacher,
             message=notification_message,
             notification_type='INFO' if teacher.is_verified else 'WARNING'
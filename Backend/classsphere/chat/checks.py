@@ -0,0 +1,16 @@
+# chat/checks.py
+from django.conf import settings
+from django.core.checks import Error, register
+from django.db import connections
+
+
+@register()
+def write_behind_database(app_configs, **kwargs):
+    """Write-behind reserves message ids from a PostgreSQL sequence up front."""
+    if settings.CHAT_WRITE_BEHIND and connections["default"].vendor != "postgresql":
+        return [Error(
+            "CHAT_WRITE_BEHIND requires a PostgreSQL database.",
+            hint="Disable CHAT_WRITE_BEHIND or use the PostgreSQL backend.",
+            id="chat.E001",
+        )]
+    return []
@@ -1,56 +1,91 @@
 import json
 import logging
-from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        from rest_framework_simplejwt.tokens import AccessToken
-        from .models import Chat, Message
-        from authentication.models import User
+        from .utils import is_chat_participant
         self.chat_id = self.scope['url_route']['kwargs']['chat_id']
         self.room_group_name = f'chat_{self.chat_id}'
 
-        query_params = parse_qs(self.scope['query_string'].decode())
-        token = query_params.get('token', [None])[0]
-
-        if not token:
+        # scope['user'] is resolved from the ?token= query param by JWTAuthMiddleware
+        self.user = self.scope.get('user')
+        if not self.user or self.user.is_anonymous or not self.chat_id.isdigit():
             await self.close()
             return
 
         try:
-            access_token = AccessToken(token)
-            user_id = access_token['user_id']
-            self.user = await database_sync_to_async(User.objects.get)(id=user_id)
-            self.chat = await database_sync_to_async(Chat.objects.get)(id=self.chat_id)
-
-            if not await database_sync_to_async(self.chat.participants.filter(id=user_id).exists)():
+            if not await is_chat_participant(int(self.chat_id), self.user.id):
                 await self.close()
                 return
         except Exception as e:
-            logger.error(f"Authentication error in ChatConsumer: {e}")
+            logger.error(f"Authorization error in ChatConsumer: {e}")
             await self.close()
             return
 
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
 
+        from .presence import mark_connected
+        self.present = True
+        await mark_connected(self.user.id)
+        await self.broadcast_presence(True)
+
     async def disconnect(self, close_code):
+        if getattr(self, 'present', False):
+            from .presence import mark_disconnected
+            went_offline = await mark_disconnected(self.user.id)
+            await self.broadcast_presence(not went_offline)
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
     async def receive(self, text_data):
         data = json.loads(text_data)
+        frame_type = data.get('type')
+        if frame_type == 'read':
+            await self.receive_read(data.get('message_id'))
+            return
+        if frame_type == 'heartbeat':
+            from .presence import heartbeat
+            await heartbeat(self.user.id)
+            return
+        if frame_type == 'typing':
+            # Ephemeral: relayed to the room only, never stored
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {
+                    'type': 'chat_typing',
+                    'user_id': self.user.id,
+                    'username': self.user.username,
+                    'is_typing': bool(data.get('is_typing', True)),
+                    'sender_channel': self.channel_name,
+                }
+            )
+            return
+
         message = data.get('message')
         media_url = data.get('media_url')
         media_type = data.get('media_type')
         message_id = data.get('id', '')
+        timestamp = data.get('timestamp', '')
 
         # Save the message to the database (if not already saved by the API)
-        if message or media_url:
-            await self.save_message(message, media_url, media_type, message_id)
+        if (message or media_url) and not message_id and settings.CHAT_WRITE_BEHIND:
+            from .write_behind import message_buffer
+            msg = await message_buffer.add(
+                chat_id=int(self.chat_id),
+                sender=self.user,
+                text=message,
+                media=media_url,
+                media_type=media_type,
+            )
+            message_id = msg.id
+            timestamp = msg.timestamp.isoformat()
+        elif message or media_url:
+            message_id = await self.save_message(message, media_url, media_type, message_id)
 
         await self.channel_layer.group_send(
             self.room_group_name,
@@ -60,26 +95,81 @@ class ChatConsumer(AsyncWebsocketConsumer):
                 'sender': self.user.username,
                 'media_url': media_url,
                 'media_type': media_type,
-                'timestamp': data.get('timestamp', ''),
+                'timestamp': timestamp,
                 'id': message_id,
             }
         )
 
     @database_sync_to_async
     def save_message(self, message, media_url, media_type, message_id):
-        from .models import Chat, Message
+        from .models import Message
+        from .utils import record_message
         if not message_id:  # Only save if not already saved by API
-            chat = Chat.objects.get(id=self.chat_id)
             msg = Message.objects.create(
-                chat=chat,
+                chat_id=self.chat_id,
                 sender=self.user,
                 text=message,
                 media=media_url, 
                 media_type=media_type
             )
+            record_message(msg)
             return str(msg.id)
         return message_id
 
+    async def receive_read(self, message_id):
+        from .utils import mark_chat_read
+        try:
+            message_id = int(message_id)
+        except (TypeError, ValueError):
+            return
+        moved = await database_sync_to_async(mark_chat_read)(int(self.chat_id), self.user.id, message_id)
+        if moved:
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {
+                    'type': 'chat_read',
+                    'user_id': self.user.id,
+                    'message_id': message_id,
+                }
+            )
+
+    async def broadcast_presence(self, online):
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                'type': 'chat_presence',
+                'user_id': self.user.id,
+                'online': online,
+                'sender_channel': self.channel_name,
+            }
+        )
+
+    async def chat_presence(self, event):
+        if event['sender_channel'] == self.channel_name:
+            return
+        await self.send(text_data=json.dumps({
+            'event': 'presence',
+            'user_id': event['user_id'],
+            'online': event['online'],
+        }))
+
+    async def chat_typing(self, event):
+        if event['sender_channel'] == self.channel_name:
+            return
+        await self.send(text_data=json.dumps({
+            'event': 'typing',
+            'user_id': event['user_id'],
+            'username': event['username'],
+            'is_typing': event['is_typing'],
+        }))
+
+    async def chat_read(self, event):
+        await self.send(text_data=json.dumps({
+            'event': 'read',
+            'user_id': event['user_id'],
+            'message_id': event['message_id'],
+        }))
+
     async def chat_message(self, event):
         await self.send(text_data=json.dumps({
             'id': str(event['id']),
@@ -0,0 +1,57 @@
+# chat/contacts.py
+from django.core.cache import cache
+from authentication.models import User
+from classroom.models import Classroom, Student
+
+# Invalidated by chat.signals whenever enrollment changes, so the timeout is only a safety net
+CONTACTS_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _contacts_key(user_id):
+    return f"chat:contacts:{user_id}"
+
+
+def _load_contacts(user):
+    if user.role == "student":
+        joined_classes = Classroom.objects.filter(students__user=user)
+        return {
+            "teachers": list(
+                User.objects.filter(classrooms__in=joined_classes).order_by("id").values_list("id", flat=True).distinct()
+            ),
+            "fellow_students": list(
+                User.objects.filter(student__joined_classes__in=joined_classes)
+                .exclude(id=user.id).order_by("id").values_list("id", flat=True).distinct()
+            ),
+        }
+    if user.role == "teacher":
+        return {
+            "students_in_my_classes": list(
+                User.objects.filter(student__joined_classes__teacher=user).order_by("id").values_list("id", flat=True).distinct()
+            ),
+        }
+    return {}
+
+
+def get_contacts(user):
+    """Who the user may chat with, grouped the way the chat sidebar lists them."""
+    key = _contacts_key(user.id)
+    contacts = cache.get(key)
+    if contacts is None:
+        contacts = _load_contacts(user)
+        cache.set(key, contacts, CONTACTS_CACHE_TIMEOUT)
+    return contacts
+
+
+def is_contact(user, other_user_id):
+    return any(other_user_id in ids for ids in get_contacts(user).values())
+
+
+def affected_by_classrooms(classroom_ids):
+    """Teacher and students of the given classrooms: everyone whose contacts depend on them."""
+    teacher_ids = Classroom.objects.filter(id__in=classroom_ids).values_list("teacher_id", flat=True)
+    student_ids = Student.objects.filter(joined_classes__in=classroom_ids).values_list("user_id", flat=True)
+    return set(teacher_ids) | set(student_ids)
+
+
+def invalidate_contacts(user_ids):
+    cache.delete_many([_contacts_key(user_id) for user_id in user_ids])
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from chat.models import Chat
+from chat.utils import rebuild_inbox
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ChatInbox table from existing chats and messages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        chat_ids = list(Chat.objects.order_by("id").values_list("id", flat=True))
+        total = 0
+        for start in range(0, len(chat_ids), batch_size):
+            total += rebuild_inbox(Chat.objects.filter(id__in=chat_ids[start:start + batch_size]))
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} inbox entries for {len(chat_ids)} chats"))
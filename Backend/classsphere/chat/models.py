@@ -1,14 +1,24 @@
 # models.py
 from django.db import models
+from django.utils import timezone
 from authentication.models import User
 from cloudinary.models import CloudinaryField # type: ignore
 
 class Chat(models.Model):
     participants = models.ManyToManyField(User, related_name="chats")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Canonical key for 1:1 chats (lower user id first) so each pair maps to exactly one row
+    user_low = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    user_high = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user_low", "user_high"], name="chat_direct_pair_unique"),
+        ]
 
     def get_other_participant(self, current_user):
-        return self.participants.exclude(id=current_user.id).first()
+        # Iterate participants.all() so a prefetch_related('participants') is reused
+        return next((user for user in self.participants.all() if user.id != current_user.id), None)
 
 class Message(models.Model):
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name="messages")
@@ -16,5 +26,31 @@ class Message(models.Model):
     text = models.TextField(blank=True, null=True)  
     media = CloudinaryField('media', blank=True, null=True,resource_type='raw', folder="media")
     media_type = models.CharField(max_length=20, blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
\ No newline at end of file
+    # Not auto_now_add: write-behind batches keep the timestamp that was broadcast
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["chat", "timestamp", "id"], name="message_chat_timeline_idx"),
+        ]
+
+
+class ChatInbox(models.Model):
+    """Per-user, denormalized view of a chat so the recent-chats list is one indexed range scan."""
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name="inbox_entries")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chat_inbox")
+    other_user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name="+")
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_activity = models.DateTimeField()
+    unread_count = models.PositiveIntegerField(default=0)
+    # Read watermark: every message at or before (last_read_at, last_read_message_id) in timeline
+    # order counts as read. Ids alone do not follow time once write-behind reserves id blocks.
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    last_read_message_id = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("chat", "user")
+        indexes = [
+            models.Index(fields=["user", "-last_activity"], name="chatinbox_user_activity_idx"),
+        ]
@@ -0,0 +1,53 @@
+# chat/presence.py
+from django.conf import settings
+from django.core.cache import cache
+
+# Presence lives only in the cache (Redis). A user is online while their heartbeat key
+# exists; sockets refresh it, and a client that vanishes without closing expires on its own.
+
+
+def _heartbeat_key(user_id):
+    return f"presence:{user_id}"
+
+
+def _connections_key(user_id):
+    return f"presence:conns:{user_id}"
+
+
+async def mark_connected(user_id):
+    """Register one more open socket; returns True if the user just came online."""
+    timeout = settings.PRESENCE_TTL_SECONDS
+    was_online = await cache.aget(_heartbeat_key(user_id)) is not None
+    if not await cache.aadd(_connections_key(user_id), 1, timeout):
+        try:
+            await cache.aincr(_connections_key(user_id))
+        except ValueError:
+            # Expired between add and incr
+            await cache.aset(_connections_key(user_id), 1, timeout)
+        await cache.atouch(_connections_key(user_id), timeout)
+    await cache.aset(_heartbeat_key(user_id), True, timeout)
+    return not was_online
+
+
+async def heartbeat(user_id):
+    timeout = settings.PRESENCE_TTL_SECONDS
+    await cache.aset(_heartbeat_key(user_id), True, timeout)
+    await cache.atouch(_connections_key(user_id), timeout)
+
+
+async def mark_disconnected(user_id):
+    """Drop one socket; returns True if that was the user's last one."""
+    try:
+        remaining = await cache.adecr(_connections_key(user_id))
+    except ValueError:
+        remaining = 0
+    if remaining > 0:
+        return False
+    await cache.adelete_many([_heartbeat_key(user_id), _connections_key(user_id)])
+    return True
+
+
+def online_user_ids(user_ids):
+    """Which of the given users are online, in a single cache round trip."""
+    found = cache.get_many([_heartbeat_key(user_id) for user_id in user_ids])
+    return [user_id for user_id in user_ids if _heartbeat_key(user_id) in found]
@@ -1,6 +1,7 @@
 # serializers.py
 from rest_framework import serializers
-from .models import Chat, Message
+from .models import ChatInbox, Message
+from .storage import get_upload_backend
 
 class MessageSerializer(serializers.ModelSerializer):
     sender = serializers.CharField(source="sender.username")
@@ -12,21 +13,19 @@ class MessageSerializer(serializers.ModelSerializer):
 
     def get_media_url(self, obj):
         if obj.media:
-            return obj.media.url
+            return get_upload_backend().url(obj.media)
         return None
 
-class ChatSerializer(serializers.ModelSerializer):
+class ChatInboxSerializer(serializers.ModelSerializer):
+    """A chat as seen by one participant, read from their denormalized inbox row."""
+    id = serializers.IntegerField(source="chat_id")
     other_user = serializers.SerializerMethodField()
-    last_message = serializers.SerializerMethodField()
+    last_message = MessageSerializer(read_only=True)
 
     class Meta:
-        model = Chat
-        fields = ["id", "other_user", "last_message"]
+        model = ChatInbox
+        fields = ["id", "other_user", "last_message", "unread_count"]
 
     def get_other_user(self, obj):
-        other_user = obj.get_other_participant(self.context["request"].user)
+        other_user = obj.other_user
         return {"id": other_user.id, "username": other_user.username} if other_user else None
-
-    def get_last_message(self, obj):
-        last_msg = obj.messages.order_by("-timestamp").first()
-        return MessageSerializer(last_msg).data if last_msg else None
\ No newline at end of file
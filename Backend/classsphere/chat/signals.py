@@ -0,0 +1,38 @@
+# chat/signals.py
+from django.db import transaction
+from django.db.models.signals import m2m_changed, pre_delete
+from django.dispatch import receiver
+from classroom.models import Classroom, Student
+from .contacts import affected_by_classrooms, invalidate_contacts
+
+
+def _invalidate_on_commit(user_ids):
+    user_ids = list(user_ids)
+    transaction.on_commit(lambda: invalidate_contacts(user_ids))
+
+
+@receiver(m2m_changed, sender=Student.joined_classes.through)
+def enrollment_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Join / remove / clear on Student.joined_classes changes the contacts of the whole classroom."""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if reverse:
+        # classroom.students.add(...) / remove(...): pk_set holds Student ids
+        classroom_ids = [instance.pk]
+        student_pks = pk_set or Student.objects.filter(joined_classes=instance).values_list("pk", flat=True)
+    else:
+        # student.joined_classes.add(...) / remove(...): pk_set holds Classroom ids
+        classroom_ids = pk_set or instance.joined_classes.values_list("pk", flat=True)
+        student_pks = [instance.pk]
+
+    # Removed students are no longer enrolled, so add them explicitly
+    user_ids = affected_by_classrooms(list(classroom_ids))
+    user_ids.update(Student.objects.filter(pk__in=list(student_pks)).values_list("user_id", flat=True))
+    _invalidate_on_commit(user_ids)
+
+
+@receiver(pre_delete, sender=Classroom)
+def classroom_deleted(sender, instance, **kwargs):
+    # Collected before the cascade removes the enrollment rows
+    _invalidate_on_commit(affected_by_classrooms([instance.pk]))
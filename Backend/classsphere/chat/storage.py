@@ -0,0 +1,101 @@
+# chat/storage.py
+import time
+import uuid
+from pathlib import Path
+import cloudinary  # type: ignore
+import cloudinary.utils  # type: ignore
+from cloudinary import CloudinaryResource  # type: ignore
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+from classsphere.storage import SignedToken, load_backend, stored_name
+
+# Chat media is uploaded by the client straight to storage. The server only signs the
+# upload beforehand and checks the result afterwards, so no file bytes pass through Daphne.
+
+
+def media_type_for(filename):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension in ['jpg', 'jpeg', 'png', 'gif']:
+        return 'image'
+    if extension in ['mp4', 'mov', 'avi']:
+        return 'video'
+    if extension in ['pdf', 'doc', 'docx']:
+        return 'document'
+    return 'file'
+
+
+def new_public_id(filename):
+    # Raw uploads keep their extension as part of the public id
+    extension = Path(filename).suffix.lower()
+    return f"media/{uuid.uuid4().hex}{extension}"
+
+
+UPLOAD_TOKEN = SignedToken("chat.media-upload", "CHAT_MEDIA_UPLOAD_TTL_SECONDS")
+
+
+def sign_upload(chat_id, user_id, public_id, media_type):
+    """Ties a pending upload to one chat and sender so the complete step can trust it."""
+    return UPLOAD_TOKEN.sign(chat_id=chat_id, user_id=user_id, public_id=public_id, media_type=media_type)
+
+
+def load_upload(token):
+    return UPLOAD_TOKEN.load(token)
+
+
+class CloudinaryUploadBackend:
+    """Signed direct uploads to Cloudinary's raw upload API (same folder as Message.media)."""
+
+    def create_upload(self, public_id, upload_token):
+        config = cloudinary.config()
+        params = {"public_id": public_id, "timestamp": int(time.time())}
+        return {
+            "upload_url": f"https://api.cloudinary.com/v1_1/{config.cloud_name}/raw/upload",
+            "fields": {
+                **params,
+                "api_key": config.api_key,
+                "signature": cloudinary.utils.api_sign_request(params, config.api_secret),
+            },
+        }
+
+    def confirm_upload(self, public_id, data):
+        # The client forwards version/signature from Cloudinary's upload response
+        version = data.get("version")
+        signature = data.get("signature")
+        if not version or not signature:
+            return False
+        return cloudinary.utils.verify_api_response_signature(public_id, version, signature)
+
+    def url(self, media):
+        if not isinstance(media, CloudinaryResource):
+            media = CloudinaryResource(str(media), resource_type="raw")
+        return media.url
+
+
+class LocalUploadBackend:
+    """Filesystem stand-in for development and tests; the upload URL is served by Django itself."""
+
+    def __init__(self):
+        self.storage = FileSystemStorage(
+            location=settings.CHAT_MEDIA_LOCAL_ROOT,
+            base_url=f"{settings.MEDIA_URL}chat/",
+        )
+
+    def create_upload(self, public_id, upload_token):
+        return {
+            "upload_url": reverse("chat-local-media-upload", args=[upload_token]),
+            "fields": {},
+        }
+
+    def save(self, public_id, file):
+        self.storage.save(public_id, file)
+
+    def confirm_upload(self, public_id, data):
+        return self.storage.exists(public_id)
+
+    def url(self, media):
+        return self.storage.url(stored_name(media))
+
+
+def get_upload_backend():
+    return load_backend("CHAT_MEDIA_BACKEND")
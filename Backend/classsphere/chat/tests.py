@@ -1,3 +1,550 @@
-from django.test import TestCase
+import tempfile
+from io import StringIO
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import User
+from classroom.models import Classroom, Student
+from subscription.models import SubscriptionPlan, UserSubscription
+from .contacts import get_contacts
+from .presence import mark_connected, mark_disconnected
+from .models import Chat, ChatInbox, Message
+from .serializers import MessageSerializer
+from .utils import create_inbox_entries, get_or_create_direct_chat, record_message, record_messages, mark_chat_read
+from .write_behind import MessageBuffer, reserve_message_ids
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
 
-# Create your tests here.
+
+class RecentChatsViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="student", email="student@example.com", password="pass", role="student"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_chat(self, index, messages=2):
+        other = User.objects.create_user(
+            username=f"teacher{index}", email=f"teacher{index}@example.com", password="pass", role="teacher"
+        )
+        chat = Chat.objects.create()
+        chat.participants.add(self.user, other)
+        create_inbox_entries(chat, [self.user, other])
+        for n in range(messages):
+            self.send(chat, other, f"message {n}")
+        return chat, other
+
+    def send(self, chat, sender, text):
+        message = Message.objects.create(chat=chat, sender=sender, text=text)
+        record_message(message)
+        return message
+
+    def test_query_count_does_not_grow_with_chats(self):
+        for index in range(10):
+            self.create_chat(index)
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/chat/recent/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 10)
+
+    def test_returns_other_user_last_message_and_unread_count(self):
+        chat, other = self.create_chat(0, messages=3)
+        self.send(chat, self.user, "reply")
+
+        response = self.client.get("/api/chat/recent/")
+
+        entry = response.data[0]
+        self.assertEqual(entry["other_user"], {"id": other.id, "username": other.username})
+        self.assertEqual(entry["last_message"]["text"], "reply")
+        self.assertEqual(entry["unread_count"], 3)
+
+    def test_orders_by_last_activity(self):
+        older, _ = self.create_chat(0)
+        newer, _ = self.create_chat(1)
+        self.send(older, self.user, "bump")
+
+        response = self.client.get("/api/chat/recent/")
+
+        self.assertEqual([entry["id"] for entry in response.data], [older.id, newer.id])
+
+    def test_read_watermark_drives_unread_count(self):
+        chat, other = self.create_chat(0, messages=0)
+        messages = [self.send(chat, other, f"message {n}") for n in range(3)]
+
+        response = self.client.post(f"/api/chat/{chat.id}/read/", {"message_id": messages[1].id}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        inbox = ChatInbox.objects.get(chat=chat, user=self.user)
+        self.assertEqual(inbox.last_read_message_id, messages[1].id)
+        self.assertEqual(inbox.unread_count, 1)
+
+        # An older watermark never moves it backwards
+        self.assertFalse(mark_chat_read(chat.id, self.user.id, messages[0].id))
+
+    def test_watermark_follows_timestamps_when_ids_are_out_of_order(self):
+        chat, other = self.create_chat(0, messages=0)
+        now = timezone.now()
+        # Reserved id blocks: the later message can carry the lower id
+        later = Message.objects.create(chat=chat, sender=other, text="later", timestamp=now + timezone.timedelta(seconds=1))
+        earlier = Message.objects.create(chat=chat, sender=other, text="earlier", timestamp=now)
+        self.assertLess(later.id, earlier.id)
+        record_messages([earlier, later])
+
+        inbox = ChatInbox.objects.get(chat=chat, user=self.user)
+        self.assertEqual((inbox.last_message_id, inbox.unread_count), (later.id, 2))
+
+        self.assertTrue(mark_chat_read(chat.id, self.user.id, later.id))
+        inbox.refresh_from_db()
+        self.assertEqual((inbox.last_read_message_id, inbox.unread_count), (later.id, 0))
+
+        # The higher id is older in the timeline, so it does not move the watermark back
+        self.assertFalse(mark_chat_read(chat.id, self.user.id, earlier.id))
+        self.assertFalse(mark_chat_read(chat.id, self.user.id, earlier.id + 1000))
+
+        call_command("rebuild_chat_inbox", stdout=StringIO())
+        inbox = ChatInbox.objects.get(chat=chat, user=self.user)
+        self.assertEqual((inbox.last_read_message_id, inbox.unread_count), (later.id, 0))
+
+    def test_rebuild_command_matches_incremental_inbox(self):
+        chat, other = self.create_chat(0, messages=3)
+        reply = self.send(chat, self.user, "reply")
+        mark_chat_read(chat.id, other.id, reply.id)
+        expected = list(ChatInbox.objects.order_by("user_id").values(
+            "user_id", "last_message_id", "last_read_at", "last_read_message_id", "unread_count"
+        ))
+
+        ChatInbox.objects.update(last_message=None, unread_count=99)
+        call_command("rebuild_chat_inbox", stdout=StringIO())
+
+        rebuilt = list(ChatInbox.objects.order_by("user_id").values(
+            "user_id", "last_message_id", "last_read_at", "last_read_message_id", "unread_count"
+        ))
+        self.assertEqual(rebuilt, expected)
+
+
+class ChatMessagesViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="student", email="student@example.com", password="pass", role="student"
+        )
+        self.other = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass", role="teacher"
+        )
+        self.chat = Chat.objects.create()
+        self.chat.participants.add(self.user, self.other)
+        self.url = f"/api/chat/messages/{self.chat.id}/"
+
+        base = timezone.now() - timezone.timedelta(hours=1)
+        messages = [
+            Message.objects.create(chat=self.chat, sender=self.other, text=f"message {n}", timestamp=base + timezone.timedelta(seconds=n))
+            for n in range(6)
+        ]
+        # Same timestamp as the last one: the id breaks the tie
+        tie = Message.objects.create(chat=self.chat, sender=self.user, text="tie", timestamp=messages[-1].timestamp)
+        # Highest id but the oldest timestamp, as ids reserved by another process can be
+        backdated = Message.objects.create(chat=self.chat, sender=self.other, text="backdated", timestamp=base - timezone.timedelta(seconds=1))
+        self.timeline = [backdated, *messages, tie]
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def page(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return [message["id"] for message in response.data["results"]], response.data["has_more"]
+
+    def ids(self, start, end=None):
+        return [message.id for message in self.timeline[start:end]]
+
+    def test_default_is_latest_page_oldest_first(self):
+        self.assertEqual(self.page(limit=3), (self.ids(5), True))
+        self.assertEqual(self.page(), (self.ids(0), False))
+
+    def test_before_walks_back_in_timestamp_order(self):
+        self.assertEqual(self.page(limit=3, before=self.timeline[5].id), (self.ids(2, 5), True))
+        self.assertEqual(self.page(limit=3, before=self.timeline[2].id), (self.ids(0, 2), False))
+
+    def test_after_returns_only_newer_messages(self):
+        self.assertEqual(self.page(limit=3, after=self.timeline[0].id), (self.ids(1, 4), True))
+        self.assertEqual(self.page(limit=3, after=self.timeline[5].id), (self.ids(6), False))
+        self.assertEqual(self.page(after=self.timeline[-1].id), ([], False))
+
+    def test_after_an_unflushed_message_falls_back_to_latest_page(self):
+        # A broadcast id from the write-behind buffer that has not reached the database yet
+        unflushed = self.timeline[-1].id + 100
+        self.assertEqual(self.page(limit=3, after=unflushed), (self.ids(5), True))
+
+    def test_rejects_bad_anchors(self):
+        other_chat = Chat.objects.create()
+        other_chat.participants.add(self.user, self.other)
+        foreign = Message.objects.create(chat=other_chat, sender=self.other, text="elsewhere")
+
+        self.assertEqual(self.client.get(self.url, {"before": "latest"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"before": foreign.id}).status_code, 404)
+        self.client.force_authenticate(User.objects.create_user(
+            username="outsider", email="outsider@example.com", password="pass", role="student"
+        ))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_timeline_index_matches_page_ordering(self):
+        index = next(index for index in Message._meta.indexes if index.name == "message_chat_timeline_idx")
+        self.assertEqual(index.fields, ["chat", "timestamp", "id"])
+
+
+class ContactsCacheTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass", role="teacher"
+        )
+        self.classroom = Classroom.objects.create(
+            name="Maths", category="Science", code="MATH01", max_participants=10,
+            start_datetime=timezone.now(), end_datetime=timezone.now() + timezone.timedelta(days=1),
+            teacher=self.teacher,
+        )
+        self.user = User.objects.create_user(
+            username="student", email="student@example.com", password="pass", role="student"
+        )
+        self.student = Student.objects.create(user=self.user)
+
+    def test_enrollment_changes_invalidate_both_sides(self):
+        self.assertEqual(get_contacts(self.teacher), {"students_in_my_classes": []})
+        self.assertEqual(get_contacts(self.user), {"teachers": [], "fellow_students": []})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.joined_classes.add(self.classroom)
+        self.assertEqual(get_contacts(self.teacher), {"students_in_my_classes": [self.user.id]})
+        self.assertEqual(get_contacts(self.user)["teachers"], [self.teacher.id])
+        with self.assertNumQueries(0):
+            get_contacts(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.joined_classes.remove(self.classroom)
+        self.assertEqual(get_contacts(self.teacher), {"students_in_my_classes": []})
+        self.assertEqual(get_contacts(self.user)["teachers"], [])
+
+    def test_classroom_deletion_invalidates_members(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.joined_classes.add(self.classroom)
+        self.assertEqual(get_contacts(self.user)["teachers"], [self.teacher.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.classroom.delete()
+        self.assertEqual(get_contacts(self.user)["teachers"], [])
+
+
+class DirectChatTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com", password="pass", role="student")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com", password="pass", role="teacher")
+
+    def test_pair_maps_to_one_chat_in_either_direction(self):
+        chat, created = get_or_create_direct_chat(self.alice, self.bob)
+        self.assertTrue(created)
+        self.assertEqual(ChatInbox.objects.filter(chat=chat).count(), 2)
+
+        again, created = get_or_create_direct_chat(self.bob, self.alice)
+        self.assertFalse(created)
+        self.assertEqual(again.id, chat.id)
+        self.assertEqual(Chat.objects.count(), 1)
+
+    def test_adopts_chat_created_without_pair_key(self):
+        legacy = Chat.objects.create()
+        legacy.participants.add(self.alice, self.bob)
+
+        chat, created = get_or_create_direct_chat(self.bob, self.alice)
+
+        self.assertFalse(created)
+        self.assertEqual(chat.id, legacy.id)
+        legacy.refresh_from_db()
+        self.assertEqual((legacy.user_low_id, legacy.user_high_id), tuple(sorted((self.alice.id, self.bob.id))))
+
+
+    def test_create_view_serves_last_message_and_unread_count_from_inbox(self):
+        classroom = Classroom.objects.create(
+            name="Maths", category="Science", code="MATH01", max_participants=50,
+            start_datetime=timezone.now(), end_datetime=timezone.now() + timezone.timedelta(days=30),
+            teacher=self.bob,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.create(user=self.alice).joined_classes.add(classroom)
+        plan = SubscriptionPlan.objects.create(name="premium", price=10, duration_days=30)
+        UserSubscription.objects.create(user=self.bob, plan=plan, end_date=timezone.now() + timezone.timedelta(days=30))
+        chat, _ = get_or_create_direct_chat(self.alice, self.bob)
+        for text in ("hi", "there"):
+            record_message(Message.objects.create(chat=chat, sender=self.bob, text=text))
+
+        client = APIClient()
+        client.force_authenticate(self.alice)
+        response = client.post("/api/chat/create/", {"user_id": self.bob.id})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["id"], chat.id)
+        self.assertEqual(response.data["other_user"], {"id": self.bob.id, "username": "bob"})
+        self.assertEqual(response.data["last_message"]["text"], "there")
+        self.assertEqual(response.data["unread_count"], 2)
+
+
+class SubscribedUsersViewTests(TestCase):
+    url = "/api/subscribed-users/"
+
+    def setUp(self):
+        cache.clear()
+        self.student = User.objects.create_user(username="viewer", email="viewer@example.com", password="pass", role="student")
+        plan = SubscriptionPlan.objects.create(name="premium", price=10, duration_days=30)
+        free = SubscriptionPlan.objects.create(name="free", price=0, duration_days=30)
+        end_date = timezone.now() + timezone.timedelta(days=30)
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.create(user=self.student)
+            for index in range(2):
+                teacher = User.objects.create_user(
+                    username=f"teacher{index}", email=f"teacher{index}@example.com", password="pass", role="teacher"
+                )
+                classroom = Classroom.objects.create(
+                    name=f"Class {index}", category="Science", code=f"CLASS{index}", max_participants=50,
+                    start_datetime=timezone.now(), end_datetime=end_date, teacher=teacher,
+                )
+                self.student.student.joined_classes.add(classroom)
+                UserSubscription.objects.create(user=teacher, plan=plan if index == 0 else free, end_date=end_date)
+            for index in range(12):
+                user = User.objects.create_user(
+                    username=f"peer{index:02d}", email=f"peer{index}@example.com", password="pass", role="student"
+                )
+                Student.objects.create(user=user).joined_classes.add(classroom)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_query_count_does_not_grow_with_contacts(self):
+        self.client.get(self.url)  # warm the contacts cache
+
+        # One query per contact list, however many contacts there are
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(
+            response.data["teachers"],
+            [{"id": user.id, "username": user.username, "is_subscribed": index == 0}
+             for index, user in enumerate(User.objects.filter(role="teacher").order_by("username"))],
+        )
+        self.assertEqual(len(response.data["fellow_students"]), 12)
+        self.assertEqual(response.data["has_more"], {"teachers": False, "fellow_students": False})
+
+    def test_pages_with_limit_and_offset(self):
+        response = self.client.get(self.url, {"limit": 5, "offset": 5})
+        self.assertEqual([user["username"] for user in response.data["fellow_students"]], [f"peer{n:02d}" for n in range(5, 10)])
+        self.assertEqual(response.data["has_more"], {"teachers": False, "fellow_students": True})
+
+        response = self.client.get(self.url, {"limit": 5, "offset": 10})
+        self.assertEqual([user["username"] for user in response.data["fellow_students"]], ["peer10", "peer11"])
+        self.assertFalse(response.data["has_more"]["fellow_students"])
+
+        self.assertEqual(self.client.get(self.url, {"offset": "next"}).status_code, 400)
+
+    def test_search_filters_each_list(self):
+        response = self.client.get(self.url, {"search": "1"})
+
+        self.assertEqual([user["username"] for user in response.data["teachers"]], ["teacher1"])
+        self.assertEqual(
+            [user["username"] for user in response.data["fellow_students"]], ["peer01", "peer10", "peer11"]
+        )
+
+
+class PresenceViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="viewer", email="viewer@example.com", password="pass", role="student")
+        self.teacher = User.objects.create_user(username="teacher", email="teacher@example.com", password="pass", role="teacher")
+        self.stranger = User.objects.create_user(username="stranger", email="stranger@example.com", password="pass", role="student")
+        classroom = Classroom.objects.create(
+            name="Maths", category="Science", code="MATH01", max_participants=50,
+            start_datetime=timezone.now(), end_datetime=timezone.now() + timezone.timedelta(days=30),
+            teacher=self.teacher,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.create(user=self.user).joined_classes.add(classroom)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def online(self, *user_ids):
+        return self.client.get(f"/api/chat/presence/?user_ids={','.join(map(str, user_ids))}").data
+
+    def test_user_stays_online_until_last_socket_closes(self):
+        teacher_id = self.teacher.id
+        async_to_sync(mark_connected)(teacher_id)
+        async_to_sync(mark_connected)(teacher_id)
+        get_contacts(self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.online(teacher_id, 99999), {"online": [teacher_id]})
+
+        self.assertFalse(async_to_sync(mark_disconnected)(teacher_id))
+        self.assertEqual(self.online(teacher_id), {"online": [teacher_id]})
+        self.assertTrue(async_to_sync(mark_disconnected)(teacher_id))
+        self.assertEqual(self.online(teacher_id), {"online": []})
+
+    def test_non_contacts_are_reported_offline(self):
+        async_to_sync(mark_connected)(self.stranger.id)
+        self.addCleanup(async_to_sync(mark_disconnected), self.stranger.id)
+
+        self.assertEqual(self.online(self.stranger.id), {"online": []})
+
+    def test_rejects_malformed_ids(self):
+        response = self.client.get("/api/chat/presence/?user_ids=1,abc")
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CHAT_MEDIA_BACKEND="chat.storage.LocalUploadBackend")
+class DirectMediaUploadTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(CHAT_MEDIA_LOCAL_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username="sender", email="sender@example.com", password="pass", role="student")
+        other = User.objects.create_user(username="receiver", email="receiver@example.com", password="pass", role="teacher")
+        self.chat, _ = get_or_create_direct_chat(self.user, other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def start_upload(self, filename="notes.pdf"):
+        response = self.client.post("/api/chat/media/upload/", {"chat_id": self.chat.id, "filename": filename})
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def test_two_phase_upload_records_message(self):
+        upload = self.start_upload()
+        self.assertEqual(upload["media_type"], "document")
+
+        uploaded = APIClient().post(
+            upload["upload_url"], {"file": SimpleUploadedFile("notes.pdf", b"%PDF-1.4")}, format="multipart"
+        )
+        self.assertEqual(uploaded.status_code, 201)
+
+        response = self.client.post(
+            "/api/chat/send/", {"chat_id": self.chat.id, "upload_token": upload["upload_token"]}
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["media_type"], "document")
+        self.assertTrue(response.data["media_url"].endswith(upload["public_id"]))
+        message = Message.objects.get(id=response.data["id"])
+        self.assertEqual(MessageSerializer(message).data["media_url"], response.data["media_url"])
+
+    def test_rejects_unfinished_or_tampered_uploads(self):
+        upload = self.start_upload()
+
+        response = self.client.post(
+            "/api/chat/send/", {"chat_id": self.chat.id, "upload_token": upload["upload_token"]}
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post(
+            "/api/chat/send/", {"chat_id": self.chat.id, "upload_token": upload["upload_token"] + "x"}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Message.objects.exists())
+
+
+@override_settings(CHAT_WRITE_BEHIND_MAX_RETRIES=3, CHAT_WRITE_BEHIND_INTERVAL_MS=60000)
+class WriteBehindTests(TestCase):
+    def setUp(self):
+        self.sender = User.objects.create_user(username="sender", email="sender@example.com", password="pass", role="student")
+        self.receiver = User.objects.create_user(username="receiver", email="receiver@example.com", password="pass", role="teacher")
+        self.chat, _ = get_or_create_direct_chat(self.sender, self.receiver)
+        self.buffer = MessageBuffer()
+        self.next_id = 1000
+
+    def buffer_message(self, text, timestamp=None):
+        self.next_id += 1
+        message = Message(
+            id=self.next_id, chat=self.chat, sender=self.sender, text=text,
+            timestamp=timestamp or timezone.now(),
+        )
+        self.buffer.pending.append(message)
+        return message
+
+    def flush(self):
+        async def run():
+            await self.buffer.flush()
+            # Retries are rescheduled on the loop; the tests drive them explicitly
+            if self.buffer.flush_task:
+                self.buffer.flush_task.cancel()
+                self.buffer.flush_task = None
+        async_to_sync(run)()
+
+    def test_flush_persists_batch_with_broadcast_timestamps(self):
+        broadcast_at = timezone.now() - timezone.timedelta(minutes=5)
+        first = self.buffer_message("one", broadcast_at)
+        second = self.buffer_message("two", broadcast_at + timezone.timedelta(seconds=1))
+
+        self.flush()
+
+        stored = list(Message.objects.filter(chat=self.chat).order_by("timestamp", "id"))
+        self.assertEqual([(m.id, m.timestamp) for m in stored], [(first.id, first.timestamp), (second.id, second.timestamp)])
+        inbox = ChatInbox.objects.get(chat=self.chat, user=self.receiver)
+        self.assertEqual((inbox.last_message_id, inbox.unread_count), (second.id, 2))
+        self.assertEqual(self.buffer.pending, [])
+
+    def test_failed_inbox_update_rolls_back_and_requeues(self):
+        message = self.buffer_message("hello")
+
+        with mock.patch("chat.utils.record_messages", side_effect=[RuntimeError("inbox down"), record_messages]):
+            with self.assertLogs("chat.write_behind", "ERROR"):
+                self.flush()
+            # Nothing half-written: the insert was rolled back with the failed inbox update
+            self.assertFalse(Message.objects.filter(id=message.id).exists())
+            self.assertEqual(self.buffer.pending, [message])
+
+            self.flush()
+
+        self.assertTrue(Message.objects.filter(id=message.id).exists())
+        self.assertEqual(self.buffer.pending, [])
+        self.assertEqual(self.buffer.failures, 0)
+
+    def test_batch_that_keeps_failing_is_written_row_by_row_and_dead_lettered(self):
+        good = self.buffer_message("good")
+        bad = self.buffer_message("bad")
+        real_record = record_messages
+
+        def record(messages):
+            if any(m.id == bad.id for m in messages):
+                raise RuntimeError("poison message")
+            real_record(messages)
+
+        with mock.patch("chat.utils.record_messages", side_effect=record), self.assertLogs("chat.write_behind", "ERROR") as logs:
+            for _ in range(3):
+                self.flush()
+
+        self.assertEqual(self.buffer.pending, [])
+        self.assertEqual(list(Message.objects.filter(chat=self.chat).values_list("id", flat=True)), [good.id])
+        self.assertTrue(any("Dead-lettered chat message" in line and '"text": "bad"' in line for line in logs.output))
+
+        # The buffer keeps working afterwards
+        later = self.buffer_message("later")
+        self.flush()
+        self.assertTrue(Message.objects.filter(id=later.id).exists())
+
+    def test_shutdown_drains_pending_messages(self):
+        first = self.buffer_message("one")
+        second = self.buffer_message("two")
+
+        self.buffer.flush_sync()
+
+        self.assertEqual(set(Message.objects.values_list("id", flat=True)), {first.id, second.id})
+        self.assertEqual(self.buffer.pending, [])
+
+    def test_reserving_ids_requires_postgres(self):
+        if connection.vendor == "postgresql":
+            ids = reserve_message_ids(5)
+            self.assertEqual(len(set(ids)), 5)
+            self.assertEqual(ids, sorted(ids))
+        else:
+            with self.assertRaises(ImproperlyConfigured):
+                reserve_message_ids(5)
@@ -1,11 +1,19 @@
 # urls.py
 from django.urls import path
-from .views import SubscribedUsersView, CreateOrGetChatView, ChatMessagesView, SendMessageView, RecentChatsView
+from .views import (
+    SubscribedUsersView, CreateOrGetChatView, ChatMessagesView, SendMessageView, RecentChatsView,
+    MarkChatReadView, PresenceView, ChatMediaUploadView, LocalMediaUploadView,
+)
+
 
 urlpatterns = [
     path('subscribed-users/', SubscribedUsersView.as_view()),
     path('chat/create/', CreateOrGetChatView.as_view()),
     path('chat/recent/', RecentChatsView.as_view()),
     path('chat/messages/<int:chat_id>/', ChatMessagesView.as_view()),
+    path('chat/<int:chat_id>/read/', MarkChatReadView.as_view()),
     path('chat/send/', SendMessageView.as_view()),
+    path('chat/media/upload/', ChatMediaUploadView.as_view()),
+    path('chat/media/local/<str:upload_token>/', LocalMediaUploadView.as_view(), name='chat-local-media-upload'),
+    path('chat/presence/', PresenceView.as_view()),
 ]
\ No newline at end of file
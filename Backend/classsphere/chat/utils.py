@@ -0,0 +1,199 @@
+from channels.db import database_sync_to_async
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Case, When, F, Q, Count, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Coalesce
+from .models import Chat, ChatInbox, Message
+
+# Chat membership never changes after creation, so it can be cached for a long time
+CHAT_MEMBERS_CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def _chat_members_key(chat_id):
+    return f"chat:members:{chat_id}"
+
+
+def _load_chat_member_ids(chat_id):
+    return list(Chat.participants.through.objects.filter(chat_id=chat_id).values_list("user_id", flat=True))
+
+
+async def is_chat_participant(chat_id, user_id):
+    """Membership check for WebSocket consumers; only a cache miss touches the DB."""
+    key = _chat_members_key(chat_id)
+    member_ids = await cache.aget(key)
+    if member_ids is None:
+        member_ids = await database_sync_to_async(_load_chat_member_ids)(chat_id)
+        await cache.aset(key, member_ids, CHAT_MEMBERS_CACHE_TIMEOUT)
+    return user_id in member_ids
+
+
+def create_inbox_entries(chat, users):
+    """Create the inbox rows for a freshly created chat."""
+    cache.set(_chat_members_key(chat.id), [user.id for user in users], CHAT_MEMBERS_CACHE_TIMEOUT)
+    ChatInbox.objects.bulk_create([
+        ChatInbox(
+            chat=chat,
+            user=user,
+            other_user=next((other for other in users if other.id != user.id), None),
+            last_activity=chat.created_at,
+        )
+        for user in users
+    ], ignore_conflicts=True)
+
+
+def get_or_create_direct_chat(user, other_user):
+    """
+    Return the 1:1 chat between two users, creating it if needed.
+
+    Looked up by the unique (user_low, user_high) key, so concurrent requests
+    for the same pair always end up with the same chat.
+    """
+    low, high = sorted((user.id, other_user.id))
+    chat = Chat.objects.filter(user_low_id=low, user_high_id=high).first()
+    if chat:
+        return chat, False
+
+    try:
+        with transaction.atomic():
+            # Chats created before the pair key existed are adopted instead of duplicated
+            chat = (
+                Chat.objects.filter(user_low__isnull=True, participants=user)
+                .filter(participants=other_user)
+                .first()
+            )
+            if chat:
+                chat.user_low_id, chat.user_high_id = low, high
+                chat.save(update_fields=["user_low", "user_high"])
+                return chat, False
+
+            chat = Chat.objects.create(user_low_id=low, user_high_id=high)
+            chat.participants.add(user, other_user)
+            create_inbox_entries(chat, [user, other_user])
+            return chat, True
+    except IntegrityError:
+        # Lost the race to a concurrent request for the same pair
+        return Chat.objects.get(user_low_id=low, user_high_id=high), False
+
+
+def record_message(message):
+    """Point every participant's inbox row at the new message with a single UPDATE."""
+    record_messages([message])
+
+
+def record_messages(messages):
+    """Apply a batch of new messages to the inbox with one UPDATE per chat."""
+    by_chat = {}
+    for message in messages:
+        by_chat.setdefault(message.chat_id, []).append(message)
+
+    for chat_id, chat_messages in by_chat.items():
+        latest = max(chat_messages, key=lambda message: (message.timestamp, message.id))
+        sent_by = {}
+        for message in chat_messages:
+            sent_by[message.sender_id] = sent_by.get(message.sender_id, 0) + 1
+
+        # Each participant's unread count grows by the messages the others sent
+        updated = ChatInbox.objects.filter(chat_id=chat_id).update(
+            last_message=latest,
+            last_activity=latest.timestamp,
+            unread_count=Case(
+                *[
+                    When(user_id=sender_id, then=F("unread_count") + len(chat_messages) - count)
+                    for sender_id, count in sent_by.items()
+                ],
+                default=F("unread_count") + len(chat_messages),
+            ),
+        )
+        if not updated:
+            # Chat predates the inbox table; build its rows from the message history
+            rebuild_inbox(Chat.objects.filter(id=chat_id))
+
+
+def _unread_after(timestamp=None, message_id=None):
+    """
+    Messages from other participants after the (timestamp, id) watermark, for an inbox-row
+    UPDATE; every message when there is no watermark. Same ordering as the chat timeline.
+    """
+    unread = Message.objects.filter(chat_id=OuterRef("chat_id"))
+    if timestamp is not None:
+        unread = unread.filter(Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=message_id))
+    unread = (
+        unread.exclude(sender_id=OuterRef("user_id"))
+        .order_by()
+        .values("chat_id")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    return Coalesce(Subquery(unread, output_field=IntegerField()), 0)
+
+
+def mark_chat_read(chat_id, user_id, message_id):
+    """
+    Move the user's read watermark forward to message_id and recompute their
+    unread count from it, as one UPDATE regardless of how many messages it covers.
+    Returns True when the watermark moved; unknown (or not yet flushed) messages are ignored.
+    """
+    timestamp = Message.objects.filter(chat_id=chat_id, id=message_id).values_list("timestamp", flat=True).first()
+    if timestamp is None:
+        return False
+    updated = (
+        ChatInbox.objects.filter(chat_id=chat_id, user_id=user_id)
+        # Never move backwards in timeline order
+        .exclude(Q(last_read_at__gt=timestamp) | Q(last_read_at=timestamp, last_read_message_id__gte=message_id))
+        .update(
+            last_read_at=timestamp,
+            last_read_message_id=message_id,
+            unread_count=_unread_after(timestamp, message_id),
+        )
+    )
+    return bool(updated)
+
+
+def rebuild_inbox(chats):
+    """Recompute inbox rows for the given chats from their messages."""
+    latest_message = Message.objects.filter(chat=OuterRef("pk")).order_by("-timestamp", "-id")
+    chats = list(
+        chats.prefetch_related("participants").annotate(
+            last_message_id=Subquery(latest_message.values("id")[:1]),
+            last_timestamp=Subquery(latest_message.values("timestamp")[:1]),
+        )
+    )
+
+    # Keep existing read watermarks across the rebuild, filling in the timestamp of id-only ones
+    watermarks = {
+        (row["chat_id"], row["user_id"]): (row["last_read_at"], row["last_read_message_id"])
+        for row in ChatInbox.objects.filter(chat__in=chats).values(
+            "chat_id", "user_id", "last_read_at", "last_read_message_id"
+        )
+    }
+    read_at_by_id = dict(
+        Message.objects.filter(
+            id__in=[message_id for read_at, message_id in watermarks.values() if message_id and read_at is None]
+        ).values_list("id", "timestamp")
+    )
+
+    entries = []
+    for chat in chats:
+        participants = list(chat.participants.all())
+        for user in participants:
+            read_at, read_id = watermarks.get((chat.id, user.id), (None, None))
+            read_at = read_at or read_at_by_id.get(read_id)
+            entries.append(ChatInbox(
+                chat=chat,
+                user=user,
+                other_user=next((other for other in participants if other.id != user.id), None),
+                last_message_id=chat.last_message_id,
+                last_activity=chat.last_timestamp or chat.created_at,
+                last_read_at=read_at,
+                last_read_message_id=read_id if read_at else None,
+            ))
+
+    with transaction.atomic():
+        ChatInbox.objects.filter(chat__in=chats).delete()
+        ChatInbox.objects.bulk_create(entries)
+        rows = ChatInbox.objects.filter(chat__in=chats)
+        rows.filter(last_read_at__isnull=True).update(unread_count=_unread_after())
+        rows.filter(last_read_at__isnull=False).update(
+            unread_count=_unread_after(OuterRef("last_read_at"), OuterRef("last_read_message_id"))
+        )
+    return len(entries)
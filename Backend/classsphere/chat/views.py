@@ -3,32 +3,159 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
+from django.core import signing
 from django.shortcuts import get_object_or_404
+from django.db.models import Q, Exists, OuterRef
 from subscription.models import UserSubscription
-from .models import Chat, Message
-from .serializers import ChatSerializer, MessageSerializer
+from .models import Chat, ChatInbox, Message
+from .serializers import ChatInboxSerializer, MessageSerializer
+from .utils import get_or_create_direct_chat, create_inbox_entries, record_message, mark_chat_read
+from .contacts import get_contacts, is_contact
+from .presence import online_user_ids
+from .storage import (
+    LocalUploadBackend, get_upload_backend, load_upload, media_type_for, new_public_id, sign_upload,
+)
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from authentication.models import User
-from classroom.models import Classroom, Student
+from classsphere.pagination import get_page_size
+from classsphere.storage import SignedLinkView
 
 
 class RecentChatsView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        chats = Chat.objects.prefetch_related('participants').filter(participants=request.user)
-        serializer = ChatSerializer(chats, many=True, context={"request": request})
+        """List the user's chats by last activity from their inbox rows."""
+        inbox = (
+            ChatInbox.objects.filter(user=request.user)
+            .select_related("other_user", "last_message__sender")
+            .order_by("-last_activity")
+        )
+        serializer = ChatInboxSerializer(inbox, many=True)
         return Response(serializer.data)
 
 class ChatMessagesView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, chat_id):
+        """
+        Page through a chat's history, oldest first within each page.
+
+        ?before=<message id> loads older messages (default: the latest page),
+        ?after=<message id> loads only what arrived since the last seen message. An after id that
+        is not stored yet (still in a write-behind buffer) falls back to the latest page, which the
+        client merges by message id.
+        """
         chat = get_object_or_404(Chat, id=chat_id, participants=request.user)
-        messages = chat.messages.select_related('sender').order_by("timestamp")
-        serializer = MessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        page_size = get_page_size(request, default=50, maximum=200)
+        before = request.query_params.get("before")
+        after = request.query_params.get("after")
+        messages = Message.objects.select_related('sender').filter(chat=chat)
+
+        anchor_id = after or before
+        if anchor_id:
+            if not anchor_id.isdigit():
+                return Response({"error": "Message ID must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+            anchor = Message.objects.filter(chat=chat, id=anchor_id).values_list("timestamp", flat=True).first()
+            if anchor is None:
+                if not after:
+                    return Response({"error": "Message not found"}, status=status.HTTP_404_NOT_FOUND)
+                after = before = None
+
+        if after:
+            messages = messages.filter(
+                Q(timestamp__gt=anchor) | Q(timestamp=anchor, id__gt=anchor_id)
+            ).order_by("timestamp", "id")
+            page = list(messages[:page_size + 1])
+            has_more = len(page) > page_size
+            page = page[:page_size]
+        else:
+            if before:
+                messages = messages.filter(Q(timestamp__lt=anchor) | Q(timestamp=anchor, id__lt=anchor_id))
+            page = list(messages.order_by("-timestamp", "-id")[:page_size + 1])
+            has_more = len(page) > page_size
+            page = page[:page_size][::-1]
+
+        serializer = MessageSerializer(page, many=True)
+        other_last_read_id = (
+            ChatInbox.objects.filter(chat=chat).exclude(user=request.user)
+            .values_list("last_read_message_id", flat=True).first()
+        )
+        return Response({
+            "results": serializer.data,
+            "has_more": has_more,
+            "other_last_read_id": other_last_read_id,
+        })
+
+class MarkChatReadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, chat_id):
+        """Move the user's read watermark to message_id; everything up to it counts as read."""
+        message_id = request.data.get("message_id")
+        try:
+            message_id = int(message_id)
+        except (TypeError, ValueError):
+            return Response({"error": "Message ID must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        chat = get_object_or_404(Chat, id=chat_id, participants=request.user)
+        if mark_chat_read(chat.id, request.user.id, message_id):
+            channel_layer = get_channel_layer()
+            async_to_sync(channel_layer.group_send)(
+                f"chat_{chat.id}",
+                {
+                    "type": "chat_read",
+                    "user_id": request.user.id,
+                    "message_id": message_id,
+                }
+            )
+        return Response({"last_read_message_id": message_id}, status=status.HTTP_200_OK)
+
+class ChatMediaUploadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """
+        Phase one of a media message: sign an upload the client sends straight to storage.
+
+        The returned upload_token is then passed to chat/send/ to record the message.
+        """
+        chat_id = request.data.get("chat_id")
+        filename = request.data.get("filename")
+        if not chat_id or not filename:
+            return Response({"error": "Chat ID and filename are required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        chat = get_object_or_404(Chat, id=chat_id, participants=request.user)
+        public_id = new_public_id(filename)
+        media_type = media_type_for(filename)
+        upload_token = sign_upload(chat.id, request.user.id, public_id, media_type)
+
+        return Response({
+            "upload_token": upload_token,
+            "public_id": public_id,
+            "media_type": media_type,
+            **get_upload_backend().create_upload(public_id, upload_token),
+        }, status=status.HTTP_201_CREATED)
+
+
+class LocalMediaUploadView(SignedLinkView):
+    def post(self, request, upload_token):
+        backend = get_upload_backend()
+        if not isinstance(backend, LocalUploadBackend):
+            return Response({"error": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            upload = load_upload(upload_token)
+        except signing.BadSignature:
+            return Response({"error": "Invalid or expired upload token"}, status=status.HTTP_403_FORBIDDEN)
+
+        media_file = request.FILES.get("file")
+        if not media_file:
+            return Response({"error": "File is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        backend.save(upload["public_id"], media_file)
+        return Response({"public_id": upload["public_id"]}, status=status.HTTP_201_CREATED)
+
 
 class SendMessageView(APIView):
     permission_classes = [IsAuthenticated]
@@ -37,6 +164,7 @@ class SendMessageView(APIView):
         chat_id = request.data.get("chat_id")
         message_text = request.data.get("message", "")
         media_file = request.FILES.get("media")
+        upload_token = request.data.get("upload_token")
 
         if not chat_id:
             return Response({"error": "Chat ID is required"}, status=status.HTTP_400_BAD_REQUEST)
@@ -49,22 +177,27 @@ class SendMessageView(APIView):
             "text": message_text,
         }
 
-        if media_file:
-            # Determine media type based on file extension or MIME type
-            file_extension = media_file.name.split('.')[-1].lower()
-            if file_extension in ['jpg', 'jpeg', 'png', 'gif']:
-                media_type = 'image'
-            elif file_extension in ['mp4', 'mov', 'avi']:
-                media_type = 'video'
-            elif file_extension in ['pdf', 'doc', 'docx']:
-                media_type = 'document'
-            else:
-                media_type = 'file'
-            
+        if upload_token:
+            # Phase two of a direct upload: the file is already in storage
+            try:
+                upload = load_upload(upload_token)
+            except signing.BadSignature:
+                return Response({"error": "Invalid or expired upload token"}, status=status.HTTP_400_BAD_REQUEST)
+            if upload["chat_id"] != chat.id or upload["user_id"] != request.user.id:
+                return Response({"error": "Upload token does not match this chat"}, status=status.HTTP_400_BAD_REQUEST)
+            if not get_upload_backend().confirm_upload(upload["public_id"], request.data):
+                return Response({"error": "Upload could not be verified"}, status=status.HTTP_400_BAD_REQUEST)
+
+            message_data["media"] = upload["public_id"]
+            message_data["media_type"] = upload["media_type"]
+
+        elif media_file:
+            # Legacy path: the file is proxied through this request
             message_data["media"] = media_file
-            message_data["media_type"] = media_type
+            message_data["media_type"] = media_type_for(media_file.name)
 
         message = Message.objects.create(**message_data)
+        record_message(message)
         serializer = MessageSerializer(message)
 
         channel_layer = get_channel_layer()
@@ -75,7 +208,7 @@ class SendMessageView(APIView):
                 "chat_id": chat_id,
                 "sender": request.user.username,
                 "message": message_text,
-                "media_url": message.media.url if message.media else None,
+                "media_url": serializer.data["media_url"],
                 "media_type": message.media_type,
                 "timestamp": message.timestamp.isoformat(),
                 "id": message.id,
@@ -87,71 +220,51 @@ class SubscribedUsersView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
+        """
+        List the user's chat contacts with their paid-subscription flag.
+
+        Each list is searchable with ?search=<username> and paged with ?limit/?offset;
+        the whole response costs a constant number of queries.
+        """
         user = request.user
         response_data = {}
 
         user_role = getattr(user, 'role', None)
+        if user_role not in ("student", "teacher"):
+            response_data["message"] = "User role not defined or invalid."
+            return Response(response_data)
 
-        def get_subscription_status(u):
-            return u.subscriptions.filter(
-                is_active=True,
-                end_date__gte=timezone.now()
-            ).exclude(plan__name__iexact="free").exists()
+        # Contact ids come from the per-user cache kept fresh by chat.signals
+        lists = {
+            key: User.objects.filter(id__in=ids)
+            for key, ids in get_contacts(user).items()
+        }
 
-        if user_role == "student":
-            try:
-                student_profile = Student.objects.get(user=user)
-                joined_classes = student_profile.joined_classes.all()
-
-                # Get teachers of joined classes with subscription status
-                teachers = User.objects.filter(classrooms__in=joined_classes).distinct()
-                response_data["teachers"] = [
-                    {
-                        "id": t.id,
-                        "username": t.username,
-                        "is_subscribed": get_subscription_status(t)
-                    }
-                    for t in teachers
-                ]
-
-                # Get fellow students with subscription status
-                fellow_students = User.objects.filter(
-                    student__joined_classes__in=joined_classes
-                ).exclude(id=user.id).distinct()
-                response_data["fellow_students"] = [
-                    {
-                        "id": s.id,
-                        "username": s.username,
-                        "is_subscribed": get_subscription_status(s)
-                    }
-                    for s in fellow_students
-                ]
-
-            except Student.DoesNotExist:
-                response_data["teachers"] = []
-                response_data["fellow_students"] = []
-
-        elif user_role == "teacher":
-            # Get all classes created by the teacher
-            created_classes = Classroom.objects.filter(teacher=user)
-            if created_classes.exists():
-                # Get all students with subscription status
-                students_in_classes = User.objects.filter(
-                    student__joined_classes__in=created_classes
-                ).distinct()
-                response_data["students_in_my_classes"] = [
-                    {
-                        "id": s.id,
-                        "username": s.username,
-                        "is_subscribed": get_subscription_status(s)
-                    }
-                    for s in students_in_classes
-                ]
-            else:
-                response_data["students_in_my_classes"] = []
+        try:
+            offset = max(0, int(request.query_params.get("offset", 0)))
+        except ValueError:
+            return Response({"error": "Offset must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = get_page_size(request, default=50, maximum=200)
+        search = request.query_params.get("search", "").strip()
 
-        else:
-            response_data["message"] = "User role not defined or invalid."
+        paid_subscription = UserSubscription.objects.filter(
+            user=OuterRef("pk"),
+            is_active=True,
+            end_date__gte=timezone.now()
+        ).exclude(plan__name__iexact="free")
+
+        has_more = {}
+        for key, users in lists.items():
+            if search:
+                users = users.filter(username__icontains=search)
+            page = list(
+                users.annotate(is_subscribed=Exists(paid_subscription))
+                .values("id", "username", "is_subscribed")
+                .order_by("username", "id")[offset:offset + limit + 1]
+            )
+            has_more[key] = len(page) > limit
+            response_data[key] = page[:limit]
+        response_data["has_more"] = has_more
 
         return Response(response_data)
 
@@ -168,16 +281,45 @@ class CreateOrGetChatView(APIView):
         if other_user == request.user:
             return Response({"error": "Cannot chat with yourself"}, status=status.HTTP_400_BAD_REQUEST)
 
+        if not is_contact(request.user, other_user.id):
+            return Response({"error": "You can only chat with members of your classrooms"}, status=status.HTTP_403_FORBIDDEN)
+
         has_paid_subscription = UserSubscription.objects.filter(
             user=other_user, is_active=True, end_date__gte=timezone.now()
         ).exclude(plan__name__iexact="free").exists()
         if not has_paid_subscription:
             return Response({"error": "User does not have an active paid subscription"}, status=status.HTTP_403_FORBIDDEN)
 
-        chat = Chat.objects.filter(participants=request.user).filter(participants=other_user).first()
-        if not chat:
-            chat = Chat.objects.create()
-            chat.participants.add(request.user, other_user)
+        chat, _ = get_or_create_direct_chat(request.user, other_user)
+
+        # Serve last message and unread count from the requester's inbox row
+        inbox = ChatInbox.objects.select_related("other_user", "last_message__sender").filter(
+            chat=chat, user=request.user
+        ).first()
+        if inbox is None:
+            # Chats that predate the inbox table
+            create_inbox_entries(chat, [request.user, other_user])
+            inbox = ChatInbox.objects.select_related("other_user", "last_message__sender").get(chat=chat, user=request.user)
+        serializer = ChatInboxSerializer(inbox)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class PresenceView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_USERS = 200
+
+    def get(self, request):
+        """
+        Which of ?user_ids=1,2,3 are online. Only the requester's chat contacts are looked up;
+        other ids are reported offline. Answered from the cache without touching the DB.
+        """
+        raw_ids = [value for value in request.query_params.get("user_ids", "").split(",") if value.strip()]
+        try:
+            user_ids = list(dict.fromkeys(int(value) for value in raw_ids))
+        except ValueError:
+            return Response({"error": "user_ids must be a comma-separated list of integers"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(user_ids) > self.MAX_USERS:
+            return Response({"error": f"At most {self.MAX_USERS} user ids per request"}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = ChatSerializer(chat, context={"request": request})
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        contact_ids = set().union(*get_contacts(request.user).values())
+        return Response({"online": online_user_ids([user_id for user_id in user_ids if user_id in contact_ids])})
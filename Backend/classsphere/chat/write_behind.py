@@ -0,0 +1,137 @@
+# chat/write_behind.py
+import asyncio
+import atexit
+import json
+import logging
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class MessageBuffer:
+    """
+    Per-process write-behind buffer for chat messages received over WebSocket.
+
+    Messages get their primary key up front from blocks of ids reserved on the
+    Message sequence, so they can be broadcast immediately and inserted later
+    with bulk_create once the buffer reaches CHAT_WRITE_BEHIND_BATCH_SIZE or
+    CHAT_WRITE_BEHIND_INTERVAL_MS has passed.
+    """
+
+    def __init__(self):
+        self.pending = []
+        self.reserved_ids = []
+        self.flush_task = None
+        # Consecutive failed flushes; at CHAT_WRITE_BEHIND_MAX_RETRIES the batch is written row by row
+        self.failures = 0
+        self.id_lock = asyncio.Lock()
+        self.flush_lock = asyncio.Lock()
+
+    async def add(self, **fields):
+        from .models import Message
+        # The broadcast timestamp is the one stored
+        message = Message(id=await self.next_id(), timestamp=timezone.now(), **fields)
+        self.pending.append(message)
+
+        if len(self.pending) >= settings.CHAT_WRITE_BEHIND_BATCH_SIZE:
+            await self.flush()
+        else:
+            self.schedule_flush()
+        return message
+
+    def schedule_flush(self):
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_after_interval())
+
+    async def next_id(self):
+        async with self.id_lock:
+            if not self.reserved_ids:
+                self.reserved_ids = await database_sync_to_async(reserve_message_ids)(
+                    settings.CHAT_WRITE_BEHIND_BATCH_SIZE
+                )
+            return self.reserved_ids.pop(0)
+
+    async def flush_after_interval(self):
+        await asyncio.sleep(settings.CHAT_WRITE_BEHIND_INTERVAL_MS / 1000)
+        self.flush_task = None
+        await self.flush()
+
+    async def flush(self):
+        async with self.flush_lock:
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, []
+            try:
+                await database_sync_to_async(write_messages)(batch)
+                self.failures = 0
+                return
+            except Exception:
+                self.failures += 1
+                if self.failures < settings.CHAT_WRITE_BEHIND_MAX_RETRIES:
+                    logger.exception("Failed to write %s buffered chat messages; requeueing", len(batch))
+                    self.pending = batch + self.pending
+                    self.schedule_flush()
+                    return
+                logger.exception("Failed to write %s buffered chat messages %s times; writing one by one",
+                                 len(batch), self.failures)
+                self.failures = 0
+            # Isolate the rows that keep failing so they cannot block the buffer
+            await database_sync_to_async(write_messages_individually)(batch)
+
+    def flush_sync(self):
+        """Last-chance flush when the process exits without the event loop."""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            write_messages(batch)
+        except Exception:
+            logger.exception("Failed to write %s buffered chat messages on shutdown; writing one by one", len(batch))
+            write_messages_individually(batch)
+
+
+def reserve_message_ids(count):
+    """Take `count` ids from the Message sequence; needs PostgreSQL (see chat.checks)."""
+    from .models import Message
+    if connection.vendor != "postgresql":
+        raise ImproperlyConfigured("CHAT_WRITE_BEHIND requires PostgreSQL to reserve message ids")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+            [Message._meta.db_table, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def write_messages(messages):
+    """Insert a batch and update the inbox together, so a failure leaves nothing half-written."""
+    from .models import Message
+    from .utils import record_messages
+    with transaction.atomic():
+        Message.objects.bulk_create(messages)
+        record_messages(messages)
+
+
+def write_messages_individually(messages):
+    """Write each message on its own; the ones that still fail are dead-lettered to the log."""
+    for message in messages:
+        try:
+            write_messages([message])
+        except Exception:
+            logger.exception("Dead-lettered chat message: %s", json.dumps({
+                "id": message.id,
+                "chat_id": message.chat_id,
+                "sender_id": message.sender_id,
+                "text": message.text,
+                "media": str(message.media) if message.media else None,
+                "media_type": message.media_type,
+                "timestamp": message.timestamp.isoformat(),
+            }))
+
+
+message_buffer = MessageBuffer()
+atexit.register(message_buffer.flush_sync)
@@ -13,6 +13,7 @@ from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import notifications.routing
 import chat.routing  # Import chat routing
+from authentication.middleware import JWTAuthMiddleware
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'classsphere.settings')
 
@@ -25,6 +26,8 @@ combined_websocket_urlpatterns = (
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),  # Handles HTTP requests
     "websocket": AuthMiddlewareStack(
-        URLRouter(combined_websocket_urlpatterns)  # Use combined patterns
+        JWTAuthMiddleware(  # Resolves the ?token= user once per connection
+            URLRouter(combined_websocket_urlpatterns)  # Use combined patterns
+        )
     ),
 })
\ No newline at end of file
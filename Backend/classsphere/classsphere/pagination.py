@@ -0,0 +1,57 @@
+import base64
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def encode_cursor(*values):
+    """Pack the keyset position into an opaque, URL-safe cursor."""
+    raw = "|".join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor, parts):
+    try:
+        values = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({"cursor": "Invalid cursor"})
+    if len(values) != parts:
+        raise ValidationError({"cursor": "Invalid cursor"})
+    return values
+
+
+def get_page_size(request, default=20, maximum=100):
+    try:
+        page_size = int(request.query_params.get("limit", default))
+    except ValueError:
+        raise ValidationError({"limit": "Limit must be an integer"})
+    return max(1, min(page_size, maximum))
+
+
+def keyset_paginate(queryset, request, field="created_at", default_page_size=20, max_page_size=100):
+    """
+    Newest-first keyset pagination on (field, id).
+
+    Returns the page of objects and the cursor for the next page (None on the last page).
+    Each page is a single index range scan, however deep the client has scrolled.
+    """
+    page_size = get_page_size(request, default_page_size, max_page_size)
+    queryset = queryset.order_by(f"-{field}", "-id")
+
+    cursor = request.query_params.get("cursor")
+    if cursor:
+        position, last_id = decode_cursor(cursor, 2)
+        position = parse_datetime(position)
+        if position is None or not last_id.isdigit():
+            raise ValidationError({"cursor": "Invalid cursor"})
+        queryset = queryset.filter(
+            Q(**{f"{field}__lt": position}) | Q(**{field: position, "id__lt": int(last_id)})
+        )
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, field).isoformat(), last.id)
+    return items, next_cursor
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import environ  # type: ignore
 from datetime import timedelta
+from celery.schedules import crontab  # type: ignore
 
 import cloudinary  # type: ignore
 import cloudinary.uploader  # type: ignore
@@ -97,6 +98,23 @@ CHANNEL_LAYERS = {
     },
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": f"redis://{env('REDIS_HOST')}:{env('REDIS_PORT')}/1",
+    }
+}
+
+# Presence heartbeat lifetime; clients heartbeat well inside this window
+PRESENCE_TTL_SECONDS = env.int("PRESENCE_TTL_SECONDS", default=60)
+
+# Chat messages received over WebSocket can be broadcast first and written in batches
+CHAT_WRITE_BEHIND = env.bool("CHAT_WRITE_BEHIND", default=False)
+CHAT_WRITE_BEHIND_BATCH_SIZE = env.int("CHAT_WRITE_BEHIND_BATCH_SIZE", default=100)
+CHAT_WRITE_BEHIND_INTERVAL_MS = env.int("CHAT_WRITE_BEHIND_INTERVAL_MS", default=500)
+# Failed flushes before a batch is written row by row and the failing rows are dead-lettered
+CHAT_WRITE_BEHIND_MAX_RETRIES = env.int("CHAT_WRITE_BEHIND_MAX_RETRIES", default=3)
+
 # Celery Configuration
 CELERY_BROKER_URL = env("CELERY_BROKER_URL")
 CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND")
@@ -107,6 +125,35 @@ CELERY_TIMEZONE = "Asia/Kolkata"  # Align with project TIME_ZONE
 CELERY_TASK_ACKS_LATE = True  # Allow tasks to be re-queued if worker fails
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True  # Retry connecting to broker on startup
 
+# Submission processing runs on its own queue so a deadline burst is drained by a fixed
+# number of workers (see celery-submissions in docker-compose.yml) without starving other tasks
+CELERY_TASK_ROUTES = {
+    "assignments.tasks.assemble_submission_upload_task": {"queue": "submissions"},
+}
+
+# Number of recipients inserted and published per notification delivery task
+NOTIFICATION_CHUNK_SIZE = env.int("NOTIFICATION_CHUNK_SIZE", default=500)
+
+# Window in which a batching notification socket coalesces events into one frame
+NOTIFICATION_BATCH_WINDOW_MS = env.int("NOTIFICATION_BATCH_WINDOW_MS", default=100)
+
+# Read notifications older than this are archived (or deleted) by the retention job
+NOTIFICATION_RETENTION_DAYS = env.int("NOTIFICATION_RETENTION_DAYS", default=90)
+NOTIFICATION_RETENTION_MODE = env("NOTIFICATION_RETENTION_MODE", default="archive")  # "archive" or "delete"
+NOTIFICATION_RETENTION_BATCH_SIZE = env.int("NOTIFICATION_RETENTION_BATCH_SIZE", default=1000)
+NOTIFICATION_RETENTION_MAX_BATCHES = env.int("NOTIFICATION_RETENTION_MAX_BATCHES", default=100)
+
+CELERY_BEAT_SCHEDULE = {
+    "notification-retention": {
+        "task": "notifications.tasks.archive_read_notifications_task",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "submission-upload-cleanup": {
+        "task": "assignments.tasks.purge_stale_submission_uploads_task",
+        "schedule": crontab(minute=30),
+    },
+}
+
 ASGI_APPLICATION = "classsphere.asgi.application"
 
 ROOT_URLCONF = "classsphere.urls"
@@ -281,6 +328,32 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Chat media is uploaded directly by the client; the backend signs and verifies the upload.
+# chat.storage.LocalUploadBackend keeps files under CHAT_MEDIA_LOCAL_ROOT for development/tests.
+CHAT_MEDIA_BACKEND = env("CHAT_MEDIA_BACKEND", default="chat.storage.CloudinaryUploadBackend")
+CHAT_MEDIA_LOCAL_ROOT = MEDIA_ROOT / "chat"
+CHAT_MEDIA_UPLOAD_TTL_SECONDS = env.int("CHAT_MEDIA_UPLOAD_TTL_SECONDS", default=15 * 60)
+
+# Uploaded material files wait here until the Celery worker pushes them to Cloudinary;
+# the web and worker processes must share this directory.
+MATERIAL_STAGING_ROOT = env("MATERIAL_STAGING_ROOT", default=str(BASE_DIR / "staging" / "materials"))
+
+# Chunked, resumable submission uploads: chunks are staged here and assembled by a Celery task
+SUBMISSION_UPLOAD_STAGING_ROOT = env("SUBMISSION_UPLOAD_STAGING_ROOT", default=str(BASE_DIR / "staging" / "submissions"))
+SUBMISSION_UPLOAD_CHUNK_SIZE = env.int("SUBMISSION_UPLOAD_CHUNK_SIZE", default=5 * 1024 * 1024)
+SUBMISSION_UPLOAD_MAX_BYTES = env.int("SUBMISSION_UPLOAD_MAX_BYTES", default=100 * 1024 * 1024)
+# Unfinished uploads older than this are purged with their staged chunks
+SUBMISSION_UPLOAD_EXPIRY_HOURS = env.int("SUBMISSION_UPLOAD_EXPIRY_HOURS", default=24)
+# Uploads stuck assembling this long are marked failed by the purge task
+SUBMISSION_UPLOAD_ASSEMBLY_TIMEOUT_MINUTES = env.int("SUBMISSION_UPLOAD_ASSEMBLY_TIMEOUT_MINUTES", default=60)
+
+# Streaming ZIP export of an assignment's submissions. assignments.exports.LocalSubmissionStorage
+# reads files from SUBMISSION_EXPORT_LOCAL_ROOT instead of Cloudinary for development/tests.
+SUBMISSION_EXPORT_STORAGE = env("SUBMISSION_EXPORT_STORAGE", default="assignments.exports.CloudinarySubmissionStorage")
+SUBMISSION_EXPORT_LOCAL_ROOT = MEDIA_ROOT / "submissions"
+SUBMISSION_EXPORT_CHUNK_SIZE = env.int("SUBMISSION_EXPORT_CHUNK_SIZE", default=64 * 1024)
+SUBMISSION_EXPORT_TOKEN_TTL_SECONDS = env.int("SUBMISSION_EXPORT_TOKEN_TTL_SECONDS", default=5 * 60)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
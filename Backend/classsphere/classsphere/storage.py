@@ -0,0 +1,39 @@
+from cloudinary import CloudinaryResource  # type: ignore
+from django.conf import settings
+from django.core import signing
+from django.utils.module_loading import import_string
+from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+
+
+def stored_name(file):
+    """Storage key of a file field value; CloudinaryField splits the extension off into .format."""
+    if isinstance(file, CloudinaryResource):
+        return f"{file.public_id}.{file.format}" if file.format else file.public_id
+    return str(file)
+
+
+def load_backend(setting_name):
+    """Instantiate the backend class whose dotted path is in the named setting."""
+    return import_string(getattr(settings, setting_name))()
+
+
+class SignedToken:
+    """Signs small payloads into URL-safe tokens that expire after the TTL in the named setting."""
+
+    def __init__(self, salt, ttl_setting):
+        self.salt = salt
+        self.ttl_setting = ttl_setting
+
+    def sign(self, **payload):
+        return signing.dumps(payload, salt=self.salt)
+
+    def load(self, token):
+        """Raises signing.BadSignature (or SignatureExpired) for tampered or stale tokens."""
+        return signing.loads(token, salt=self.salt, max_age=getattr(settings, self.ttl_setting))
+
+
+class SignedLinkView(APIView):
+    # The signed token in the URL is the credential, like a pre-signed storage URL
+    authentication_classes = []
+    permission_classes = [AllowAny]
@@ -0,0 +1,67 @@
+# exams/grading.py
+from operator import eq
+from django.db import transaction
+from .models import ExamSubmission
+
+
+class AnswerKey:
+    """
+    An exam's correct answers, built once and reused for every submission.
+
+    Submitted answers are a JSON object of {"<question id>": "<answer>"}, so the key keeps the
+    question ids as strings and compares a whole submission with a single map() over the key,
+    instead of looking each answer up and converting its id in Python.
+    """
+
+    def __init__(self, marks, correct_answers):
+        self.marks = marks
+        self.question_ids = tuple(str(question_id) for question_id in correct_answers)
+        self.answers = tuple(correct_answers.values())
+
+    @classmethod
+    def for_exam(cls, exam):
+        correct_answers = dict(exam.questions.order_by('id').values_list('id', 'correct_answer'))
+        return cls(exam.marks, correct_answers)
+
+    def correct_count(self, answers):
+        if not isinstance(answers, dict):
+            return 0
+        return sum(map(eq, map(answers.get, self.question_ids), self.answers))
+
+    def score(self, answers):
+        if not self.question_ids:
+            return 0
+        return round(self.correct_count(answers) * self.marks / len(self.question_ids))
+
+
+def grade_submission(exam, answers):
+    return AnswerKey.for_exam(exam).score(answers)
+
+
+def regrade_exam(exam, batch_size=1000):
+    """
+    Re-score every submission for an exam against its current answer key.
+
+    Only rows whose score changed are written, with one bulk_update per batch, all in a
+    single transaction. Returns (number of submissions graded, [(student_id, new score)]).
+    """
+    key = AnswerKey.for_exam(exam)
+    graded = 0
+    changed = []
+    batch = []
+    submissions = ExamSubmission.objects.filter(exam=exam).only('id', 'student_id', 'answers', 'score')
+    with transaction.atomic():
+        for submission in submissions.iterator(chunk_size=batch_size):
+            graded += 1
+            score = key.score(submission.answers)
+            if score == submission.score:
+                continue
+            submission.score = score
+            batch.append(submission)
+            changed.append((submission.student_id, score))
+            if len(batch) >= batch_size:
+                ExamSubmission.objects.bulk_update(batch, ['score'])
+                batch = []
+        if batch:
+            ExamSubmission.objects.bulk_update(batch, ['score'])
+    return graded, changed
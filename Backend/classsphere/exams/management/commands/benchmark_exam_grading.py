@@ -0,0 +1,108 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from authentication.models import User
+from classroom.models import Classroom
+from exams.grading import AnswerKey, regrade_exam
+from exams.models import Exam, Question, ExamSubmission
+
+
+class Rollback(Exception):
+    pass
+
+
+def legacy_score(exam, answers):
+    """The per-request grading loop ExamSubmissionView used before exams.grading."""
+    questions = {q.id: q.correct_answer for q in exam.questions.all()}
+    score = 0
+    total_questions = len(questions)
+    marks_per_question = exam.marks / total_questions if total_questions > 0 else 0
+    for q_index, student_answer in answers.items():
+        if int(q_index) in questions and student_answer == questions[int(q_index)]:
+            score += marks_per_question
+    return round(score)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark exam grading on synthetic submissions. All data is created inside a "
+        "transaction that is rolled back, so nothing is left in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--submissions", type=int, default=10000)
+        parser.add_argument("--questions", type=int, default=50)
+        parser.add_argument("--legacy-sample", type=int, default=500,
+                            help="Submissions graded with the old per-request loop (one query each)")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        rng = random.Random(options["seed"])
+        count, question_count = options["submissions"], options["questions"]
+        stamp = int(time.time())
+
+        teacher = User.objects.create(username=f"bench-teacher-{stamp}", email=f"bench-teacher-{stamp}@example.com", role="teacher")
+        classroom = Classroom.objects.create(
+            name="Grading benchmark", category="Benchmark", code=f"BENCH{stamp}"[:20], max_participants=count,
+            start_datetime=timezone.now(), end_datetime=timezone.now(), teacher=teacher,
+        )
+        exam = Exam.objects.create(
+            classroom=classroom, topic="Benchmark", description="", timeout="60", end_date=timezone.now().date(),
+            marks=100, created_by=teacher, published=True,
+        )
+        options_list = ["a", "b", "c", "d"]
+        questions = Question.objects.bulk_create([
+            Question(exam=exam, question_text=f"Q{i}", options=options_list, correct_answer=rng.choice(options_list))
+            for i in range(question_count)
+        ])
+        students = User.objects.bulk_create([
+            User(username=f"bench-{stamp}-{i}", email=f"bench-{stamp}-{i}@example.com", role="student", password="!")
+            for i in range(count)
+        ], batch_size=2000)
+        ExamSubmission.objects.bulk_create([
+            ExamSubmission(
+                student=student, exam=exam, score=None,
+                answers={str(q.id): rng.choice(options_list) for q in questions},
+            )
+            for student in students
+        ], batch_size=2000)
+        self.stdout.write(f"{count} submissions x {question_count} questions")
+
+        answers = list(ExamSubmission.objects.filter(exam=exam).values_list("answers", flat=True))
+        sample = answers[:options["legacy_sample"]]
+        started = time.perf_counter()
+        legacy = [legacy_score(exam, a) for a in sample]
+        self.report("legacy loop (incl. key query)", len(sample), time.perf_counter() - started)
+
+        started = time.perf_counter()
+        key = AnswerKey.for_exam(exam)
+        scores = [key.score(a) for a in answers]
+        self.report("answer key, in memory", count, time.perf_counter() - started)
+        if legacy != scores[:len(legacy)]:
+            self.stdout.write(self.style.WARNING("Scores differ from the legacy loop on the sample"))
+
+        started = time.perf_counter()
+        graded, changed = regrade_exam(exam)
+        self.report("regrade_exam, all rows scored", graded, time.perf_counter() - started)
+
+        # Fix one answer: about half the submissions gain or lose that question
+        question = questions[0]
+        question.correct_answer = next(o for o in options_list if o != question.correct_answer)
+        question.save(update_fields=["correct_answer"])
+        started = time.perf_counter()
+        graded, changed = regrade_exam(exam)
+        self.report(f"regrade_exam after a fix ({len(changed)} changed)", graded, time.perf_counter() - started)
+
+    def report(self, label, count, seconds):
+        rate = count / seconds if seconds else float("inf")
+        self.stdout.write(f"{label:<45} {count:>7} in {seconds:7.3f}s  {rate:>12,.0f} submissions/s")
@@ -1,3 +1,74 @@
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import User
+from classroom.models import Classroom, Student
+from .grading import AnswerKey
+from .models import Exam, Question, ExamSubmission
 
-# Create your tests here.
+
+class ExamGradingTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass", role="teacher"
+        )
+        self.classroom = Classroom.objects.create(
+            name="Maths", category="Science", code="MATH01", max_participants=50,
+            start_datetime=timezone.now(), end_datetime=timezone.now() + timezone.timedelta(days=30),
+            teacher=self.teacher,
+        )
+        self.exam = Exam.objects.create(
+            classroom=self.classroom, topic="Algebra", description="", timeout="30",
+            end_date=timezone.now().date(), marks=10, created_by=self.teacher, published=True,
+        )
+        self.questions = [
+            Question.objects.create(exam=self.exam, question_text=f"Q{i}", options=["a", "b", "c"], correct_answer="a")
+            for i in range(4)
+        ]
+        self.students = []
+        for index in range(2):
+            user = User.objects.create_user(
+                username=f"student{index}", email=f"student{index}@example.com", password="pass", role="student"
+            )
+            Student.objects.create(user=user).joined_classes.add(self.classroom)
+            self.students.append(user)
+        self.client = APIClient()
+
+    def answers(self, *choices):
+        return {str(q.id): choice for q, choice in zip(self.questions, choices)}
+
+    def test_answer_key_scores_like_the_submit_view(self):
+        key = AnswerKey.for_exam(self.exam)
+        self.assertEqual(key.score(self.answers("a", "a", "a", "a")), 10)
+        self.assertEqual(key.score(self.answers("a", "b", "a")), 5)
+        self.assertEqual(key.score({"999": "a", "junk": "a"}), 0)
+        self.assertEqual(key.score(None), 0)
+
+        self.client.force_authenticate(self.students[0])
+        response = self.client.post(
+            f"/api/exams/{self.exam.id}/submit/", {"answers": self.answers("a", "a", "b", "c")}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["score"], 5)
+
+    def test_regrade_applies_corrections_and_rescores_in_bulk(self):
+        ExamSubmission.objects.create(student=self.students[0], exam=self.exam, answers=self.answers("b", "a", "a", "a"), score=8)
+        ExamSubmission.objects.create(student=self.students[1], exam=self.exam, answers=self.answers("a", "a", "a", "a"), score=10)
+        self.client.force_authenticate(self.teacher)
+        url = f"/api/exams/{self.exam.id}/regrade/"
+
+        response = self.client.post(url, {"corrections": {str(self.questions[0].id): "z"}}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+        # exam, corrected questions, answer key, submissions, one UPDATE each for questions
+        # and scores, plus savepoints; independent of the number of submissions
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(10):
+            response = self.client.post(url, {"corrections": {str(self.questions[0].id): "b"}}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"graded": 2, "changed": 2})
+        scores = dict(ExamSubmission.objects.values_list("student_id", "score"))
+        self.assertEqual(scores, {self.students[0].id: 10, self.students[1].id: 8})
+
+        self.client.force_authenticate(self.students[0])
+        self.assertEqual(self.client.post(url).status_code, 403)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ExamListCreateView, ExamDetailView, ExamSubmissionView,StudentExamSubmissionsView,TeacherExamSubmissionsView,PublishExamView
+from .views import ExamListCreateView, ExamDetailView, ExamSubmissionView,StudentExamSubmissionsView,TeacherExamSubmissionsView,PublishExamView,ExamRegradeView
 
 urlpatterns = [
     path('classrooms/<slug:slug>/exams/', ExamListCreateView.as_view(), name='exam-list-create'),
@@ -8,5 +8,6 @@ urlpatterns = [
     path('classrooms/<slug:slug>/submissions/', StudentExamSubmissionsView.as_view(), name='student-submissions'),
     path('exams/<int:exam_id>/submissions/', TeacherExamSubmissionsView.as_view(), name='teacher-exam-submissions'),
     path('exams/<int:exam_id>/publish/', PublishExamView.as_view(), name='exam-publish'),
+    path('exams/<int:exam_id>/regrade/', ExamRegradeView.as_view(), name='exam-regrade'),
 
 ]
@@ -3,8 +3,10 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from .models import Exam, Question, ExamSubmission
 from .serializers import ExamSerializer, ExamSubmissionSerializer
+from .grading import grade_submission, regrade_exam
 from classroom.models import Classroom,Student
-from notifications.utils import create_notification
+from django.db import transaction
+from notifications.utils import notify_user, notify_classroom, notify_each
 
 
 class ExamListCreateView(APIView):
@@ -43,19 +45,13 @@ class ExamListCreateView(APIView):
                 exam = serializer.save()
                 
                 teacher_message = f"New Exam '{exam.topic}' successfully added to {classroom.name}"
-                create_notification(
+                notify_user(
                     user= request.user,
                     message=teacher_message,
                     notification_type='SUCCESS'
                 )
-                students = Student.objects.select_related('user').filter(joined_classes=classroom)
                 student_message = f"New Exam '{exam.topic}' added to {classroom.name}"
-                for student in students:
-                    create_notification(
-                        user=student.user,
-                        message=student_message,
-                        notification_type='INFO'
-                    )
+                notify_classroom(classroom, student_message, notification_type='INFO')
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Classroom.DoesNotExist:
@@ -132,20 +128,14 @@ class PublishExamView(APIView):
             exam.save()
 
             teacher_message = f"Exam '{exam.topic}' has been successfully published."
-            create_notification(
+            notify_user(
                 user=request.user,
                 message=teacher_message,
                 notification_type='SUCCESS'
             )
 
-            students = Student.objects.select_related('user').filter(joined_classes=exam.classroom)
             student_message = f"New Exam '{exam.topic}' is now published in {exam.classroom.name}."
-            for student in students:
-                create_notification(
-                    user=student.user,
-                    message=student_message,
-                    notification_type='INFO'
-                )
+            notify_classroom(exam.classroom, student_message, notification_type='INFO')
 
             return Response(
                 {"message": "Exam published successfully"},
@@ -182,18 +172,7 @@ class ExamSubmissionView(APIView):
             data['student'] = request.user.id
             data['exam'] = exam.id
 
-            # Calculate score
-            answers = data.get('answers', {})
-            questions = {q.id: q.correct_answer for q in exam.questions.all()}
-            score = 0
-            total_questions = len(questions)
-            marks_per_question = exam.marks / total_questions if total_questions > 0 else 0
-
-            for q_index, student_answer in answers.items():
-                if int(q_index) in questions and student_answer == questions[int(q_index)]:
-                    score += marks_per_question
-
-            data['score'] = round(score)
+            data['score'] = grade_submission(exam, data.get('answers', {}))
 
             serializer = ExamSubmissionSerializer(data=data)
             if serializer.is_valid():
@@ -201,7 +180,7 @@ class ExamSubmissionView(APIView):
                 
                 # Notify Teacher
                 teacher_message = f"{request.user.username} submitted exam '{exam.topic}' in {exam.classroom.name}"
-                create_notification(
+                notify_user(
                     user=exam.classroom.teacher,
                     message=teacher_message,
                     notification_type='INFO'
@@ -241,4 +220,50 @@ class TeacherExamSubmissionsView(APIView):
             serializer = ExamSubmissionSerializer(submissions, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Exam.DoesNotExist:
-            return Response({"error": "Exam not found"}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            return Response({"error": "Exam not found"}, status=status.HTTP_404_NOT_FOUND)
+
+
+class ExamRegradeView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, exam_id):
+        """
+        Re-score every submission against the current answer key.
+
+        Optional body: {"corrections": {"<question id>": "<correct answer>"}} fixes answers
+        first; this is allowed on published exams, unlike a full edit.
+        """
+        try:
+            exam = Exam.objects.get(id=exam_id)
+        except Exam.DoesNotExist:
+            return Response({"error": "Exam not found"}, status=status.HTTP_404_NOT_FOUND)
+        if request.user.id != exam.created_by_id:
+            return Response({"error": "Only the exam creator can regrade it"}, status=status.HTTP_403_FORBIDDEN)
+
+        corrections = request.data.get('corrections', {})
+        if not isinstance(corrections, dict):
+            return Response({"error": "corrections must map question ids to answers"}, status=status.HTTP_400_BAD_REQUEST)
+        questions = {str(q.id): q for q in exam.questions.filter(id__in=[k for k in corrections if str(k).isdigit()])}
+        invalid = [
+            question_id for question_id, answer in corrections.items()
+            if str(question_id) not in questions or answer not in questions[str(question_id)].options
+        ]
+        if invalid:
+            return Response(
+                {"error": "Each correction must name a question of this exam and one of its options", "invalid": invalid},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            for question_id, answer in corrections.items():
+                questions[str(question_id)].correct_answer = answer
+            Question.objects.bulk_update(questions.values(), ['correct_answer'])
+            graded, changed = regrade_exam(exam)
+
+        if changed:
+            transaction.on_commit(lambda: notify_each(
+                [(student_id, f"Your score for exam '{exam.topic}' was updated to {score}/{exam.marks}")
+                 for student_id, score in changed],
+                notification_type='INFO',
+            ))
+        return Response({"graded": graded, "changed": len(changed)}, status=status.HTTP_200_OK)
@@ -12,11 +12,28 @@ class Material(models.Model):
         ('video', 'Video'),
     )
 
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_READY, 'Ready'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
     classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='materials')
     teacher = models.ForeignKey(User, on_delete=models.CASCADE, related_name='materials')
     topic = models.CharField(max_length=255)
-    file = CloudinaryField('materials', resource_type='raw', folder="materials")
+    # Empty until the background upload finishes (see materials.tasks)
+    file = CloudinaryField('materials', resource_type='raw', folder="materials", blank=True, null=True)
     material_type = models.CharField(max_length=10, choices=MATERIAL_TYPES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_READY)
+    # Local copy of the upload waiting for the worker; cleared once processed
+    staged_path = models.CharField(max_length=500, blank=True, default='')
+    # State of the latest upload; a re-upload keeps `status` ready and the old file served until it finishes
+    upload_status = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Material
+from .utils import stage_material_upload
 
 class MaterialSerializer(serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
@@ -7,8 +8,8 @@ class MaterialSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Material
-        fields = ['id', 'classroom', 'teacher', 'topic', 'file', 'file_url', 'material_type', 'created_at']
-        read_only_fields = ['teacher', 'created_at', 'classroom']
+        fields = ['id', 'classroom', 'teacher', 'topic', 'file', 'file_url', 'material_type', 'status', 'upload_status', 'created_at']
+        read_only_fields = ['teacher', 'created_at', 'classroom', 'status', 'upload_status']
 
     def get_file_url(self, obj):
         if obj.file:
@@ -25,22 +26,22 @@ class MaterialSerializer(serializers.ModelSerializer):
         if not file and not self.instance:  
             raise serializers.ValidationError("File is required")
 
-        material = Material.objects.create(**validated_data)
-
-        if file:
-            material.file = file
-            material.save()
-
+        validated_data.pop('file', None)
+        # The Cloudinary upload happens in the background; the material starts out pending
+        # so students never see it before its file is stored
+        material = Material.objects.create(
+            **validated_data, status=Material.STATUS_PENDING, upload_status=Material.STATUS_PENDING
+        )
+        stage_material_upload(material, file, created=True)
         return material
 
     def update(self, instance, validated_data):
-        file = self.context.get('file')
+        file = validated_data.pop('file', None) or self.context.get('file')
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        if file:
-            instance.file = file
-
         instance.save()
-        return instance
\ No newline at end of file
+        if file:
+            stage_material_upload(instance, file, created=False)
+        return instance
@@ -0,0 +1,78 @@
+# materials/tasks.py
+import cloudinary.uploader  # type: ignore
+from celery import shared_task  # type: ignore
+from celery.utils.log import get_task_logger
+from django.db.models import Case, Value, When
+from notifications.utils import notify_user, notify_classroom
+from .models import Material
+from .utils import discard_staged_file
+
+logger = get_task_logger(__name__)
+
+# Cloudinary's chunked upload API; keeps memory flat for large videos
+UPLOAD_CHUNK_SIZE = 20 * 1024 * 1024
+
+
+@shared_task(bind=True, max_retries=3)
+def process_material_upload_task(self, material_id, staged_path, created=True):
+    """Uploads a staged material file to Cloudinary, then marks it ready and notifies the class."""
+    # Only the task for the most recent upload of this material may claim it
+    claimed = Material.objects.filter(
+        id=material_id,
+        staged_path=staged_path,
+        upload_status__in=[Material.STATUS_PENDING, Material.STATUS_PROCESSING],
+    ).update(
+        upload_status=Material.STATUS_PROCESSING,
+        # A material that is already published stays ready while its new file uploads
+        status=Case(
+            When(status=Material.STATUS_READY, then=Value(Material.STATUS_READY)),
+            default=Value(Material.STATUS_PROCESSING),
+        ),
+    )
+    if not claimed:
+        logger.info(f"Material {material_id} was deleted or superseded; dropping {staged_path}")
+        discard_staged_file(staged_path)
+        return
+
+    material = Material.objects.select_related('classroom', 'teacher').get(id=material_id)
+    try:
+        result = cloudinary.uploader.upload_large(
+            staged_path, resource_type='raw', folder='materials', chunk_size=UPLOAD_CHUNK_SIZE
+        )
+    except Exception as exc:
+        if self.request.retries < self.max_retries and not isinstance(exc, FileNotFoundError):
+            logger.warning(f"Upload of material {material_id} failed, retrying: {exc}")
+            raise self.retry(exc=exc, countdown=60)
+
+        logger.error(f"Upload of material {material_id} failed: {exc}")
+        # A failed re-upload keeps serving the previous file
+        Material.objects.filter(id=material_id, staged_path=staged_path).update(
+            status=Material.STATUS_READY if material.file else Material.STATUS_FAILED,
+            upload_status=Material.STATUS_FAILED,
+            staged_path='',
+        )
+        discard_staged_file(staged_path)
+        notify_user(
+            user=material.teacher,
+            message=f"Material '{material.topic}' could not be uploaded to {material.classroom.name}",
+            notification_type='ERROR'
+        )
+        return
+
+    updated = Material.objects.filter(id=material_id, staged_path=staged_path).update(
+        file=result['public_id'], status=Material.STATUS_READY, upload_status='', staged_path=''
+    )
+    discard_staged_file(staged_path)
+    if not updated:
+        # Deleted or re-uploaded while this upload was running
+        return
+
+    action = "added to" if created else "updated in"
+    notify_user(
+        user=material.teacher,
+        message=f"Material '{material.topic}' successfully {action} {material.classroom.name}",
+        notification_type='SUCCESS'
+    )
+    if created:
+        student_message = f"New {material.material_type} material '{material.topic}' added to {material.classroom.name}"
+        notify_classroom(material.classroom, student_message, notification_type='INFO')
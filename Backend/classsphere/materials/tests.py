@@ -1,3 +1,177 @@
-from django.test import TestCase
+import os
+import tempfile
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import User
+from classroom.models import Classroom, Student
+from .models import Material
+from .tasks import process_material_upload_task
+from .utils import stage_material_upload
 
-# Create your tests here.
+
+class MaterialUploadTests(TestCase):
+    def setUp(self):
+        staging = tempfile.TemporaryDirectory()
+        self.addCleanup(staging.cleanup)
+        settings_override = override_settings(MATERIAL_STAGING_ROOT=staging.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        upload_patch = mock.patch('materials.tasks.cloudinary.uploader.upload_large')
+        self.upload_large = upload_patch.start()
+        self.addCleanup(upload_patch.stop)
+
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass", role="teacher"
+        )
+        self.classroom = Classroom.objects.create(
+            name="Maths", category="Science", code="MATH01", max_participants=50,
+            start_datetime=timezone.now(), end_datetime=timezone.now() + timezone.timedelta(days=30),
+            teacher=self.teacher,
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@example.com", password="pass", role="student"
+        )
+        Student.objects.create(user=self.student).joined_classes.add(self.classroom)
+        self.url = f"/api/materials/{self.classroom.slug}/"
+        self.client = APIClient()
+
+    def published_material(self):
+        return Material.objects.create(
+            classroom=self.classroom, teacher=self.teacher, topic="Algebra",
+            material_type="pdf", file="materials/old",
+        )
+
+    def stage(self, material, created=False):
+        # Stage without running the on_commit enqueue so the task can be driven by hand
+        with self.captureOnCommitCallbacks():
+            stage_material_upload(material, SimpleUploadedFile("notes.pdf", b"new notes"), created=created)
+        material.refresh_from_db()
+        return material.staged_path
+
+    def test_new_material_is_hidden_until_uploaded(self):
+        self.upload_large.return_value = {"public_id": "materials/new"}
+        self.client.force_authenticate(self.teacher)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(self.url, {"topic": "Algebra", "file": SimpleUploadedFile("notes.pdf", b"notes")})
+        self.assertEqual(response.status_code, 201)
+        material = Material.objects.get(id=response.data["id"])
+        self.assertEqual(material.status, Material.STATUS_PENDING)
+
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get(self.url).data, [])
+
+        for callback in callbacks:
+            callback()
+        material.refresh_from_db()
+        self.assertEqual(material.status, Material.STATUS_READY)
+        self.assertEqual(material.upload_status, '')
+        self.assertEqual(str(material.file), "materials/new")
+        self.assertEqual(os.listdir(os.path.dirname(self.upload_large.call_args.args[0])), [])
+        self.assertEqual(len(self.client.get(self.url).data), 1)
+
+    def test_reupload_keeps_published_file_until_swapped(self):
+        self.upload_large.return_value = {"public_id": "materials/new"}
+        material = self.published_material()
+        detail_url = f"{self.url}{material.id}/"
+        self.client.force_authenticate(self.teacher)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.put(detail_url, {"topic": "Algebra", "file": SimpleUploadedFile("notes.pdf", b"new notes")})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], Material.STATUS_READY)
+        self.assertEqual(response.data["upload_status"], Material.STATUS_PENDING)
+
+        # Students keep seeing the old file while the new one uploads
+        self.client.force_authenticate(self.student)
+        response = self.client.get(detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("materials/old", response.data["file_url"])
+
+        for callback in callbacks:
+            callback()
+        material.refresh_from_db()
+        self.assertEqual(material.status, Material.STATUS_READY)
+        self.assertEqual(material.upload_status, '')
+        self.assertEqual(material.staged_path, '')
+        self.assertEqual(str(material.file), "materials/new")
+
+    def test_failed_reupload_keeps_serving_previous_file(self):
+        self.upload_large.side_effect = OSError("Cloudinary is down")
+        material = self.published_material()
+        staged_path = self.stage(material)
+
+        process_material_upload_task.apply(args=(material.id, staged_path, False), retries=3)
+
+        material.refresh_from_db()
+        self.assertEqual(material.status, Material.STATUS_READY)
+        self.assertEqual(material.upload_status, Material.STATUS_FAILED)
+        self.assertEqual(str(material.file), "materials/old")
+        self.assertFalse(os.path.exists(staged_path))
+
+    def test_failed_first_upload_marks_material_failed(self):
+        self.upload_large.side_effect = OSError("Cloudinary is down")
+        material = Material.objects.create(
+            classroom=self.classroom, teacher=self.teacher, topic="Algebra", material_type="pdf",
+        )
+        staged_path = self.stage(material, created=True)
+
+        process_material_upload_task.apply(args=(material.id, staged_path, True), retries=3)
+
+        material.refresh_from_db()
+        self.assertEqual(material.status, Material.STATUS_FAILED)
+        self.assertFalse(material.file)
+
+    def test_superseded_upload_is_dropped(self):
+        self.upload_large.return_value = {"public_id": "materials/newest"}
+        material = self.published_material()
+        stale_path = self.stage(material)
+        latest_path = self.stage(material)
+
+        process_material_upload_task.apply(args=(material.id, stale_path, False))
+        self.upload_large.assert_not_called()
+        self.assertFalse(os.path.exists(stale_path))
+        material.refresh_from_db()
+        self.assertEqual(material.upload_status, Material.STATUS_PENDING)
+        self.assertEqual(str(material.file), "materials/old")
+
+        process_material_upload_task.apply(args=(material.id, latest_path, False))
+        material.refresh_from_db()
+        self.assertEqual(str(material.file), "materials/newest")
+        self.assertEqual(material.upload_status, '')
+
+    def test_new_material_is_never_ready_without_a_file(self):
+        self.client.force_authenticate(self.teacher)
+        statuses = []
+
+        def stage(material, file, created):
+            # What a student could read while the file is still being written to disk
+            statuses.append(Material.objects.values_list("status", flat=True).get(id=material.id))
+            raise OSError("disk full")
+
+        with mock.patch("materials.serializers.stage_material_upload", side_effect=stage):
+            response = self.client.post(self.url, {"topic": "Algebra", "file": SimpleUploadedFile("notes.pdf", b"notes")})
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(statuses, [Material.STATUS_PENDING])
+
+    def test_staging_failure_marks_material_failed(self):
+        self.client.force_authenticate(self.teacher)
+        with mock.patch("materials.utils.open", side_effect=OSError("disk full"), create=True):
+            response = self.client.post(self.url, {"topic": "Algebra", "file": SimpleUploadedFile("notes.pdf", b"notes")})
+
+        self.assertEqual(response.status_code, 500)
+        material = Material.objects.get()
+        self.assertEqual((material.status, material.upload_status), (Material.STATUS_FAILED, Material.STATUS_FAILED))
+
+        published = self.published_material()
+        with mock.patch("materials.utils.open", side_effect=OSError("disk full"), create=True):
+            response = self.client.put(
+                f"{self.url}{published.id}/", {"topic": "Algebra", "file": SimpleUploadedFile("notes.pdf", b"new notes")}
+            )
+
+        self.assertEqual(response.status_code, 500)
+        published.refresh_from_db()
+        self.assertEqual((published.status, published.upload_status), (Material.STATUS_READY, Material.STATUS_FAILED))
+        self.assertEqual(str(published.file), "materials/old")
@@ -0,0 +1,56 @@
+# materials/utils.py
+import os
+import uuid
+from django.conf import settings
+from django.db import transaction
+from .models import Material
+
+
+def stage_material_upload(material, file, created=True):
+    """
+    Park the uploaded file on local disk and hand it to the upload task.
+
+    The request only pays for a local write; the Cloudinary upload runs in Celery
+    once the surrounding transaction commits.
+    """
+    from .tasks import process_material_upload_task
+
+    staged_path = os.path.join(settings.MATERIAL_STAGING_ROOT, f"{uuid.uuid4().hex}_{os.path.basename(file.name)}")
+    try:
+        os.makedirs(settings.MATERIAL_STAGING_ROOT, exist_ok=True)
+        with open(staged_path, 'wb') as destination:
+            for chunk in file.chunks():
+                destination.write(chunk)
+    except OSError:
+        discard_staged_file(staged_path)
+        mark_material_upload_failed(material)
+        raise
+
+    material.staged_path = staged_path
+    material.upload_status = Material.STATUS_PENDING
+    update_fields = ['staged_path', 'upload_status', 'updated_at']
+    if not material.file:
+        # Nothing to serve yet; a re-upload leaves the current file live until the task swaps it
+        material.status = Material.STATUS_PENDING
+        update_fields.append('status')
+    material.save(update_fields=update_fields)
+
+    transaction.on_commit(lambda: process_material_upload_task.delay(material.id, staged_path, created))
+
+
+def mark_material_upload_failed(material):
+    """A material with no file yet becomes failed; a published one keeps serving its current file."""
+    material.upload_status = Material.STATUS_FAILED
+    update_fields = ['upload_status', 'updated_at']
+    if not material.file:
+        material.status = Material.STATUS_FAILED
+        update_fields.append('status')
+    material.save(update_fields=update_fields)
+
+
+def discard_staged_file(path):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
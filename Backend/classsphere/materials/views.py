@@ -5,7 +5,6 @@ from rest_framework import status
 from .models import Material
 from .serializers import MaterialSerializer
 from classroom.models import Classroom,Student
-from notifications.utils import create_notification
 
 
 class MaterialListCreateView(APIView):
@@ -20,6 +19,9 @@ class MaterialListCreateView(APIView):
                 return Response({"error": "You do not have permission to view materials for this classroom"}, status=status.HTTP_403_FORBIDDEN)
                 
             materials = Material.objects.select_related('teacher').filter(classroom=classroom)
+            if request.user != classroom.teacher:
+                # Students only see materials whose upload has finished
+                materials = materials.filter(status=Material.STATUS_READY)
             serializer = MaterialSerializer(materials, many=True, context={'request': request})
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Classroom.DoesNotExist:
@@ -44,23 +46,12 @@ class MaterialListCreateView(APIView):
             serializer = MaterialSerializer(data=data, context={'request': request, 'file': file})
 
             if serializer.is_valid():
-                material = serializer.save(teacher=request.user, classroom=classroom)
-
-                teacher_message = f"Material '{material.topic}' successfully added to {classroom.name}"
-                create_notification(
-                    user=request.user,
-                    message=teacher_message,
-                    notification_type='SUCCESS'
-                )
-                students = Student.objects.select_related('user').filter(joined_classes=classroom)
-                student_message = f"New {material_type} material '{material.topic}' added to {classroom.name}"
-                for student in students:
-                    create_notification(
-                        user=student.user,
-                        message=student_message,
-                        notification_type='INFO'
-                    )
-
+                # The teacher and students are notified by the upload task once the file is ready
+                try:
+                    serializer.save(teacher=request.user, classroom=classroom)
+                except OSError:
+                    # stage_material_upload has already marked the material failed
+                    return Response({"error": "The file could not be stored, please try again"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
             
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -87,6 +78,8 @@ class MaterialDetailView(APIView):
         classroom = material.classroom
         if request.user != classroom.teacher and not Student.objects.filter(user=request.user, joined_classes=classroom).exists():
             return Response({"error": "You do not have permission to view this material"}, status=status.HTTP_403_FORBIDDEN)
+        if request.user != classroom.teacher and material.status != Material.STATUS_READY:
+            return Response({"error": "Material not found"}, status=status.HTTP_404_NOT_FOUND)
             
         serializer = MaterialSerializer(material, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -109,7 +102,10 @@ class MaterialDetailView(APIView):
         
         serializer = MaterialSerializer(material, data=data, context={'request': request}, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                serializer.save()
+            except OSError:
+                return Response({"error": "The file could not be stored, please try again"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -6,7 +6,7 @@ from .models import Meeting, MeetingParticipant
 from .serializers import MeetingSerializer
 from rest_framework.permissions import IsAuthenticated
 from classroom.models import Classroom,Student
-from notifications.utils import create_notification
+from notifications.utils import notify_user, notify_classroom
 
 class CreateMeetingView(APIView):
     permission_classes = [IsAuthenticated]
@@ -21,20 +21,14 @@ class CreateMeetingView(APIView):
             meeting = serializer.save()
 
             teacher_message = f"Meeting '{meeting.title}' successfully scheduled for {classroom.name}"
-            create_notification(
+            notify_user(
                 user=request.user,
                 message=teacher_message,
                 notification_type='SUCCESS'
             )
 
-            students = Student.objects.select_related('user').filter(joined_classes=classroom)
             student_message = f"New meeting '{meeting.title}' scheduled for {classroom.name}"
-            for student in students:
-                create_notification(
-                    user=student.user,
-                    message=student_message,
-                    notification_type='INFO'
-                )
+            notify_classroom(classroom, student_message, notification_type='INFO')
 
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         
@@ -1,58 +1,90 @@
 # notifications/consumers.py
+import asyncio
 import json
 import logging
 from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        # Get token from query string
-        query_string = self.scope['query_string'].decode()
-        query_params = parse_qs(query_string)
-        token = query_params.get('token', [None])[0]
+        query_params = parse_qs(self.scope['query_string'].decode())
 
-        if not token:
-            await self.close()
-            return
-
-        # Validate token and get user
-        user = await self.get_user_from_token(token)
+        # scope['user'] is resolved from the ?token= query param by JWTAuthMiddleware
+        user = self.scope.get('user')
         if not user or user.is_anonymous:
             await self.close()
             return
 
-        self.scope['user'] = user
         self.group_name = f"user_{self.scope['user'].id}"
-        logger.info(f"WebSocket connected for {self.group_name}")
+        # Opt-in: ?batch=1 coalesces notifications arriving within a short window into one array frame
+        self.batching = query_params.get('batch', ['0'])[0] in ('1', 'true')
+        self.pending = []
+        self.flush_task = None
+        logger.debug("WebSocket connected for %s", self.group_name)
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
+        # The notification socket stays open app-wide, so it is the main presence signal
+        from chat.presence import mark_connected
+        await mark_connected(user.id)
+
     async def disconnect(self, close_code):
         if hasattr(self, 'group_name'):
-            logger.info(f"WebSocket disconnected for {self.group_name}")
+            if self.flush_task:
+                self.flush_task.cancel()
+            from chat.presence import mark_disconnected
+            await mark_disconnected(self.scope['user'].id)
+            logger.debug("WebSocket disconnected for %s", self.group_name)
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
+    async def receive(self, text_data):
+        try:
+            data = json.loads(text_data)
+        except ValueError:
+            return
+        if isinstance(data, dict) and data.get('type') == 'heartbeat':
+            from chat.presence import heartbeat
+            await heartbeat(self.scope['user'].id)
+
     async def send_notification(self, event):
-        logger.info(f"Sending notification to {self.group_name}: {event['id']}")
-        await self.send(text_data=json.dumps({
+        payload = {
             'id': event['id'],
             'message': event['message'],
             'notification_type': event['notification_type'],
             'time_ago': event['time_ago'],
             'is_read': event['is_read'],
-        }))
+        }
+        if not self.batching:
+            await self.send(text_data=json.dumps(payload))
+            return
 
-    @database_sync_to_async
-    def get_user_from_token(self, token):
-        from rest_framework_simplejwt.tokens import AccessToken
-        from authentication.models import User
-        try:
-            access_token = AccessToken(token)
-            user_id = access_token['user_id']
-            return User.objects.get(id=user_id)
-        except Exception as e:
-            logger.error(f"Token validation error in NotificationConsumer: {e}")
-            return None
\ No newline at end of file
+        self.pending.append(payload)
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_after_window())
+
+    async def flush_after_window(self):
+        await asyncio.sleep(settings.NOTIFICATION_BATCH_WINDOW_MS / 1000)
+        self.flush_task = None
+        await self.flush_pending()
+
+    async def flush_pending(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        await self.send(text_data=json.dumps(batch))
+
+    async def notifications_read(self, event):
+        # Keep ordering: anything already queued goes out before the read watermark
+        if self.batching:
+            if self.flush_task:
+                self.flush_task.cancel()
+                self.flush_task = None
+            await self.flush_pending()
+        await self.send(text_data=json.dumps({
+            'event': 'read',
+            'ids': event['ids'],
+            'up_to': event['up_to'],
+        }))
@@ -18,7 +18,28 @@ class Notification(models.Model):
     )
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_read_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_feed_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.message}"
\ No newline at end of file
+        return f"{self.user.username} - {self.message}"
+
+
+class ArchivedNotification(models.Model):
+    """Compact copy of a read notification moved out of the live table by the retention job."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="archived_notifications")
+    message = models.CharField(max_length=255)
+    type = models.CharField(max_length=50)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='archived_notif_user_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.message}"
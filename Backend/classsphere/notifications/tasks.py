@@ -0,0 +1,126 @@
+# notifications/tasks.py
+import time
+from datetime import timedelta
+from celery import shared_task # type: ignore
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from classroom.models import Student
+from .models import Notification, ArchivedNotification
+from .utils import bulk_create_notifications, bulk_create_personal_notifications, publish_notifications
+
+logger = get_task_logger(__name__)
+
+RETENTION_MODES = ("archive", "delete")
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@shared_task
+def deliver_classroom_notifications_task(classroom_id, message, notification_type='INFO'):
+    """Resolves the students of a classroom and fans the notification out in chunks."""
+    user_ids = list(
+        Student.objects.filter(joined_classes__id=classroom_id).values_list('user_id', flat=True)
+    )
+    for chunk in _chunks(user_ids, settings.NOTIFICATION_CHUNK_SIZE):
+        deliver_notifications_task.delay(chunk, message, notification_type)
+    logger.info(f"Queued notification for {len(user_ids)} students of classroom {classroom_id}")
+
+
+@shared_task(bind=True, max_retries=3)
+def deliver_notifications_task(self, user_ids, message, notification_type='INFO'):
+    """Bulk-inserts one chunk of notifications and publishes them to the channel layer."""
+    chunk_size = settings.NOTIFICATION_CHUNK_SIZE
+    if len(user_ids) > chunk_size:
+        for chunk in _chunks(user_ids, chunk_size):
+            deliver_notifications_task.delay(chunk, message, notification_type)
+        return
+
+    try:
+        # Atomic so a retried chunk never leaves half of its rows behind
+        with transaction.atomic():
+            notifications = bulk_create_notifications(user_ids, message, notification_type)
+    except Exception as exc:
+        logger.error(f"Failed to store notifications for {len(user_ids)} users: {exc}")
+        raise self.retry(exc=exc, countdown=30)
+
+    # Rows are already committed, so a failed push is not retried (it would duplicate them);
+    # clients still see the notifications on their next fetch.
+    try:
+        publish_notifications(notifications)
+    except Exception as exc:
+        logger.warning(f"Failed to publish {len(notifications)} notifications: {exc}")
+
+
+@shared_task(bind=True, max_retries=3)
+def deliver_personal_notifications_task(self, messages_by_user, notification_type='INFO'):
+    """Same as deliver_notifications_task for per-user messages given as [user_id, message] pairs."""
+    chunk_size = settings.NOTIFICATION_CHUNK_SIZE
+    if len(messages_by_user) > chunk_size:
+        for chunk in _chunks(messages_by_user, chunk_size):
+            deliver_personal_notifications_task.delay(chunk, notification_type)
+        return
+
+    try:
+        with transaction.atomic():
+            notifications = bulk_create_personal_notifications(messages_by_user, notification_type)
+    except Exception as exc:
+        logger.error(f"Failed to store notifications for {len(messages_by_user)} users: {exc}")
+        raise self.retry(exc=exc, countdown=30)
+
+    try:
+        publish_notifications(notifications)
+    except Exception as exc:
+        logger.warning(f"Failed to publish {len(notifications)} notifications: {exc}")
+
+
+@shared_task
+def archive_read_notifications_task():
+    """Moves (or deletes) read notifications past the retention age in bounded batches."""
+    mode = settings.NOTIFICATION_RETENTION_MODE
+    if mode not in RETENTION_MODES:
+        # Never fall through to deleting rows on a typo
+        raise ImproperlyConfigured(f"NOTIFICATION_RETENTION_MODE must be 'archive' or 'delete', not {mode!r}")
+    started = time.monotonic()
+    cutoff = timezone.now() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    archive = mode == "archive"
+    batch_size = settings.NOTIFICATION_RETENTION_BATCH_SIZE
+
+    expired = Notification.objects.filter(is_read=True, created_at__lt=cutoff).order_by('id')
+    processed = 0
+    batches = 0
+    while batches < settings.NOTIFICATION_RETENTION_MAX_BATCHES:
+        rows = list(expired.values('id', 'user_id', 'message', 'type', 'created_at')[:batch_size])
+        if not rows:
+            break
+        with transaction.atomic():
+            if archive:
+                ArchivedNotification.objects.bulk_create([
+                    ArchivedNotification(
+                        user_id=row['user_id'],
+                        message=row['message'],
+                        type=row['type'],
+                        created_at=row['created_at'],
+                    )
+                    for row in rows
+                ])
+            Notification.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        processed += len(rows)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+
+    metrics = {
+        'mode': mode,
+        'moved': processed if archive else 0,
+        'deleted': 0 if archive else processed,
+        'batches': batches,
+        'duration_seconds': round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Notification retention run: {metrics}")
+    return metrics
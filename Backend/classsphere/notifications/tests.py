@@ -1,3 +1,222 @@
-from django.test import TestCase
+from unittest import mock
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from authentication.models import User
+from classroom.models import Classroom, Student
+from .models import ArchivedNotification, Notification
+from .tasks import (
+    archive_read_notifications_task, deliver_classroom_notifications_task, deliver_notifications_task,
+)
+from .utils import bulk_create_notifications, get_unread_count, notify_classroom, notify_user
+from .views import NotificationBulkReadView
 
-# Create your tests here.
+
+class NotificationDeliveryTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass", role="teacher"
+        )
+        self.classroom = Classroom.objects.create(
+            name="Maths", category="Science", code="MATH01", max_participants=50,
+            start_datetime=timezone.now(), end_datetime=timezone.now() + timezone.timedelta(days=30),
+            teacher=self.teacher,
+        )
+        self.students = []
+        for index in range(5):
+            user = User.objects.create_user(
+                username=f"student{index}", email=f"student{index}@example.com", password="pass", role="student"
+            )
+            Student.objects.create(user=user).joined_classes.add(self.classroom)
+            self.students.append(user)
+
+    def test_notifications_are_queued_only_after_commit(self):
+        with mock.patch("notifications.tasks.deliver_notifications_task.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                notify_user(self.teacher, "Hello")
+                delay.assert_not_called()
+        delay.assert_called_once_with([self.teacher.id], "Hello", "INFO")
+
+    def test_broker_outage_is_logged_not_raised(self):
+        with mock.patch("notifications.tasks.deliver_classroom_notifications_task.delay", side_effect=OSError("broker down")):
+            with self.assertLogs("notifications.utils", level="ERROR"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    notify_classroom(self.classroom, "New assignment")
+        self.assertFalse(Notification.objects.exists())
+
+    @override_settings(NOTIFICATION_CHUNK_SIZE=2)
+    def test_classroom_fan_out_is_chunked(self):
+        with mock.patch("notifications.tasks.bulk_create_notifications", wraps=bulk_create_notifications) as create:
+            deliver_classroom_notifications_task(self.classroom.id, "New assignment")
+
+        self.assertEqual([len(call.args[0]) for call in create.call_args_list], [2, 2, 1])
+        self.assertEqual(
+            sorted(Notification.objects.values_list("user_id", flat=True)),
+            sorted(student.id for student in self.students),
+        )
+
+    @override_settings(NOTIFICATION_CHUNK_SIZE=2)
+    def test_oversized_chunk_is_split(self):
+        user_ids = [student.id for student in self.students]
+        with mock.patch("notifications.tasks.bulk_create_notifications", wraps=bulk_create_notifications) as create:
+            deliver_notifications_task(user_ids, "Reminder")
+
+        self.assertEqual([len(call.args[0]) for call in create.call_args_list], [2, 2, 1])
+        self.assertEqual(Notification.objects.count(), 5)
+
+    def test_failed_insert_is_retried_without_duplicates(self):
+        user_ids = [student.id for student in self.students]
+        attempts = []
+
+        def flaky_insert(*args):
+            attempts.append(args)
+            if len(attempts) == 1:
+                raise DatabaseError("database is locked")
+            return bulk_create_notifications(*args)
+
+        # Without throw=False eager Celery raises Retry instead of running the retry
+        with mock.patch("notifications.tasks.bulk_create_notifications", side_effect=flaky_insert):
+            deliver_notifications_task.apply(args=(user_ids, "Reminder"), throw=False)
+
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(Notification.objects.count(), 5)
+
+    def test_failed_insert_gives_up_after_max_retries(self):
+        with mock.patch("notifications.tasks.bulk_create_notifications", side_effect=DatabaseError("database is locked")):
+            with self.assertRaises(DatabaseError):
+                deliver_notifications_task.apply(args=([self.teacher.id], "Reminder"), retries=3)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_failed_publish_keeps_rows_and_is_not_retried(self):
+        with mock.patch("notifications.tasks.publish_notifications", side_effect=OSError("channel layer down")) as publish:
+            deliver_notifications_task.apply(args=([self.teacher.id], "Reminder"))
+
+        publish.assert_called_once()
+        self.assertEqual(Notification.objects.filter(user=self.teacher).count(), 1)
+
+
+class NotificationBulkReadTests(TestCase):
+    url = "/api/notifications/mark-as-read/"
+
+    def setUp(self):
+        # Unread counters are cached per user id, and ids are reused between tests
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="student", email="student@example.com", password="pass", role="student"
+        )
+        other = User.objects.create_user(
+            username="other", email="other@example.com", password="pass", role="student"
+        )
+        self.notifications = [
+            Notification.objects.create(user=self.user, message=f"Notice {index}") for index in range(5)
+        ]
+        self.foreign = Notification.objects.create(user=other, message="Not yours")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        channel_layer = mock.Mock()
+        channel_layer.group_send = mock.AsyncMock()
+        layer_patch = mock.patch("notifications.utils.get_channel_layer", return_value=channel_layer)
+        layer_patch.start()
+        self.addCleanup(layer_patch.stop)
+        self.group_send = channel_layer.group_send
+
+    def unread_ids(self):
+        return list(Notification.objects.filter(user=self.user, is_read=False).order_by("id").values_list("id", flat=True))
+
+    def test_marks_listed_ids_and_adjusts_unread_count(self):
+        self.assertEqual(get_unread_count(self.user.id), 5)
+        first, second = self.notifications[0].id, self.notifications[1].id
+
+        response = self.client.post(self.url, {"ids": [first, second, self.foreign.id]}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"updated": 2, "unread_count": 3})
+        self.assertEqual(self.unread_ids(), [n.id for n in self.notifications[2:]])
+        self.assertFalse(Notification.objects.get(id=self.foreign.id).is_read)
+        self.group_send.assert_awaited_once_with(
+            f"user_{self.user.id}", {"type": "notifications_read", "ids": [first, second, self.foreign.id], "up_to": None}
+        )
+
+    def test_marks_everything_up_to_watermark(self):
+        self.assertEqual(get_unread_count(self.user.id), 5)
+        watermark = self.notifications[2].id
+
+        response = self.client.post(self.url, {"up_to": watermark}, format="json")
+
+        self.assertEqual(response.data, {"updated": 3, "unread_count": 2})
+        self.assertEqual(self.unread_ids(), [n.id for n in self.notifications[3:]])
+        self.group_send.assert_awaited_once_with(
+            f"user_{self.user.id}", {"type": "notifications_read", "ids": None, "up_to": watermark}
+        )
+
+        # Nothing left to mark below the watermark: no update and no broadcast
+        self.group_send.reset_mock()
+        response = self.client.post(self.url, {"up_to": watermark}, format="json")
+        self.assertEqual(response.data, {"updated": 0, "unread_count": 2})
+        self.group_send.assert_not_awaited()
+
+    def test_rejects_bad_input(self):
+        for payload in (
+            {},
+            {"ids": "1,2"},
+            {"ids": ["one"]},
+            {"up_to": "latest"},
+            {"ids": list(range(NotificationBulkReadView.MAX_IDS + 1))},
+        ):
+            response = self.client.post(self.url, payload, format="json")
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertEqual(len(self.unread_ids()), 5)
+        self.group_send.assert_not_awaited()
+
+
+@override_settings(NOTIFICATION_RETENTION_DAYS=30, NOTIFICATION_RETENTION_BATCH_SIZE=2, NOTIFICATION_RETENTION_MAX_BATCHES=2)
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="student", email="student@example.com", password="pass", role="student"
+        )
+        old = timezone.now() - timezone.timedelta(days=31)
+        self.expired = []
+        for index in range(5):
+            notification = Notification.objects.create(user=self.user, message=f"Old {index}", is_read=True)
+            self.expired.append(notification.id)
+        self.unread = Notification.objects.create(user=self.user, message="Old unread").id
+        self.recent = Notification.objects.create(user=self.user, message="Recent", is_read=True).id
+        # created_at is auto_now_add, so backdate with an UPDATE
+        Notification.objects.filter(id__in=self.expired + [self.unread]).update(created_at=old)
+
+    def remaining(self):
+        return set(Notification.objects.values_list("id", flat=True))
+
+    def test_archive_moves_expired_rows_in_capped_batches(self):
+        with override_settings(NOTIFICATION_RETENTION_MODE="archive"):
+            metrics = archive_read_notifications_task()
+            self.assertEqual((metrics["moved"], metrics["deleted"], metrics["batches"]), (4, 0, 2))
+            self.assertEqual(self.remaining(), {self.expired[4], self.unread, self.recent})
+
+            metrics = archive_read_notifications_task()
+            self.assertEqual((metrics["moved"], metrics["batches"]), (1, 1))
+
+        self.assertEqual(self.remaining(), {self.unread, self.recent})
+        self.assertEqual(
+            sorted(ArchivedNotification.objects.values_list("message", flat=True)), [f"Old {index}" for index in range(5)]
+        )
+
+    def test_delete_mode_drops_expired_rows(self):
+        with override_settings(NOTIFICATION_RETENTION_MODE="delete", NOTIFICATION_RETENTION_MAX_BATCHES=10):
+            metrics = archive_read_notifications_task()
+
+        self.assertEqual((metrics["moved"], metrics["deleted"], metrics["batches"]), (0, 5, 3))
+        self.assertEqual(self.remaining(), {self.unread, self.recent})
+        self.assertFalse(ArchivedNotification.objects.exists())
+
+    def test_unknown_mode_is_rejected(self):
+        for mode in ("archived", "Archive", ""):
+            with override_settings(NOTIFICATION_RETENTION_MODE=mode):
+                with self.assertRaises(ImproperlyConfigured):
+                    archive_read_notifications_task()
+        self.assertEqual(len(self.remaining()), 7)
@@ -2,11 +2,15 @@ from django.urls import path
 from .views import (
     NotificationListView,
     NotificationDetailView,
-    NotificationClearView
+    NotificationBulkReadView,
+    NotificationClearView,
+    NotificationUnreadCountView
 )
 
 urlpatterns = [
     path('notifications/', NotificationListView.as_view(), name='notification-list'),
     path('notifications/<int:pk>/mark-as-read/', NotificationDetailView.as_view(), name='notification-mark-read'),
+    path('notifications/mark-as-read/', NotificationBulkReadView.as_view(), name='notification-bulk-mark-read'),
     path('notifications/clear/', NotificationClearView.as_view(), name='notification-clear'),
+    path('notifications/unread-count/', NotificationUnreadCountView.as_view(), name='notification-unread-count'),
 ]
\ No newline at end of file
@@ -1,6 +1,14 @@
+import asyncio
+import logging
 from .models import Notification
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import transaction
+
+UNREAD_COUNT_TIMEOUT = 60 * 60
+
+logger = logging.getLogger(__name__)
 
 def create_notification(user, message, notification_type='INFO'):
     try:
@@ -10,6 +18,8 @@ def create_notification(user, message, notification_type='INFO'):
             type=notification_type
         )
 
+        adjust_unread_count(user.id, 1)
+
         # Send real-time notification via WebSocket
         channel_layer = get_channel_layer()
         group_name = f"user_{user.id}"
@@ -26,6 +36,148 @@ def create_notification(user, message, notification_type='INFO'):
         )
 
         return notification
-    except Exception as e:
-        print(f"Error creating notification: {str(e)}")
-        return None
\ No newline at end of file
+    except Exception:
+        logger.exception("Error creating notification for user %s", user.id)
+        return None
+
+
+def _enqueue(task, *args):
+    """
+    Queue a delivery task once the caller's transaction commits. A broker outage is logged,
+    not raised, so it never turns an already-saved write into an error response.
+    """
+    def send():
+        try:
+            task.delay(*args)
+        except Exception:
+            logger.exception("Error queueing %s", task.name)
+    transaction.on_commit(send)
+
+
+def notify_user(user, message, notification_type='INFO'):
+    """Queue a notification for a single user."""
+    notify_users([user.id], message, notification_type)
+
+
+def notify_users(user_ids, message, notification_type='INFO'):
+    """Queue one delivery task for the same notification sent to many users."""
+    from .tasks import deliver_notifications_task
+    _enqueue(deliver_notifications_task, list(user_ids), message, notification_type)
+
+
+def notify_each(messages_by_user, notification_type='INFO'):
+    """Queue one delivery task for notifications whose text differs per user: [(user_id, message), ...]."""
+    from .tasks import deliver_personal_notifications_task
+    _enqueue(
+        deliver_personal_notifications_task,
+        [[user_id, message] for user_id, message in messages_by_user],
+        notification_type,
+    )
+
+
+def notify_classroom(classroom, message, notification_type='INFO'):
+    """Queue one delivery task for every student enrolled in the classroom."""
+    from .tasks import deliver_classroom_notifications_task
+    _enqueue(deliver_classroom_notifications_task, classroom.id, message, notification_type)
+
+
+def bulk_create_notifications(user_ids, message, notification_type='INFO'):
+    """Insert the same notification for many users with a single INSERT."""
+    return bulk_create_personal_notifications(
+        [(user_id, message) for user_id in user_ids], notification_type
+    )
+
+
+def bulk_create_personal_notifications(messages_by_user, notification_type='INFO'):
+    """Insert one notification per (user_id, message) pair with a single INSERT."""
+    notifications = Notification.objects.bulk_create([
+        Notification(user_id=user_id, message=message, type=notification_type)
+        for user_id, message in messages_by_user
+    ])
+    user_ids = [user_id for user_id, _ in messages_by_user]
+    # One round trip; the counters are rebuilt lazily on the next read
+    transaction.on_commit(lambda: invalidate_unread_counts(user_ids))
+    return notifications
+
+
+def _unread_count_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def get_unread_count(user_id):
+    """Cached unread counter, recounted from the (user, is_read) index on a miss."""
+    key = _unread_count_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, is_read=False).count()
+        cache.set(key, count, UNREAD_COUNT_TIMEOUT)
+    return count
+
+
+def adjust_unread_count(user_id, delta):
+    try:
+        cache.incr(_unread_count_key(user_id), delta)
+    except ValueError:
+        # Not cached yet; the next read recounts it
+        pass
+
+
+def set_unread_count(user_id, count):
+    cache.set(_unread_count_key(user_id), count, UNREAD_COUNT_TIMEOUT)
+
+
+def invalidate_unread_counts(user_ids):
+    cache.delete_many([_unread_count_key(user_id) for user_id in user_ids])
+
+
+def mark_notifications_read(user_id, ids=None, up_to=None):
+    """
+    Mark a list of notification ids, or everything up to a watermark id, as read
+    with a single UPDATE, then tell the user's other open sockets.
+    """
+    notifications = Notification.objects.filter(user_id=user_id, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(id__in=ids)
+    else:
+        notifications = notifications.filter(id__lte=up_to)
+    updated = notifications.update(is_read=True)
+
+    if updated:
+        adjust_unread_count(user_id, -updated)
+        try:
+            async_to_sync(get_channel_layer().group_send)(
+                f"user_{user_id}",
+                {
+                    'type': 'notifications_read',
+                    'ids': ids,
+                    'up_to': up_to,
+                }
+            )
+        except Exception:
+            logger.exception("Error publishing read watermark for user %s", user_id)
+    return updated
+
+
+def publish_notifications(notifications):
+    """Push already-saved notifications to their owners' sockets."""
+    if notifications:
+        async_to_sync(_publish_notifications)(notifications)
+
+
+async def _publish_notifications(notifications):
+    # Run every group_send concurrently inside a single async_to_sync hop
+    channel_layer = get_channel_layer()
+    await asyncio.gather(*(
+        channel_layer.group_send(
+            f"user_{notification.user_id}",
+            {
+                'type': 'send_notification',
+                'message': notification.message,
+                'notification_type': notification.type,
+                'time_ago': 'just now',
+                'id': notification.id,
+                'is_read': notification.is_read,
+            }
+        )
+        for notification in notifications
+    ))
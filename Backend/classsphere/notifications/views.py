@@ -4,16 +4,22 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from .models import Notification
 from .serializers import NotificationSerializer
-from .utils import create_notification
+from .utils import create_notification, get_unread_count, adjust_unread_count, set_unread_count, mark_notifications_read
+from classsphere.pagination import keyset_paginate
 
 class NotificationListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        """Get all notifications for the authenticated user"""
-        notifications = Notification.objects.filter(user=request.user)
+        """Get a page of notifications for the authenticated user, newest first"""
+        notifications, next_cursor = keyset_paginate(
+            Notification.objects.filter(user=request.user), request
+        )
         serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data)
+        return Response({
+            'results': serializer.data,
+            'next_cursor': next_cursor,
+        })
 
     def post(self, request):
         """Create a test notification"""
@@ -48,11 +54,51 @@ class NotificationDetailView(APIView):
                 {'error': 'Notification not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        notification.is_read = True
-        notification.save()
+        if not notification.is_read:
+            notification.is_read = True
+            notification.save(update_fields=['is_read'])
+            adjust_unread_count(request.user.id, -1)
         serializer = NotificationSerializer(notification)
         return Response(serializer.data)
 
+class NotificationBulkReadView(APIView):
+    permission_classes = [IsAuthenticated]
+    MAX_IDS = 1000
+
+    def post(self, request):
+        """Mark a list of notifications, or all up to a watermark id, as read"""
+        ids = request.data.get('ids')
+        up_to = request.data.get('up_to')
+
+        if ids is None and up_to is None:
+            return Response(
+                {'error': 'Either ids or up_to is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            if ids is not None:
+                if not isinstance(ids, list):
+                    raise TypeError
+                ids = [int(pk) for pk in ids]
+                if len(ids) > self.MAX_IDS:
+                    return Response(
+                        {'error': f'At most {self.MAX_IDS} ids per request'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+            else:
+                up_to = int(up_to)
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'ids must be a list of integers and up_to an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        updated = mark_notifications_read(request.user.id, ids=ids, up_to=up_to)
+        return Response(
+            {'updated': updated, 'unread_count': get_unread_count(request.user.id)},
+            status=status.HTTP_200_OK
+        )
+
 class NotificationClearView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -60,7 +106,15 @@ class NotificationClearView(APIView):
         """Clear all notifications for the authenticated user"""
         notifications = Notification.objects.filter(user=request.user)
         notifications.delete()
+        set_unread_count(request.user.id, 0)
         return Response(
             {'status': 'all notifications cleared'},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+class NotificationUnreadCountView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Get the number of unread notifications for the authenticated user"""
+        return Response({'unread_count': get_unread_count(request.user.id)})
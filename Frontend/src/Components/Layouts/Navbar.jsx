@@ -16,7 +16,7 @@ const Navbar = () => {
   const isAuthenticated = !!authToken;
   const wsBaseUrl = import.meta.env.VITE_WS_URL;
 
-  const { notifications, clearNotifications, closeWebSocket } = useNotifications(isAuthenticated, authToken, wsBaseUrl);
+  const { unreadCount, clearNotifications, closeWebSocket } = useNotifications(isAuthenticated, authToken, wsBaseUrl);
   const { currentSubscription, clearSubscription } = useSubscription(isAuthenticated, authToken);
 
   const handleLogout = async () => {
@@ -119,9 +119,9 @@ const Navbar = () => {
                     d="M15 17h5l-1.405-1.405A2.032 2.032 0 0118 14.158V11a6.002 6.002 0 00-4-5.659V5a2 2 0 10-4 0v.341C7.67 6.165 6 8.388 6 11v3.159c0 .538-.214 1.055-.595 1.436L4 17h5m6 0v1a3 3 0 11-6 0v-1m6 0H9"
                   />
                 </svg>
-                {notifications.length > 0 && notifications.filter((n) => !n.is_read).length > 0 && (
-                  <span className="absolute top-0 right-0 bg-red-500 text-white text-xs rounded-full h-4 w-4 flex items-center justify-center">
-                    {notifications.filter((n) => !n.is_read).length}
+                {unreadCount > 0 && (
+                  <span className="absolute top-0 right-0 bg-red-500 text-white text-xs rounded-full h-4 min-w-4 px-1 flex items-center justify-center">
+                    {unreadCount > 99 ? "99+" : unreadCount}
                   </span>
                 )}
               </Link>
@@ -5,24 +5,35 @@ import { toast } from "react-toastify";
 import "react-toastify/dist/ReactToastify.css";
 import Navbar from "../Layouts/Navbar";
 import Footer from "../Layouts/Footer";
-import { fetchAssignments, updateSubmissionScore } from "../../api/assignmentsapi";
+import { fetchAssignment, fetchAssignmentSubmissions, updateSubmissionScore, bulkGradeSubmissions, exportSubmissions } from "../../api/assignmentsapi";
 import { FaSpinner } from "react-icons/fa";
 
+// Query params for each submission filter
+const SUBMISSION_FILTERS = {
+  all: {},
+  graded: { graded: true },
+  ungraded: { graded: false },
+  late: { late: true },
+  on_time: { late: false },
+};
 
 const AssignmentDetail = () => {
   const { assignmentId } = useParams();
   const [assignment, setAssignment] = useState(null);
+  const [submissions, setSubmissions] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [filter, setFilter] = useState("all");
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [editedIds, setEditedIds] = useState(new Set());
+  const [savingAll, setSavingAll] = useState(false);
   const location = useLocation();
   const slug = location.state?.slug;
 
   useEffect(() => {
     const loadAssignment = async () => {
       try {
-        const assignments = await fetchAssignments(slug);
-        const selectedAssignment = assignments.find(a => a.id === parseInt(assignmentId));
-        if (!selectedAssignment) throw new Error("Assignment not found");
-        setAssignment(selectedAssignment);
+        setAssignment(await fetchAssignment(slug, assignmentId));
       } catch (error) {
         toast.error("Failed to fetch assignment details.");
         console.error("Assignment Fetch Error:", error);
@@ -33,6 +44,42 @@ const AssignmentDetail = () => {
     loadAssignment();
   }, [assignmentId, slug]);
 
+  const loadSubmissions = async (cursor = null) => {
+    const params = { ...SUBMISSION_FILTERS[filter], ...(cursor ? { cursor } : {}) };
+    const page = await fetchAssignmentSubmissions(slug, assignmentId, params);
+    setSubmissions((prev) => (cursor ? [...prev, ...page.results] : page.results));
+    setNextCursor(page.next_cursor);
+  };
+
+  useEffect(() => {
+    if (!slug) return;
+    setEditedIds(new Set());
+    loadSubmissions().catch((error) => {
+      toast.error("Failed to fetch submissions.");
+      console.error("Submissions Fetch Error:", error);
+    });
+  }, [assignmentId, slug, filter]);
+
+  const handleExport = async () => {
+    try {
+      const { download_url } = await exportSubmissions(slug, assignmentId);
+      window.location.assign(download_url);
+    } catch (error) {
+      toast.error("Failed to export submissions.");
+    }
+  };
+
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      await loadSubmissions(nextCursor);
+    } catch (error) {
+      toast.error("Failed to fetch submissions.");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleScoreChange = async (submissionId, score, totalMarks) => {
     if (score === null || score === "") return; // Allow saving only when score is set
     if (score < 0 || score > totalMarks) {
@@ -41,11 +88,13 @@ const AssignmentDetail = () => {
     }
     try {
       const updatedSubmission = await updateSubmissionScore(slug, assignmentId, submissionId, score);
-      setAssignment({
-        ...assignment,
-        submissions: assignment.submissions.map(sub => 
-          sub.id === submissionId ? updatedSubmission : sub
-        )
+      setSubmissions(submissions.map(sub =>
+        sub.id === submissionId ? updatedSubmission : sub
+      ));
+      setEditedIds((prev) => {
+        const next = new Set(prev);
+        next.delete(submissionId);
+        return next;
       });
       toast.success("Score updated successfully!");
     } catch (error) {
@@ -53,6 +102,28 @@ const AssignmentDetail = () => {
     }
   };
 
+  // Saves every edited score in one request
+  const handleSaveAll = async () => {
+    const grades = submissions
+      .filter((sub) => editedIds.has(sub.id) && sub.score !== null)
+      .map((sub) => ({ submission_id: sub.id, score: sub.score }));
+    if (grades.length === 0) return;
+    if (grades.some((g) => g.score < 0 || g.score > assignment.total_marks)) {
+      toast.error(`Scores must be between 0 and ${assignment.total_marks}`);
+      return;
+    }
+    setSavingAll(true);
+    try {
+      const result = await bulkGradeSubmissions(slug, assignmentId, grades);
+      setEditedIds(new Set());
+      toast.success(`${result.updated} scores saved!`);
+    } catch (error) {
+      toast.error(error?.response?.data?.error || "Failed to save scores.");
+    } finally {
+      setSavingAll(false);
+    }
+  };
+
 
 if (loading) {
     return (
@@ -119,14 +190,50 @@ if (loading) {
 
           {/* Submissions Section */}
           <div className="mt-6">
-            <h3 className="text-lg font-semibold text-gray-800 mb-4 flex items-center gap-2">
-              <FaEye className="text-teal-600" /> Student Submissions
-            </h3>
-            {assignment.submissions.length === 0 ? (
-              <p className="text-gray-500 text-sm">No students have submitted this assignment yet.</p>
+            <div className="flex justify-between items-center mb-4">
+              <h3 className="text-lg font-semibold text-gray-800 flex items-center gap-2">
+                <FaEye className="text-teal-600" /> Student Submissions
+                <span className="text-sm font-normal text-gray-500">
+                  ({assignment.graded_count}/{assignment.submission_count} graded)
+                </span>
+              </h3>
+              <div className="flex items-center gap-2">
+                {editedIds.size > 0 && (
+                  <button
+                    onClick={handleSaveAll}
+                    disabled={savingAll}
+                    className="bg-teal-600 text-white px-3 py-1 rounded-md hover:bg-teal-700 flex items-center gap-1 disabled:opacity-75"
+                  >
+                    <FaSave /> Save all ({editedIds.size})
+                  </button>
+                )}
+                <button
+                  onClick={handleExport}
+                  disabled={assignment.submission_count === 0}
+                  className="bg-teal-500 text-white px-3 py-1 rounded-md hover:bg-teal-600 flex items-center gap-1 text-sm disabled:opacity-75"
+                >
+                  <FaDownload /> Download all
+                </button>
+                <select
+                  value={filter}
+                  onChange={(e) => setFilter(e.target.value)}
+                  className="border border-gray-300 px-2 py-1 rounded-md text-sm focus:outline-none focus:ring-2 focus:ring-teal-500"
+                >
+                  <option value="all">All</option>
+                  <option value="graded">Graded</option>
+                  <option value="ungraded">Ungraded</option>
+                  <option value="late">Late</option>
+                  <option value="on_time">On time</option>
+                </select>
+              </div>
+            </div>
+            {submissions.length === 0 ? (
+              <p className="text-gray-500 text-sm">
+                {filter === "all" ? "No students have submitted this assignment yet." : "No submissions match this filter."}
+              </p>
             ) : (
               <div className="space-y-4">
-                {assignment.submissions.map((submission) => (
+                {submissions.map((submission) => (
                   <div
                     key={submission.id}
                     className="bg-gray-100 p-4 rounded-lg shadow-sm flex flex-col sm:flex-row justify-between items-start sm:items-center gap-4"
@@ -156,12 +263,10 @@ if (loading) {
                         value={submission.score !== null ? submission.score : ""}
                         onChange={(e) => {
                           const newScore = e.target.value === "" ? null : parseInt(e.target.value);
-                          setAssignment({
-                            ...assignment,
-                            submissions: assignment.submissions.map(sub => 
-                              sub.id === submission.id ? { ...sub, score: newScore } : sub
-                            )
-                          });
+                          setEditedIds((prev) => new Set(prev).add(submission.id));
+                          setSubmissions(submissions.map(sub =>
+                            sub.id === submission.id ? { ...sub, score: newScore } : sub
+                          ));
                         }}
                         className="w-20 border border-gray-300 px-2 py-1 rounded-md focus:outline-none focus:ring-2 focus:ring-teal-500"
                         placeholder="Score"
@@ -177,6 +282,15 @@ if (loading) {
                     </div>
                   </div>
                 ))}
+                {nextCursor && (
+                  <button
+                    onClick={handleLoadMore}
+                    disabled={loadingMore}
+                    className="w-full text-teal-600 border border-teal-500 px-4 py-2 rounded-lg hover:bg-teal-50 disabled:opacity-75"
+                  >
+                    {loadingMore ? "Loading..." : "Load more"}
+                  </button>
+                )}
               </div>
             )}
           </div>
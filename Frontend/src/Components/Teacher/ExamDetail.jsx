@@ -2,8 +2,8 @@ import React, { useEffect, useState, useCallback } from "react";
 import { useParams, Link, useLocation } from "react-router-dom";
 import { toast } from "react-toastify";
 import "react-toastify/dist/ReactToastify.css";
-import { FaEye } from "react-icons/fa";
-import { fetchExam, fetchExamSubmissionsForTeacher } from "../../api/examsapi";
+import { FaEye, FaRedo } from "react-icons/fa";
+import { fetchExam, fetchExamSubmissionsForTeacher, regradeExam } from "../../api/examsapi";
 import Navbar from "../Layouts/Navbar";
 import Footer from "../Layouts/Footer";
 import { FaSpinner } from "react-icons/fa";
@@ -51,6 +51,16 @@ const ExamDetail = () => {
     }
   }, [examId]);
 
+  const handleRegrade = async () => {
+    try {
+      const result = await regradeExam(examId);
+      toast.success(`Regraded ${result.graded} submissions, ${result.changed} scores changed.`);
+      if (showSubmissions) await handleViewSubmissions();
+    } catch (error) {
+      toast.error(error?.response?.data?.error || "Failed to regrade exam.");
+    }
+  };
+
   if (loading) {
     return (
       <>
@@ -108,6 +118,13 @@ const ExamDetail = () => {
                 <FaEye /> View Submissions
               </button>
 
+              <button
+                onClick={handleRegrade}
+                className="bg-teal-500 text-white px-4 py-2 rounded-lg hover:bg-teal-600 transition flex items-center gap-2"
+              >
+                <FaRedo /> Regrade
+              </button>
+
               <Link
                 to={`/exams/${slug}`}
                 className="bg-teal-500 text-white px-4 py-2 rounded-lg hover:bg-teal-600 transition flex items-center gap-2"
@@ -8,13 +8,17 @@ import { useNavigate, useLocation } from "react-router-dom";
 import { checkUserSubscription } from "../../api/subscriptionapi";
 import {
   getChatMessages,
+  markChatRead,
   sendChatMessage,
   getSubscribedUsers,
   createOrGetChat,
+  getOnlineUsers,
+  uploadChatMedia,
 } from "../../api/chatapi";
 import { toast } from "react-toastify";
 
 const wsBaseUrl = import.meta.env.VITE_WS_URL;
+const TYPING_THROTTLE_MS = 3000;
 
 const ChatWindow = () => {
   const [messages, setMessages] = useState([]);
@@ -28,6 +32,9 @@ const ChatWindow = () => {
     fellow_students: [],
     students_in_my_classes: [],
   });
+  const [contactsHasMore, setContactsHasMore] = useState({});
+  const [contactSearch, setContactSearch] = useState("");
+  const contactSearchRef = useRef("");
   const authToken = useSelector((state) => state.auth.authToken);
   const user = useSelector((state) => state.auth.user);
   // const userRole = useSelector((state) => state.auth.user?.role);
@@ -37,12 +44,41 @@ const ChatWindow = () => {
   const messagesEndRef = useRef(null);
   const fileInputRef = useRef(null); // Ref for file input
   const [isSending, setIsSending] = useState(false);
+  const [otherOnline, setOtherOnline] = useState(false);
+  const [otherTyping, setOtherTyping] = useState(false);
+  const lastTypingSentRef = useRef(0);
+  const typingTimeoutRef = useRef(null);
+  const [hasOlder, setHasOlder] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
 
+  const lastMessageId = messages.length ? messages[messages.length - 1].id : null;
 
-  // Auto-scroll to the latest message
+  // Auto-scroll only when a newer message arrives, not when older history is prepended
   useEffect(() => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
-  }, [messages]);
+  }, [lastMessageId]);
+
+  const loadOlderMessages = async () => {
+    if (!currentChat || !hasOlder || loadingOlder || messages.length === 0) return;
+    setLoadingOlder(true);
+    try {
+      const page = await getChatMessages(currentChat.id, { before: messages[0].id });
+      setMessages((prev) => [...page.results, ...prev]);
+      setHasOlder(page.has_more);
+    } catch (error) {
+      toast.error("Failed to load older messages.");
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
+  // The list is column-reversed, so the top of the history is the far end of the scroll range
+  const handleMessagesScroll = (e) => {
+    const el = e.currentTarget;
+    if (el.scrollHeight - el.clientHeight - Math.abs(el.scrollTop) < 80) {
+      loadOlderMessages();
+    }
+  };
 
   // Fetch initial data (subscription status and subscribed users)
   useEffect(() => {
@@ -67,12 +103,7 @@ const ChatWindow = () => {
           return;
         }
 
-        const data = await getSubscribedUsers();
-        setChatData({
-          teachers: data.teachers || [],
-          fellow_students: data.fellow_students || [],
-          students_in_my_classes: data.students_in_my_classes || [],
-        });
+        await loadContacts();
 
         // Check if a student ID was passed via state
         const selectedUserId = location.state?.selectedUserId;
@@ -89,6 +120,51 @@ const ChatWindow = () => {
     fetchInitialData();
   }, [authToken, navigate, user, location.state]); // Add location.state to dependencies
 
+  // Each contact list is paged on the server; search filters all of them by username
+  const loadContacts = async (search = contactSearchRef.current) => {
+    const data = await getSubscribedUsers(search ? { search } : {});
+    if (search !== contactSearchRef.current) return; // a newer search is in flight
+    setChatData({
+      teachers: data.teachers || [],
+      fellow_students: data.fellow_students || [],
+      students_in_my_classes: data.students_in_my_classes || [],
+    });
+    setContactsHasMore(data.has_more || {});
+  };
+
+  const loadMoreContacts = async (key) => {
+    try {
+      const search = contactSearchRef.current;
+      const data = await getSubscribedUsers({
+        offset: chatData[key].length,
+        ...(search ? { search } : {}),
+      });
+      setChatData((prev) => ({ ...prev, [key]: [...prev[key], ...(data[key] || [])] }));
+      setContactsHasMore((prev) => ({ ...prev, [key]: data.has_more?.[key] }));
+    } catch (error) {
+      toast.error("Failed to load more contacts.");
+    }
+  };
+
+  useEffect(() => {
+    if (loading) return;
+    contactSearchRef.current = contactSearch.trim();
+    const timeout = setTimeout(() => {
+      loadContacts(contactSearch.trim()).catch(() => toast.error("Failed to search contacts."));
+    }, 300);
+    return () => clearTimeout(timeout);
+  }, [contactSearch]);
+
+  const renderLoadMoreContacts = (key) =>
+    contactsHasMore[key] && (
+      <button
+        onClick={() => loadMoreContacts(key)}
+        className="w-full mt-2 text-sm text-teal-600 hover:underline"
+      >
+        Load more
+      </button>
+    );
+
   // Set up WebSocket for real-time messaging
   useEffect(() => {
     const setupWebSocket = async () => {
@@ -96,7 +172,19 @@ const ChatWindow = () => {
 
       try {
         const chatMessages = await getChatMessages(currentChat.id);
-        setMessages(chatMessages);
+        setMessages(chatMessages.results);
+        setHasOlder(chatMessages.has_more);
+        const lastMessage = chatMessages.results[chatMessages.results.length - 1];
+        if (lastMessage) markChatRead(currentChat.id, lastMessage.id);
+
+        const otherUserId = currentChat.other_user?.id;
+        setOtherTyping(false);
+        setOtherOnline(false);
+        if (otherUserId) {
+          getOnlineUsers([otherUserId])
+            .then((online) => setOtherOnline(online.includes(otherUserId)))
+            .catch(() => {});
+        }
 
         if (ws.current) ws.current.close();
 
@@ -110,7 +198,25 @@ const ChatWindow = () => {
 
         socket.onmessage = (event) => {
           const data = JSON.parse(event.data);
+          if (data.event === "read") return; // read receipt, not a message
+          if (data.event === "presence") {
+            setOtherOnline(data.online);
+            if (!data.online) setOtherTyping(false);
+            return;
+          }
+          if (data.event === "typing") {
+            setOtherTyping(data.is_typing);
+            clearTimeout(typingTimeoutRef.current);
+            if (data.is_typing) {
+              typingTimeoutRef.current = setTimeout(
+                () => setOtherTyping(false),
+                TYPING_THROTTLE_MS * 2
+              );
+            }
+            return;
+          }
           if (data.sender !== user.username) {
+            setOtherTyping(false);
             setMessages((prev) => {
               const messageExists = prev.some((msg) => msg.id === data.id);
               if (!messageExists) {
@@ -131,10 +237,24 @@ const ChatWindow = () => {
     setupWebSocket();
 
     return () => {
+      clearTimeout(typingTimeoutRef.current);
       if (ws.current) ws.current.close();
     };
   }, [currentChat, authToken, user?.username]);
 
+  const handleInputChange = (e) => {
+    setMessageInput(e.target.value);
+    // Throttled: the other side clears the indicator itself if no refresh arrives
+    const now = Date.now();
+    if (
+      ws.current?.readyState === WebSocket.OPEN &&
+      now - lastTypingSentRef.current > TYPING_THROTTLE_MS
+    ) {
+      lastTypingSentRef.current = now;
+      ws.current.send(JSON.stringify({ type: "typing", is_typing: true }));
+    }
+  };
+
   const handleSendMessage = async () => {
     if (!currentChat || (!messageInput.trim() && !mediaFile)) return;
     
@@ -143,11 +263,18 @@ const ChatWindow = () => {
       const formData = new FormData();
       formData.append("chat_id", currentChat.id);
       if (messageInput.trim()) formData.append("message", messageInput);
-      if (mediaFile) formData.append("media", mediaFile);
+      if (mediaFile) {
+        // The file goes straight to storage; only the signed result is sent here
+        const upload = await uploadChatMedia(currentChat.id, mediaFile);
+        Object.entries(upload).forEach(([key, value]) => {
+          if (value !== undefined) formData.append(key, value);
+        });
+      }
 
       const serverMessage = await sendChatMessage(currentChat.id, formData);
       setMessages((prev) => [...prev, { ...serverMessage, isSentByMe: true }]);
       setMessageInput("");
+      lastTypingSentRef.current = 0;
       setMediaFile(null);
       fileInputRef.current.value = null; // Reset file input
     } catch (error) {
@@ -226,6 +353,13 @@ const ChatWindow = () => {
             <p className="text-base font-medium text-gray-600 mb-4">
               Hello <span className="font-bold text-teal-600 capitalize">{user?.username}</span>
             </p>
+            <input
+              type="search"
+              value={contactSearch}
+              onChange={(e) => setContactSearch(e.target.value)}
+              placeholder="Search contacts"
+              className="w-full mb-4 border border-gray-300 px-3 py-1.5 rounded-lg text-sm focus:outline-none focus:ring-2 focus:ring-teal-500"
+            />
 
             {/* Render based on user role */}
             {user?.role === "student" && (
@@ -255,6 +389,7 @@ const ChatWindow = () => {
                         </li>
                       ))}
                     </ul>
+                    {renderLoadMoreContacts("teachers")}
                   </>
                 )}
 
@@ -283,6 +418,7 @@ const ChatWindow = () => {
                         </li>
                       ))}
                     </ul>
+                    {renderLoadMoreContacts("fellow_students")}
                   </>
                 )}
               </>
@@ -315,9 +451,12 @@ const ChatWindow = () => {
                         </li>
                       ))}
                     </ul>
+                    {renderLoadMoreContacts("students_in_my_classes")}
                   </>
                 ) : (
-                  <p className="text-gray-500 text-sm">No students have joined your classes yet.</p>
+                  <p className="text-gray-500 text-sm">
+                    {contactSearch.trim() ? "No students match your search." : "No students have joined your classes yet."}
+                  </p>
                 )}
               </>
             )}
@@ -330,11 +469,19 @@ const ChatWindow = () => {
               <>
                 <div className="flex items-center mb-3 border-b pb-2 sticky top-0 bg-white z-10">
                   <FaUserCircle className="w-8 h-8 text-teal-600 mr-2" />
-                  <p className="font-semibold text-lg capitalize">
-                    {currentChat.other_user?.username || "Chat"}
-                  </p>
+                  <div>
+                    <p className="font-semibold text-lg capitalize">
+                      {currentChat.other_user?.username || "Chat"}
+                    </p>
+                    <p className="text-xs text-gray-500">
+                      {otherTyping ? "typing..." : otherOnline ? "online" : "offline"}
+                    </p>
+                  </div>
                 </div>
-                <div className="flex-1 overflow-y-auto space-y-3 px-1 py-2 scroll-smooth flex flex-col-reverse">
+                <div
+                  onScroll={handleMessagesScroll}
+                  className="flex-1 overflow-y-auto space-y-3 px-1 py-2 scroll-smooth flex flex-col-reverse"
+                >
                   <div ref={messagesEndRef} />
                   {[...messages].reverse().map((msg) => (
                     <div
@@ -358,6 +505,15 @@ const ChatWindow = () => {
                       </div>
                     </div>
                   ))}
+                  {hasOlder && (
+                    <button
+                      onClick={loadOlderMessages}
+                      disabled={loadingOlder}
+                      className="self-center text-xs text-teal-600 hover:underline disabled:opacity-75"
+                    >
+                      {loadingOlder ? "Loading..." : "Load older messages"}
+                    </button>
+                  )}
                 </div>
                 {mediaFile && (
                   <p className="text-sm text-gray-600 mt-2 ml-10">Selected: {mediaFile.name}</p>
@@ -380,7 +536,7 @@ const ChatWindow = () => {
                     type="text"
                     placeholder="Type a message..."
                     value={messageInput}
-                    onChange={(e) => setMessageInput(e.target.value)}
+                    onChange={handleInputChange}
                     onKeyDown={(e) => e.key === "Enter" && handleSendMessage()}
                     className="flex-1 border border-gray-300 rounded-xl px-4 py-2 focus:outline-none focus:ring-2 focus:ring-teal-300"
                   />
@@ -13,6 +13,8 @@ const Notifications = () => {
   const { authToken } = useSelector((state) => state.auth);
   const navigate = useNavigate()
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   
 
   useEffect(() => {
@@ -27,7 +29,8 @@ const Notifications = () => {
     try {
       setLoading(true);
       const response = await notificationApi.getNotifications();
-      setNotifications(response.data);
+      setNotifications(response.data.results);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       toast.error("Failed to fetch notifications");
       console.error(error);
@@ -36,6 +39,20 @@ const Notifications = () => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await notificationApi.getNotifications(nextCursor);
+      setNotifications((prev) => [...prev, ...response.data.results]);
+      setNextCursor(response.data.next_cursor);
+    } catch (error) {
+      toast.error("Failed to fetch notifications");
+      console.error(error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) {
     return (
       <>
@@ -66,6 +83,7 @@ const Notifications = () => {
     try {
       await notificationApi.clearAll();
       setNotifications([]);
+      setNextCursor(null);
       toast.success("All notifications cleared");
     } catch (error) {
       toast.error("Failed to clear notifications");
@@ -172,6 +190,17 @@ const Notifications = () => {
                     </div>
                   </div>
                 ))}
+                {nextCursor && (
+                  <div className="p-4 text-center">
+                    <button
+                      onClick={loadMore}
+                      disabled={loadingMore}
+                      className="text-teal-600 border border-teal-500 px-4 py-2 rounded-lg hover:bg-teal-50 disabled:opacity-75"
+                    >
+                      {loadingMore ? "Loading..." : "Load more"}
+                    </button>
+                  </div>
+                )}
               </div>
             )}
           </div>
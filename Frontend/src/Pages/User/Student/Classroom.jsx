@@ -7,7 +7,7 @@ import { useSelector } from "react-redux";
 import { fetchMeetings, joinMeeting } from "../../../api/meetingsapi";
 import { fetchExams, fetchSubmissions } from "../../../api/examsapi";
 import { fetchMaterials } from "../../../api/materialsapi";
-import { fetchAssignments, submitAssignment } from "../../../api/assignmentsapi";
+import { fetchAssignments, uploadSubmissionResumable, waitForSubmissionUpload } from "../../../api/assignmentsapi";
 import { toast } from "react-toastify";
 import { fetchClassroom, joinClass } from "../../../api/classroomapi";
 import MeetingCard from "../../../Components/Layouts/MeetingCard";
@@ -108,11 +108,15 @@ const Classroom = () => {
   };
 
   const handleSubmitAssignment = async (assignmentId, file) => {
-    const formData = new FormData();
-    formData.append("file", file);
     try {
-      await submitAssignment(slug, assignmentId, formData);
-      toast.success("Assignment submitted successfully!");
+      const upload = await uploadSubmissionResumable(slug, assignmentId, file);
+      toast.info("Assignment received. Processing...");
+      const result = await waitForSubmissionUpload(slug, assignmentId, upload.id);
+      if (result?.status === "failed") {
+        toast.error("Your submission could not be processed. Please upload it again.");
+      } else {
+        toast.success("Assignment submitted successfully!");
+      }
       const updatedAssignments = await fetchAssignments(slug);
       setAssignments(updatedAssignments);
     } catch (error) {
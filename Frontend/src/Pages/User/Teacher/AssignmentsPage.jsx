@@ -282,6 +282,8 @@ const AssignmentsPage = () => {
                         <p className="text-gray-500 text-xs">
                           Due: {new Date(assignment.last_date).toLocaleString()}{" "}
                           | Marks: {assignment.total_marks}
+                          {assignment.submission_count !== undefined &&
+                            ` | Graded: ${assignment.graded_count}/${assignment.submission_count}`}
                         </p>
                       </div>
                       <div className="flex gap-2">
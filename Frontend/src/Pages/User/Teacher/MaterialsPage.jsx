@@ -69,7 +69,7 @@ const MaterialsPage = () => {
             setMaterials([...materials, newMat]);
             setNewMaterial({ topic: "", file: null });
             setIsModalOpen(false);
-            toast.success("Material added successfully!");
+            toast.success("Material is uploading. You'll be notified when it's ready.");
         } catch (error) {
             toast.error("Failed to add material.");
         } finally {
@@ -193,8 +193,22 @@ const MaterialsPage = () => {
                                 .filter((material) => material.topic.toLowerCase().includes(searchQuery.toLowerCase()))
                                 .map((material) => (
                                     <div key={material.id} className="flex justify-between items-center bg-gray-100 p-4 rounded-lg shadow-sm border">
-                                        <span className="text-gray-800 font-medium">{material.topic}</span>
-                                        {material.material_type === "video" ? (
+                                        <span className="text-gray-800 font-medium">
+                                            {material.topic}
+                                            {material.status && material.status !== "ready" && (
+                                                <span className={`ml-2 text-xs capitalize ${material.status === "failed" ? "text-red-600" : "text-gray-500"}`}>
+                                                    ({material.status})
+                                                </span>
+                                            )}
+                                            {material.status === "ready" && material.upload_status && (
+                                                <span className={`ml-2 text-xs ${material.upload_status === "failed" ? "text-red-600" : "text-gray-500"}`}>
+                                                    ({material.upload_status === "failed" ? "update failed" : "updating"})
+                                                </span>
+                                            )}
+                                        </span>
+                                        {!material.file_url ? (
+                                            <span className="text-gray-400">—</span>
+                                        ) : material.material_type === "video" ? (
                                             <video src={material.file_url} className="w-24 h-16" controls></video>
                                         ) : (
                                             <span className="text-gray-500">PDF</span>
@@ -5,6 +5,17 @@ export const fetchAssignments = async (classroomSlug) => {
     return response.data;
 };
 
+export const fetchAssignment = async (classroomSlug, assignmentId) => {
+    const response = await api.get(`/assignments/${classroomSlug}/${assignmentId}/`);
+    return response.data;
+};
+
+// params: { graded, late, limit, cursor }; returns { results, next_cursor }
+export const fetchAssignmentSubmissions = async (classroomSlug, assignmentId, params = {}) => {
+    const response = await api.get(`/assignments/${classroomSlug}/${assignmentId}/submissions/`, { params });
+    return response.data;
+};
+
 export const createAssignment = async (classroomSlug, data) => {
     const response = await api.post(`/assignments/${classroomSlug}/`, data);
     return response.data;
@@ -29,7 +40,81 @@ export const submitAssignment = async (classroomSlug, assignmentId, formData) =>
     return response.data;
 };
 
+const MAX_CHUNK_RETRIES = 3;
+
+// Resumable submission upload: init, PUT chunks by offset, then complete.
+// The upload id is remembered per file so a reload or dropped connection resumes where it stopped.
+export const uploadSubmissionResumable = async (classroomSlug, assignmentId, file, onProgress) => {
+    const base = `/assignments/${classroomSlug}/${assignmentId}/submit/uploads/`;
+    const storageKey = `submission-upload:${assignmentId}:${file.name}:${file.size}:${file.lastModified}`;
+
+    let upload = null;
+    const savedId = localStorage.getItem(storageKey);
+    if (savedId) {
+        try {
+            const response = await api.get(`${base}${savedId}/`);
+            if (response.data.status === "uploading") upload = response.data;
+        } catch {
+            // Expired or unknown; start over
+        }
+    }
+    if (!upload) {
+        const response = await api.post(base, { filename: file.name, size: file.size });
+        upload = response.data;
+        localStorage.setItem(storageKey, upload.id);
+    }
+
+    let offset = upload.received_bytes;
+    let retries = 0;
+    while (offset < file.size) {
+        const formData = new FormData();
+        formData.append("offset", offset);
+        formData.append("chunk", file.slice(offset, offset + upload.chunk_size));
+        try {
+            const response = await api.put(`${base}${upload.id}/chunk/`, formData, {
+                headers: { "Content-Type": "multipart/form-data" },
+            });
+            offset = response.data.received_bytes;
+            retries = 0;
+            onProgress?.(offset / file.size);
+        } catch (error) {
+            if (error?.response?.status === 409 && error.response.data.received_bytes !== undefined) {
+                offset = error.response.data.received_bytes; // server already has more (or less)
+            } else if (++retries > MAX_CHUNK_RETRIES) {
+                throw error;
+            }
+        }
+    }
+
+    const response = await api.post(`${base}${upload.id}/complete/`);
+    localStorage.removeItem(storageKey);
+    return response.data;
+};
+
+// Submissions are stored in the background; poll the intake record until it settles
+export const waitForSubmissionUpload = async (classroomSlug, assignmentId, uploadId, { intervalMs = 2000, timeoutMs = 120000 } = {}) => {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+        const response = await api.get(`/assignments/${classroomSlug}/${assignmentId}/submit/uploads/${uploadId}/`);
+        if (response.data.status === "complete" || response.data.status === "failed") return response.data;
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+    return null;
+};
+
 export const updateSubmissionScore = async (classroomSlug, assignmentId, submissionId, score) => {
     const response = await api.put(`/assignments/${classroomSlug}/${assignmentId}/submissions/${submissionId}/`, { score });
     return response.data;
-};
\ No newline at end of file
+};
+
+// grades: [{ submission_id, score }]
+export const bulkGradeSubmissions = async (classroomSlug, assignmentId, grades) => {
+    const response = await api.post(`/assignments/${classroomSlug}/${assignmentId}/submissions/grade/`, { grades });
+    return response.data;
+};
+
+// Returns a short-lived link; opening it streams a ZIP of all submissions with a CSV manifest
+export const exportSubmissions = async (classroomSlug, assignmentId) => {
+    const response = await api.post(`/assignments/${classroomSlug}/${assignmentId}/submissions/export/`);
+    return response.data;
+};
@@ -1,4 +1,5 @@
 // chatapi.js
+import axios from "axios";
 import api from "./api";
 
 export const getRecentChats = async () => {
@@ -6,8 +7,15 @@ export const getRecentChats = async () => {
   return response.data;
 };
 
-export const getChatMessages = async (chatId) => {
-  const response = await api.get(`/chat/messages/${chatId}/`);
+// params: { before: messageId } for older history, { after: messageId } for the delta since last seen
+export const getChatMessages = async (chatId, params = {}) => {
+  const response = await api.get(`/chat/messages/${chatId}/`, { params });
+  return response.data;
+};
+
+// Move the read watermark: every message up to messageId counts as read
+export const markChatRead = async (chatId, messageId) => {
+  const response = await api.post(`/chat/${chatId}/read/`, { message_id: messageId });
   return response.data;
 };
 
@@ -18,12 +26,45 @@ export const sendChatMessage = async (chatId, data) => {
   return response.data;
 };
 
-export const getSubscribedUsers = async () => {
-  const response = await api.get("/subscribed-users/");
+// Two-phase media upload: sign, upload straight to storage, then send with the token
+export const uploadChatMedia = async (chatId, file) => {
+  const { data: upload } = await api.post("/chat/media/upload/", {
+    chat_id: chatId,
+    filename: file.name,
+  });
+
+  const formData = new FormData();
+  Object.entries(upload.fields).forEach(([key, value]) => formData.append(key, value));
+  formData.append("file", file);
+
+  // Relative URLs come from the local storage stand-in and live on the API host
+  const uploadUrl = upload.upload_url.startsWith("/")
+    ? new URL(upload.upload_url, import.meta.env.VITE_BASE_URL).href
+    : upload.upload_url;
+  const response = await axios.post(uploadUrl, formData);
+
+  return {
+    upload_token: upload.upload_token,
+    // Cloudinary's response is what the server verifies the upload against
+    version: response.data.version,
+    signature: response.data.signature,
+  };
+};
+
+// params: { search, limit, offset }
+export const getSubscribedUsers = async (params = {}) => {
+  const response = await api.get("/subscribed-users/", { params });
   return response.data;
 };
 
 export const createOrGetChat = async (userId) => {
   const response = await api.post("/chat/create/", { user_id: userId });
   return response.data;
-};
\ No newline at end of file
+};
+
+export const getOnlineUsers = async (userIds) => {
+  const response = await api.get("/chat/presence/", {
+    params: { user_ids: userIds.join(",") },
+  });
+  return response.data.online;
+};
@@ -90,4 +90,10 @@ const fetchExamSubmissionsForTeacher = async (examId) => {
     throw error;
   }
 };
-export { fetchExams, fetchExam, publishExam,fetchExamSubmissionsForTeacher, fetchSubmissions, createExam, updateExam, deleteExam, submitExam };
\ No newline at end of file
+// corrections: { [questionId]: correctAnswer }; every submission is re-scored afterwards
+const regradeExam = async (examId, corrections = {}) => {
+  const response = await api.post(`/exams/${examId}/regrade/`, { corrections });
+  return response.data;
+};
+
+export { fetchExams, fetchExam, publishExam,fetchExamSubmissionsForTeacher, fetchSubmissions, createExam, updateExam, deleteExam, submitExam, regradeExam };
\ No newline at end of file
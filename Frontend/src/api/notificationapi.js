@@ -3,9 +3,13 @@ import api from "./api";
 
 // Notification API service
 const notificationApi = {
-  // Get all notifications
-  getNotifications: (token) =>
-    api.get("/notifications/" ),
+  // Get a page of notifications (pass next_cursor to load older ones)
+  getNotifications: (cursor) =>
+    api.get("/notifications/", { params: cursor ? { cursor } : {} }),
+
+  // Get the unread notification count
+  getUnreadCount: () =>
+    api.get("/notifications/unread-count/"),
 
   // Mark a notification as read
   markAsRead: (id) =>
@@ -14,6 +18,10 @@ const notificationApi = {
       {},
     ),
 
+  // Mark many notifications as read: pass { ids: [...] } or { up_to: id }
+  markManyAsRead: (payload) =>
+    api.post("/notifications/mark-as-read/", payload),
+
   // Clear all notifications
   clearAll: () =>
     api.post(
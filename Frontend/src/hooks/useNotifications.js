@@ -1,13 +1,20 @@
 import { useState, useEffect, useRef } from "react";
 import notificationApi from "../api/notificationapi";
 
+// Must stay well below the server's PRESENCE_TTL_SECONDS
+const HEARTBEAT_INTERVAL_MS = 25000;
+
 const useNotifications = (isAuthenticated, authToken, wsBaseUrl) => {
   const [notifications, setNotifications] = useState([]);
+  // Server-side count; the loaded list is only the first page
+  const [unreadCount, setUnreadCount] = useState(0);
   const wsRef = useRef(null);
+  const heartbeatRef = useRef(null);
 
   useEffect(() => {
     if (isAuthenticated && authToken) {
       fetchNotifications();
+      fetchUnreadCount();
     }
   }, [isAuthenticated, authToken]);
 
@@ -16,28 +23,47 @@ const useNotifications = (isAuthenticated, authToken, wsBaseUrl) => {
 
     if (!wsRef.current || wsRef.current.readyState === WebSocket.CLOSED) {
       const websocket = new WebSocket(
-        `${wsBaseUrl}/notifications/?token=${authToken}`
+        `${wsBaseUrl}/notifications/?token=${authToken}&batch=1`
       );
 
       websocket.onopen = () => {
         console.log("WebSocket connected successfully");
+        // Keeps the user's presence alive while the app is open
+        heartbeatRef.current = setInterval(() => {
+          if (websocket.readyState === WebSocket.OPEN) {
+            websocket.send(JSON.stringify({ type: "heartbeat" }));
+          }
+        }, HEARTBEAT_INTERVAL_MS);
       };
 
       websocket.onmessage = (event) => {
         const data = JSON.parse(event.data);
-        setNotifications((prev) => [
-          {
-            id: data.id,
-            message: data.message,
-            notification_type: data.notification_type,
-            time_ago: data.time_ago,
-            is_read: data.is_read,
-          },
-          ...prev,
-        ]);
+        if (data.event === "read") {
+          // Another tab marked notifications as read
+          setNotifications((prev) =>
+            prev.map((n) =>
+              (data.ids ? data.ids.includes(n.id) : n.id <= data.up_to)
+                ? { ...n, is_read: true }
+                : n
+            )
+          );
+          fetchUnreadCount();
+          return;
+        }
+        // Batched sockets deliver an array of notifications, oldest first
+        const incoming = (Array.isArray(data) ? data : [data]).map((n) => ({
+          id: n.id,
+          message: n.message,
+          notification_type: n.notification_type,
+          time_ago: n.time_ago,
+          is_read: n.is_read,
+        }));
+        setNotifications((prev) => [...incoming.reverse(), ...prev]);
+        setUnreadCount((count) => count + incoming.filter((n) => !n.is_read).length);
       };
 
       websocket.onclose = () => {
+        clearInterval(heartbeatRef.current);
         console.log("WebSocket disconnected");
       };
 
@@ -49,6 +75,7 @@ const useNotifications = (isAuthenticated, authToken, wsBaseUrl) => {
     }
 
     return () => {
+      clearInterval(heartbeatRef.current);
       if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
         console.log("Closing WebSocket connection");
         wsRef.current.close();
@@ -59,21 +86,31 @@ const useNotifications = (isAuthenticated, authToken, wsBaseUrl) => {
   const fetchNotifications = async () => {
     try {
       const response = await notificationApi.getNotifications();
-      setNotifications(response.data);
+      setNotifications(response.data.results);
     } catch (error) {
       console.error("Failed to fetch notifications:", error);
     }
   };
 
+  const fetchUnreadCount = async () => {
+    try {
+      const response = await notificationApi.getUnreadCount();
+      setUnreadCount(response.data.unread_count);
+    } catch (error) {
+      console.error("Failed to fetch unread count:", error);
+    }
+  };
+
   const clearNotifications = () => {
     setNotifications([]);
+    setUnreadCount(0);
   };
 
   const closeWebSocket = () => {
     if (wsRef.current) wsRef.current.close();
   };
 
-  return { notifications, clearNotifications, closeWebSocket };
+  return { notifications, unreadCount, clearNotifications, closeWebSocket };
 };
 
 export default useNotifications;